@@ -0,0 +1,160 @@
+"""Records/s of the JSON log path, before and after the batched writer.
+
+Compares the previous ``JSONFormatter`` (``ast.literal_eval`` round trip, plain
+``json``) and one-record-at-a-time ``QueueListener`` with the current formatter
+and ``BatchingQueueListener``, both for formatting alone and end to end from
+several threads into a rotating log file.
+
+Usage:
+    python -m benchmarks.bench_logging [--records N] [--threads N]
+"""
+
+import argparse
+import ast
+import copy
+import datetime as dt
+import json
+import logging
+import logging.config
+import pathlib
+import tempfile
+import threading
+import time
+
+from utils import logging as log_utils
+from utils.logging import LOG_RECORD_BUILTIN_ATTRS, LOGGER_CONFIG, JSONFormatter
+
+
+class LegacyJSONFormatter(logging.Formatter):
+    """The ``JSONFormatter`` before the fast path."""
+
+    def __init__(self, *, fmt_keys: dict[str, str] | None = None):
+        super().__init__()
+        self.fmt_keys = fmt_keys if fmt_keys is not None else {}
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(self._prepare_log_dict(record), default=str)
+
+    def _prepare_log_dict(self, record: logging.LogRecord):
+        formatted_message: str = ast.literal_eval(repr(record.getMessage()))
+        formatted_message = "\\n ".join(
+            [
+                mess_split.strip()
+                for mess_split in formatted_message.split("\n")
+                if mess_split.strip() != ""
+            ]
+        )
+        always_fields = {
+            "message": formatted_message,
+            "timestamp": dt.datetime.fromtimestamp(
+                record.created, tz=dt.timezone.utc
+            ).isoformat(),
+        }
+        message = {
+            key: (
+                msg_val
+                if (msg_val := always_fields.pop(val, None)) is not None
+                else getattr(record, val)
+            )
+            for key, val in self.fmt_keys.items()
+        }
+        message.update(always_fields)
+        for key, val in record.__dict__.items():
+            if key not in LOG_RECORD_BUILTIN_ATTRS:
+                message[key] = val
+
+        return message
+
+
+def _records(count: int) -> list[logging.LogRecord]:
+    return [
+        logging.makeLogRecord(
+            {
+                "name": "bench",
+                "levelno": logging.DEBUG,
+                "levelname": "DEBUG",
+                "pathname": __file__,
+                "lineno": 1,
+                "msg": "Fetched %s in %.3f s",
+                "args": (f"https://example.com/jobs/{i}", 0.123),
+                "url": f"https://example.com/jobs/{i}",
+            }
+        )
+        for i in range(count)
+    ]
+
+
+def bench_formatter(formatter: logging.Formatter, records: list[logging.LogRecord]) -> float:
+    start_time = time.perf_counter()
+    for record in records:
+        formatter.format(record)
+    return len(records) / (time.perf_counter() - start_time)
+
+
+def _config(log_file: pathlib.Path, legacy: bool) -> dict:
+    config = copy.deepcopy(LOGGER_CONFIG)
+    config.pop("filters", None)
+    config["handlers"]["queue_handler"].pop("filters", None)
+    config["handlers"]["stdout"]["level"] = "CRITICAL"
+    config["handlers"]["logfile"]["filename"] = str(log_file)
+    config["loggers"]["root"]["level"] = "DEBUG"
+    if legacy:
+        config["formatters"]["json"]["()"] = f"{__name__}.LegacyJSONFormatter"
+        config["handlers"]["logfile"]["class"] = (
+            "concurrent_log_handler.ConcurrentRotatingFileHandler"
+        )
+        config["handlers"]["queue_handler"].pop("listener")
+
+    return config
+
+
+def bench_end_to_end(count: int, threads: int, legacy: bool) -> float:
+    """Records/s from ``threads`` logging threads until the file is written."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        logging.config.dictConfig(_config(pathlib.Path(tmp_dir) / "app.jsonl", legacy))
+        listener = logging.getHandlerByName("queue_handler").listener
+        listener.start()
+        logger = logging.getLogger("bench")
+
+        def _log(offset: int) -> None:
+            for i in range(count // threads):
+                logger.debug("Fetched %s in %.3f s", f"https://example.com/jobs/{offset + i}", 0.123)
+
+        workers = [
+            threading.Thread(target=_log, args=(n * count,)) for n in range(threads)
+        ]
+        start_time = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        # Wait for the listener to write everything
+        listener.stop()
+        elapsed = time.perf_counter() - start_time
+
+        logging.getHandlerByName("logfile").close()
+        return (count // threads) * threads / elapsed
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--records", type=int, default=50_000)
+    arg_parser.add_argument("--threads", type=int, default=4)
+    args = arg_parser.parse_args()
+
+    fmt_keys = LOGGER_CONFIG["formatters"]["json"]["fmt_keys"]
+    records = _records(args.records)
+    print(f"orjson: {'yes' if log_utils.orjson is not None else 'no'}")
+    print(
+        f"formatter: legacy {bench_formatter(LegacyJSONFormatter(fmt_keys=fmt_keys), records):,.0f} records/s, "
+        f"current {bench_formatter(JSONFormatter(fmt_keys=fmt_keys), records):,.0f} records/s"
+    )
+    print(
+        f"end to end ({args.threads} threads): "
+        f"legacy {bench_end_to_end(args.records, args.threads, legacy=True):,.0f} records/s, "
+        f"current {bench_end_to_end(args.records, args.threads, legacy=False):,.0f} records/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Micro-benchmark of the per-page parse time of the site specs.
+
+Compares the compiled single-pass ``SiteSpec`` extraction against the previous
+hand-written parsers, which ran one ``css_first`` traversal per field on the
+Modest backend, and checks that both return the same fields. The hand-written
+parsers are also timed on the Lexbor backend the specs use, to separate the gain
+of the engine switch from the gain of the single pass.
+
+Usage:
+    python -m benchmarks.bench_parsers [--pages N] [--repeat N] [--html FILE:SPEC ...]
+"""
+
+import argparse
+import pathlib
+import statistics
+import time
+from collections.abc import Callable
+
+from selectolax.lexbor import LexborHTMLParser
+from selectolax.parser import HTMLParser
+
+from module.html_parser import COMPILED_SPECS
+
+
+def _legacy_extract(
+    html_text: str,
+    company_selector: str,
+    title_selector: str,
+    description_selector: str,
+    parser_class: type[HTMLParser] | type[LexborHTMLParser] = HTMLParser,
+) -> dict[str, str | None]:
+    """The extraction done by ``_parse_l``/``_parse_i`` before the site specs."""
+    html = parser_class(html_text)
+
+    job_posting_company = html.css_first(company_selector)
+    job_title = html.css_first(title_selector)
+    job_description = html.css_first(description_selector)
+    return {
+        "job_posting_company": job_posting_company.text(strip=True).split(".css-")[0]
+        if job_posting_company is not None
+        else None,
+        "job_title": job_title.text(strip=True) if job_title is not None else None,
+        "job_description": job_description.text(strip=True, separator="\n")
+        if job_description
+        else None,
+    }
+
+
+LEGACY_SELECTORS: dict[str, tuple[str, str, str]] = {
+    "l": (
+        'a[data-tracking-control-name="public_jobs_topcard-org-name"]',
+        'h1[class*="top-card-layout__title"]',
+        'div[class*="description__text description__text--rich"] section div[class*="show-more-less-html__markup"]',
+    ),
+    "i": (
+        'span[class*="css-qcqa6h"] a',
+        'div[class*="jobsearch-JobInfoHeader-title-container"]',
+        "div#jobDescriptionText",
+    ),
+}
+LEGACY_PARSERS: dict[str, Callable[[str], dict[str, str | None]]] = {
+    spec_name: lambda html_text, selectors=selectors: _legacy_extract(
+        html_text, *selectors
+    )
+    for spec_name, selectors in LEGACY_SELECTORS.items()
+}
+# Same per-field ``css_first`` traversals, on the engine the specs use
+LEXBOR_PARSERS: dict[str, Callable[[str], dict[str, str | None]]] = {
+    spec_name: lambda html_text, selectors=selectors: _legacy_extract(
+        html_text, *selectors, parser_class=LexborHTMLParser
+    )
+    for spec_name, selectors in LEGACY_SELECTORS.items()
+}
+
+
+def _filler(count: int) -> str:
+    """Navigation, recommendations and scripts that surround a real posting."""
+    return "".join(
+        f'<div class="card card--{i}"><a href="/jobs/{i}" class="card__link">'
+        f'<span class="card__title">Job {i}</span></a><ul><li>Remote</li>'
+        f"<li>Full-time</li></ul></div>"
+        for i in range(count)
+    )
+
+
+def _description(index: int) -> str:
+    return (
+        f"<p>Role {index}. <strong>We are hiring</strong> a data engineer.</p>"
+        "<ul>"
+        + "".join(f"<li>Requirement {i}: Python, SQL and Spark</li>" for i in range(15))
+        + "</ul><p>Benefits<br>Pension<br>Gym</p>"
+    )
+
+
+def synthetic_page(spec_name: str, index: int, filler: int = 400) -> str:
+    """Build a page with the markup the spec's selectors expect."""
+    if spec_name == "l":
+        body = (
+            f'<h1 class="top-card-layout__title font-sans">Data Engineer {index}</h1>'
+            '<a data-tracking-control-name="public_jobs_topcard-org-name" href="#">'
+            f"Company {index}.css-1x2y3z{{color:red}}</a>"
+            '<div class="description__text description__text--rich"><section>'
+            f'<div class="show-more-less-html__markup">{_description(index)}</div>'
+            "</section></div>"
+        )
+    else:
+        body = (
+            '<div class="jobsearch-JobInfoHeader-title-container css-1">'
+            f"<h1>Data Engineer {index}</h1></div>"
+            f'<span class="css-qcqa6h e1"><a href="#">Company {index}</a></span>'
+            f'<div id="jobDescriptionText">{_description(index)}</div>'
+        )
+
+    return f"<html><body>{_filler(filler)}{body}{_filler(filler)}</body></html>"
+
+
+def _time_per_page(fn: Callable[[str], object], pages: list[str], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for page in pages:
+            fn(page)
+        timings.append((time.perf_counter() - start_time) / len(pages))
+
+    return min(timings)
+
+
+def run(pages: dict[str, list[str]], repeat: int = 5) -> dict[str, dict[str, float]]:
+    """Time the implementations for every spec. Results are in seconds per page.
+
+    ``engine_speedup`` is the gain of moving the per-field parsers from Modest to
+    Lexbor, ``single_pass_speedup`` the remaining gain of the compiled spec.
+    """
+    results = {}
+    for spec_name, spec_pages in pages.items():
+        compiled = COMPILED_SPECS[spec_name]
+        legacy = LEGACY_PARSERS[spec_name]
+        lexbor = LEXBOR_PARSERS[spec_name]
+
+        mismatches = sum(
+            compiled.extract(page) != legacy(page) for page in spec_pages
+        )
+        legacy_time = _time_per_page(legacy, spec_pages, repeat)
+        lexbor_time = _time_per_page(lexbor, spec_pages, repeat)
+        compiled_time = _time_per_page(compiled.extract, spec_pages, repeat)
+        results[spec_name] = {
+            "legacy_s_per_page": legacy_time,
+            "lexbor_css_first_s_per_page": lexbor_time,
+            "spec_s_per_page": compiled_time,
+            "speedup": legacy_time / compiled_time,
+            "engine_speedup": legacy_time / lexbor_time,
+            "single_pass_speedup": lexbor_time / compiled_time,
+            "mismatches": mismatches,
+        }
+
+    return results
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--pages", type=int, default=200)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument(
+        "--html",
+        nargs="*",
+        default=[],
+        help="Saved pages to benchmark instead of synthetic ones, as FILE:SPEC.",
+    )
+    args = arg_parser.parse_args()
+
+    pages: dict[str, list[str]] = {}
+    if args.html:
+        for item in args.html:
+            path, spec_name = item.rsplit(":", 1)
+            pages.setdefault(spec_name, []).append(pathlib.Path(path).read_text())
+    else:
+        pages = {
+            spec_name: [synthetic_page(spec_name, i) for i in range(args.pages)]
+            for spec_name in COMPILED_SPECS
+        }
+
+    for spec_name, result in run(pages, repeat=args.repeat).items():
+        print(
+            f"{spec_name}: legacy {result['legacy_s_per_page'] * 1000:.3f} ms/page, "
+            f"legacy on lexbor {result['lexbor_css_first_s_per_page'] * 1000:.3f} ms/page, "
+            f"spec {result['spec_s_per_page'] * 1000:.3f} ms/page, "
+            f"speedup {result['speedup']:.2f}x "
+            f"(engine {result['engine_speedup']:.2f}x, "
+            f"single pass {result['single_pass_speedup']:.2f}x), "
+            f"{result['mismatches']} mismatching pages "
+            f"(median page size {statistics.median(map(len, pages[spec_name])):.0f} chars)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""Offline throughput benchmark of the pipeline stages.
+
+Everything runs against local stand-in servers (see ``benchmarks.servers``), so
+no network access is needed. Measured:
+
+- ``parse``: pages/s of ``parser()`` on pages already in memory.
+- ``scrape``: URLs/s of ``scrape_data`` against the local job board.
+- ``extract``: records/s of ``process_job_descriptions`` against the fake LLM.
+
+Every stage runs in a fresh process, so the reported peak RSS is its own. The
+data directory is a temporary ``JOBS_TMP_DIR``. The results are written as JSON
+and can be compared with an earlier run.
+
+Pages are downloaded with plain httpx: cloudscraper's stealth mode sleeps 2-6 s
+between requests on purpose, which would only measure the sleep.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--urls N] [--records N] [--llm-latency S]
+        [--llm-servers N] [--llm-slots N] [--output FILE] [--compare BASELINE.json]
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import multiprocessing
+import os
+import pathlib
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+import pyarrow.parquet as pq
+
+from benchmarks.servers import FakeLLMServer, JobBoardServer
+
+# Defaults
+RESULTS_DIR = pathlib.Path(__file__).parent / "results"
+DEFAULT_TOLERANCE = 0.1  # Allowed relative slowdown before a metric is a regression
+HOSTS = {"127.0.0.1": "l", "localhost": "i"}  # Local host name -> site spec
+_WORDS = (
+    "python sql spark dbt airflow data pipeline engineer team cloud warehouse "
+    "model batch stream quality platform analytics design build own deliver"
+).split()
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _register_local_parsers() -> None:
+    from module.html_parser import parse_with_spec, register_parser
+
+    for host, spec_name in HOSTS.items():
+        register_parser(
+            host,
+            lambda url, response_text=None, spec_name=spec_name: parse_with_spec(
+                spec_name, url=url, response_text=response_text
+            ),
+        )
+
+
+def _job_urls(board_url: str, count: int) -> list[str]:
+    port = board_url.rsplit(":", 1)[1]
+    hosts = list(HOSTS.items())
+    return [
+        f"http://{hosts[i % len(hosts)][0]}:{port}/jobs/{hosts[i % len(hosts)][1]}/{i}"
+        for i in range(count)
+    ]
+
+
+def bench_parse(pages: int) -> dict[str, Any]:
+    from benchmarks.bench_parsers import synthetic_page
+    from module.html_parser import parser
+
+    _register_local_parsers()
+    items = [
+        (url, synthetic_page(url.split("/")[-2], i))
+        for i, url in enumerate(_job_urls("http://127.0.0.1:80", pages))
+    ]
+
+    start_time = time.perf_counter()
+    parsed = sum(
+        parser(url=url, response_text=page).job_description is not None
+        for url, page in items
+    )
+    elapsed = time.perf_counter() - start_time
+    return {
+        "pages": pages,
+        "parsed": parsed,
+        "seconds": elapsed,
+        "pages_per_s": pages / elapsed,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def bench_scrape(board_url: str, urls: int, max_workers: int) -> dict[str, Any]:
+    import main
+    from module.html_cache import HTMLCache
+    from module.html_parser import set_fetcher
+    from module.scrapers import httpx_scrp
+    from utils.rate_limit import HostRateLimiter
+
+    _register_local_parsers()
+    set_fetcher(httpx_scrp)
+    (main.tmp_dir / "urls.csv").write_text("\n".join(_job_urls(board_url, urls)))
+    cache = HTMLCache(cache_dir=main.tmp_dir / "bench_html_cache")
+
+    start_time = time.perf_counter()
+    raw_path = main.scrape_data(
+        max_workers=max_workers,
+        limiter=HostRateLimiter(rate=1e9, burst=1e9, jitter=(0.0, 0.0)),
+        cache=cache,
+        resume=False,
+        return_path=True,
+    )
+    elapsed = time.perf_counter() - start_time
+    descriptions = pq.read_table(raw_path, columns=["job_description"]).column(0)
+    return {
+        "urls": urls,
+        "scraped": len(descriptions) - descriptions.null_count,
+        "seconds": elapsed,
+        "urls_per_s": urls / elapsed,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def bench_extract(
+    records: int,
+    batch_token_budget: int | None,
+    chunk_size: int | None = None,
+) -> dict[str, Any]:
+    import main
+    from module.llm_cache import LLMCache
+    from module.output import JOB_DATA_SCHEMA, ParquetStreamWriter
+
+    # Distinct descriptions, so none are de-duplicated or cached. Written row
+    # by row, so the input doesn't count towards the peak RSS
+    rng = random.Random(0)
+    raw_path = main.tmp_dir / "bench_raw.parquet"
+    with ParquetStreamWriter(raw_path, JOB_DATA_SCHEMA) as writer:
+        for i in range(records):
+            writer.write(
+                {
+                    "url": f"http://127.0.0.1/jobs/l/{i}",
+                    "job_posting_company": f"Company {i % 50}",
+                    "job_title": "Data Engineer",
+                    "job_description": " ".join(rng.choices(_WORDS, k=300)),
+                }
+            )
+
+    start_time = time.perf_counter()
+    main.process_job_descriptions(
+        path_to_df=raw_path,
+        filename=main.tmp_dir / "bench_processed.parquet",
+        cache=LLMCache(main.tmp_dir / "bench_llm_cache.sqlite3"),
+        resume=False,
+        batch_token_budget=batch_token_budget,
+        chunk_size=chunk_size,
+        return_path=True,
+    )
+    elapsed = time.perf_counter() - start_time
+    return {
+        "records": records,
+        "seconds": elapsed,
+        "records_per_s": records / elapsed,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _run_isolated(fn, *args) -> dict[str, Any]:
+    """Run ``fn`` in a fresh process and return its result."""
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(fn, args)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=pathlib.Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> list[str]:
+    """Compare the throughput of every stage with a baseline run.
+
+    Returns:
+        The stages that got slower than ``tolerance`` allows.
+    """
+    regressions = []
+    for stage, result in results["results"].items():
+        previous = baseline.get("results", {}).get(stage)
+        if previous is None:
+            continue
+
+        for metric, value in result.items():
+            if not metric.endswith("_per_s") or metric not in previous:
+                continue
+
+            ratio = value / previous[metric]
+            print(f"{stage}.{metric}: {previous[metric]:.1f} -> {value:.1f} ({ratio:.2f}x)")
+            if ratio < 1 - tolerance:
+                regressions.append(f"{stage}.{metric}")
+
+    return regressions
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--pages", type=int, default=2000)
+    arg_parser.add_argument("--urls", type=int, default=500)
+    arg_parser.add_argument("--records", type=int, default=500)
+    arg_parser.add_argument("--max-workers", type=int, default=8)
+    arg_parser.add_argument("--board-latency", type=float, default=0.01)
+    arg_parser.add_argument("--llm-latency", type=float, default=0.2)
+    arg_parser.add_argument("--llm-servers", type=int, default=1)
+    arg_parser.add_argument(
+        "--llm-slots", type=int, default=None, help="Parallel requests per LLM server."
+    )
+    arg_parser.add_argument("--batch-token-budget", type=int, default=None)
+    arg_parser.add_argument(
+        "--chunk-size", type=int, default=None, help="Stream the extract input."
+    )
+    arg_parser.add_argument(
+        "--stages", nargs="*", default=["parse", "scrape", "extract"]
+    )
+    arg_parser.add_argument("--output", type=pathlib.Path)
+    arg_parser.add_argument("--compare", type=pathlib.Path, help="Baseline JSON file.")
+    arg_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = arg_parser.parse_args()
+
+    results: dict[str, Any] = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("output", "compare")
+        },
+        "results": {},
+    }
+
+    with (
+        tempfile.TemporaryDirectory(prefix="jobs-bench-") as tmp_dir,
+        JobBoardServer(latency=args.board_latency) as board,
+        contextlib.ExitStack() as servers,
+    ):
+        llms = [
+            servers.enter_context(
+                FakeLLMServer(latency=args.llm_latency, slots=args.llm_slots)
+            )
+            for _ in range(args.llm_servers)
+        ]
+        # Inherited by the stage processes, set before they import anything
+        os.environ["JOBS_TMP_DIR"] = tmp_dir
+        os.environ["LMSTUDIO_API_HOST"] = llms[0].url
+        os.environ["LLM_BACKENDS"] = ",".join(llm.url for llm in llms)
+
+        stages = {
+            "parse": (bench_parse, args.pages),
+            "scrape": (bench_scrape, board.url, args.urls, args.max_workers),
+            "extract": (
+                bench_extract,
+                args.records,
+                args.batch_token_budget,
+                args.chunk_size,
+            ),
+        }
+        for stage in args.stages:
+            fn, *fn_args = stages[stage]
+            results["results"][stage] = _run_isolated(fn, *fn_args)
+            print(f"{stage}: {json.dumps(results['results'][stage])}")
+
+    output = args.output or RESULTS_DIR / (
+        f"{results['timestamp'].replace(':', '-')}_{results['commit']}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results saved to: {output}")
+
+    if args.compare is not None:
+        regressions = compare(
+            results, json.loads(args.compare.read_text()), tolerance=args.tolerance
+        )
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
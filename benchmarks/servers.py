@@ -0,0 +1,224 @@
+"""Local stand-ins for the job boards and the LLM server.
+
+``JobBoardServer`` serves synthetic posting pages shaped like the real ones, and
+``FakeLLMServer`` answers ``/api/v1/chat`` like LM Studio after a configurable
+latency. Both run on a background thread and bind a free port on 127.0.0.1.
+"""
+
+import collections
+import contextlib
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.bench_parsers import synthetic_page
+from module.llm_batching import BATCH_PROMPT_SUFFIX
+
+_JOB_PATH = re.compile(r"^(?P<moved>/moved)?/jobs/(?P<spec>[a-z]+)/(?P<index>\d+)$")
+
+
+class _Server:
+    handler: type[BaseHTTPRequestHandler]
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self.handler)
+        self._httpd.daemon_threads = True
+        self._httpd.owner = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def start(self) -> "_Server":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "_Server":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send(
+        self, status: int, body: bytes, content_type: str, **headers: str
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _JobBoardHandler(_Handler):
+    def do_GET(self) -> None:
+        match = _JOB_PATH.match(self.path.split("?", 1)[0])
+        if match is None:
+            self._send(404, b"Not found", "text/plain")
+            return
+
+        if match["moved"]:
+            self.server.owner.responses[301] += 1
+            location = self.path.removeprefix("/moved")
+            self._send(301, b"", "text/html; charset=utf-8", Location=location)
+            return
+
+        time.sleep(self.server.owner.latency)
+        page = synthetic_page(match["spec"], int(match["index"])).encode("utf-8")
+        etag = f'"{hashlib.sha256(page).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.server.owner.responses[304] += 1
+            self._send(304, b"", "text/html; charset=utf-8", ETag=etag)
+            return
+
+        self.server.owner.responses[200] += 1
+        self._send(200, page, "text/html; charset=utf-8", ETag=etag)
+
+
+class JobBoardServer(_Server):
+    """Serves ``/jobs/{spec}/{index}`` pages for the ``"l"`` and ``"i"`` site specs.
+
+    Pages carry an ``ETag`` and a matching ``If-None-Match`` gets a bodyless 304.
+    ``/moved/jobs/{spec}/{index}`` answers with a 301 to the page.
+    ``responses`` counts the answers sent per status code.
+    """
+
+    handler = _JobBoardHandler
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(latency)
+        self.responses: collections.Counter[int] = collections.Counter()
+
+    def job_url(self, spec_name: str, index: int) -> str:
+        return f"{self.url}/jobs/{spec_name}/{index}"
+
+    def moved_url(self, spec_name: str, index: int) -> str:
+        """A URL that redirects to ``job_url``."""
+        return f"{self.url}/moved/jobs/{spec_name}/{index}"
+
+
+def fake_extraction(job_description: str) -> dict:
+    """A plausible extraction result, derived from the text so it is stable."""
+    text = job_description.lower()
+    return {
+        "python_required": "python" in text,
+        "experience_required": float(len(job_description) % 7),
+        "other_programming_languages": ["SQL"] if "sql" in text else [],
+        "required_technologies": [
+            tech for tech in ("Spark", "dbt", "Airflow") if tech.lower() in text
+        ],
+        "nice_to_know": ["Tech: Kafka"],
+    }
+
+
+class _LLMHandler(_Handler):
+    def do_GET(self) -> None:
+        if self.path != "/api/v1/models":
+            self._send(404, b"Not found", "text/plain")
+        elif self.server.owner.failing:
+            self._send(503, b"Unavailable", "text/plain")
+        else:
+            self._send(200, b'{"models": [{"key": "fake"}]}', "application/json")
+
+    def do_POST(self) -> None:
+        if self.path != "/api/v1/chat":
+            self._send(404, b"Not found", "text/plain")
+            return
+
+        owner = self.server.owner
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if owner.failing:
+            self._send(503, b"Unavailable", "text/plain")
+            return
+
+        with owner.slots:
+            owner.requests += 1
+            time.sleep(owner.latency * random.uniform(0.8, 1.2))
+
+        if body["system_prompt"].endswith(BATCH_PROMPT_SUFFIX):
+            content = {
+                id_: fake_extraction(text)
+                for id_, text in json.loads(body["input"]).items()
+            }
+        else:
+            content = fake_extraction(body["input"])
+
+        stats = {
+            "input_tokens": len(body["input"]) // 4,
+            "total_output_tokens": 64,
+        }
+        if body.get("stream"):
+            self._stream(json.dumps(content), stats, body.get("max_output_tokens"))
+            return
+
+        response = {
+            "output": [
+                {"type": "reasoning", "content": "..."},
+                {"type": "message", "content": json.dumps(content)},
+            ],
+            "stats": stats,
+        }
+        self._send(200, json.dumps(response).encode("utf-8"), "application/json")
+
+    def _stream(self, content: str, stats: dict, max_output_tokens: int | None) -> None:
+        # LM Studio style server-sent events, the answer in 8 character deltas,
+        # one delta per token up to the cap
+        events = [("reasoning.delta", {"content": "..."})]
+        events += [
+            ("message.delta", {"content": content[i : i + 8]})
+            for i in range(0, len(content), 8)
+        ]
+        events = events[:max_output_tokens]
+        events.append(("chat.end", {"result": {"stats": stats}}))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for event, data in events:
+                data = json.dumps({"type": event, **data})
+                self.wfile.write(f"event: {event}\ndata: {data}\n\n".encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stops reading once the JSON object is complete
+            pass
+
+
+class FakeLLMServer(_Server):
+    """Answers ``POST /api/v1/chat`` after ``latency`` seconds (+-20%).
+
+    Requests with ``"stream": true`` get the answer as server-sent events. At
+    most ``slots`` requests are processed at once, like a GPU serving a fixed
+    number of parallel sequences, the others queue. While ``failing`` is set,
+    every request, ``GET /api/v1/models`` included, gets a 503.
+    """
+
+    handler = _LLMHandler
+
+    def __init__(self, latency: float = 0.0, slots: int | None = None):
+        super().__init__(latency)
+        self.slots = (
+            threading.BoundedSemaphore(slots) if slots else contextlib.nullcontext()
+        )
+        self.failing = False
+        self.requests = 0
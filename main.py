@@ -1,12 +1,16 @@
 import concurrent.futures
 import json
 import pathlib
-import random
 import time
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict
 from typing import Any
 
+import httpx
 import pandas as pd
 import pendulum
+import pyarrow.parquet as pq
 from rich.progress import (
     BarColumn,
     MofNCompleteColumn,
@@ -16,9 +20,28 @@ from rich.progress import (
     track,
 )
 
-from module.html_parser import parser
-from module.llm_processing import request_llm_response
+from module.boilerplate import BoilerplateIndex
+from module.dataset import SCHEMAS, PartitionedWriter
+from module.dedup import DEFAULT_DEDUP_THRESHOLD, find_near_duplicates
+from module.html_cache import HTMLCache
+from module.journal import Journal, fingerprint
+from module.llm_batching import (
+    BATCH_PROMPT_SUFFIX,
+    build_batch_message,
+    plan_batches,
+    split_batch_response,
+)
+from module.llm_cache import LLMCache, cache_key
+from module.llm_processing import LLM_POOL, request_llm_response
+from module.llm_streaming import request_llm_json
+from module.output import ParquetStreamWriter, to_str
+from module.pipeline import DEFAULT_QUEUE_SIZE, run_stage
+from module.rule_extractor import extract as rule_extract
+from module.scrape_engine import DEFAULT_MAX_WORKERS, iter_scrape
 from utils.logging import get_logger
+from utils.metrics import METRICS, MetricsReporter
+from utils.paths import TMP_DIR
+from utils.rate_limit import HostRateLimiter
 
 log = get_logger()
 
@@ -39,9 +62,21 @@ LLM_PROMPT = """The provided message contain the job post information. I want yo
 
 Do not add any comments or any unnecessary text. Just provide the output in a JSON format with the column names as keys and the extracted information as values. If you cannot find any information for a certain key, just mark it as an empty string or an empty list depending on the expected output type. The output should be a valid JSON that can be parsed by Python's json.loads() function."""
 
+LLM_MODEL = "openai/gpt-oss-120b"
+LLM_REQUEST_KWARGS: dict[str, Any] = {"reasoning": "high"}
+# Stream the answers and stop at the end of the JSON object, with a deadline,
+# a token cap and hedged retries (see module.llm_streaming)
+LLM_STREAMING = True
+
+# Scraped pages are replayed from the journal for a day, after that they are re-scraped
+SCRAPE_JOURNAL_MAX_AGE = 24 * 60 * 60
+
+# Rows read at a time when a raw parquet file is processed in chunks
+DEFAULT_CHUNK_SIZE = 1024
+
 
 # Check if /tmp exists
-tmp_dir = pathlib.Path(__file__).parent / "tmp"
+tmp_dir = TMP_DIR
 if not tmp_dir.exists():
     log.error(
         "/tmp directory does not exist, creating it. Add the csv file with the URLs in the /tmp directory."
@@ -52,16 +87,7 @@ if not tmp_dir.exists():
     )
 
 
-def scrape_data() -> pd.DataFrame:
-    """
-    This function scrapes the data from the URLs provided in the csv file in the /tmp directory. It then saves the scraped data to a new parquet file in the /tmp/output directory. The parquet file contains the following columns: url, job_posting_company, job_title, job_description.
-
-    Returns:
-        pd.DataFrame: A DataFrame containing the scraped data.
-
-    Raises:
-        RuntimeError: If no csv file is found in the /tmp directory.
-    """
+def _find_csv_files() -> list[pathlib.Path]:
     # Check if there's any csv file in /tmp
     csv_files = list(tmp_dir.glob("*.csv"))
     if not csv_files:
@@ -72,70 +98,206 @@ def scrape_data() -> pd.DataFrame:
             "No csv file found in /tmp directory. Please add the csv file with the URLs in the /tmp directory and run the script again."
         )
 
-    for csv_file in csv_files:
-        log.info(f"Processing file: {csv_file}")
-        # Here you would add the logic to process the URLs in the csv file
-        # For example, you could read the csv file and extract the URLs, then perform some operations on them
-        # This is just a placeholder for your actual processing logic
-        with open(csv_file, "r") as f:
-            urls: list[str] = f.readlines()
-
-            # Make sure that the urls are not empty strings and that there
-            # are URLs
-            urls = [url.strip() for url in urls if url.strip() != ""]
-            if len(urls) == 0:
-                log.warning(f"No URLs found in file: {csv_file}")
-                continue
+    return csv_files
+
+
+def _read_urls(csv_file: pathlib.Path) -> list[str]:
+    log.info(f"Processing file: {csv_file}")
+    with open(csv_file, "r") as f:
+        urls: list[str] = f.readlines()
+
+    # Make sure that the urls are not empty strings and that there
+    # are URLs
+    urls = [url.strip() for url in urls if url.strip() != ""]
+    if len(urls) == 0:
+        log.warning(f"No URLs found in file: {csv_file}")
+
+    return urls
+
+
+def _iter_scraped(
+    urls: list[str],
+    journal: Journal,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    limiter: HostRateLimiter | None = None,
+    cache: HTMLCache | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Yield the scraped record of every URL, journaled ones are replayed without scraping."""
+    # Skip the URLs that were already scraped by an interrupted run
+    completed = journal.load(max_age=SCRAPE_JOURNAL_MAX_AGE)
+    pending: list[str] = []
+    for url in urls:
+        if url in completed:
+            yield completed[url]["data"]
+        else:
+            pending.append(url)
+    log.info(f"Resuming with {len(urls) - len(pending)} URLs already scraped.")
+
+    # Scrape the URLs concurrently, each host gets its own rate limit
+    for index, job_data in iter_scrape(
+        pending, max_workers=max_workers, limiter=limiter, cache=cache
+    ):
+        record = asdict(job_data)
+        # Failed pages stay out of the journal so the next run retries them
+        if job_data.job_description is not None:
+            journal.append(url=pending[index], data=record)
+
+        yield record
+
+
+def _write_output(
+    rows: Iterable[dict[str, Any]],
+    filename: str | pathlib.Path,
+    dataset: str,
+) -> pathlib.Path:
+    """Write the rows of a run to ``filename`` and append them to the partitioned dataset."""
+    with (
+        ParquetStreamWriter(filename, SCHEMAS[dataset]) as writer,
+        PartitionedWriter(dataset) as dataset_writer,
+    ):
+        for row in rows:
+            writer.write(row)
+            dataset_writer.write(row)
 
-            data = []
-            for url in track(urls, description=f"Processing URLs from {csv_file}..."):
-                data.append(parser(url=url.strip()))
+    log.info(f"Processed data saved to: {filename}")
+    return pathlib.Path(filename)
+
+
+def _iter_raw(
+    urls: list[str],
+    journal: Journal,
+    failed: dict[str, dict[str, Any]],
+) -> Iterator[dict[str, Any]]:
+    """Yield the scraped record of every URL from the journal, in the order of ``urls``."""
+    completed = journal.load(max_age=SCRAPE_JOURNAL_MAX_AGE)
+    for url in urls:
+        yield completed[url]["data"] if url in completed else failed.get(
+            url, {"url": url}
+        )
 
-                sleep_time = random.randint(3, 20)
-                log.debug(
-                    f"Sleeping for {sleep_time} seconds to avoid getting blocked."
-                )
-                time.sleep(sleep_time)
-
-            # Create a pandas DataFrame from the data list and save it to a new parquet file
-            df = pd.DataFrame(
-                data,
-                columns=[
-                    "url",
-                    "job_posting_company",
-                    "job_title",
-                    "job_description",
-                ],
-            )
 
-            output_dir = tmp_dir / "output"
-            output_dir.mkdir(parents=True, exist_ok=True)
-            output_file = (
-                output_dir / f"{pendulum.now().to_datetime_string()}_raw.parquet"
-            )
-            df.to_parquet(output_file, index=False)
-            log.info(f"Processed data saved to: {output_file}")
+def _save_raw(
+    urls: list[str],
+    journal: Journal,
+    failed: dict[str, dict[str, Any]],
+) -> pathlib.Path:
+    # Stream the output from the journal to a new parquet file
+    output_file = (
+        tmp_dir / "output" / f"{pendulum.now().to_datetime_string()}_raw.parquet"
+    )
+    return _write_output(_iter_raw(urls, journal, failed), output_file, "raw")
 
-            return df.copy()
 
+def scrape_data(
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    limiter: HostRateLimiter | None = None,
+    cache: HTMLCache | None = None,
+    resume: bool = True,
+    return_path: bool = False,
+) -> pd.DataFrame | pathlib.Path | None:
+    """
+    This function scrapes the data from the URLs provided in the csv file in the /tmp directory. It then saves the scraped data to a new parquet file in the /tmp/output directory. The parquet file contains the following columns: url, job_posting_company, job_title, job_description, scraped_at.
 
-def __request_summary_from_llm(job_description: str) -> dict[str, Any]:
-    response = request_llm_response(
-        model="openai/gpt-oss-120b",
-        prompt=LLM_PROMPT,
-        message=job_description,
-        reasoning="high",
-    )
+    Args:
+        max_workers: Maximum number of concurrent requests across all hosts.
+        limiter: Per-host rate limiter. Defaults to ``HostRateLimiter()``.
+        cache: Raw HTML cache the pages are read through. Defaults to ``HTMLCache()``.
+        resume: Skip the URLs already scraped in the scrape journal. Defaults to True.
+        return_path: Return the path of the parquet file instead of reading it back into a DataFrame, so the scraped data never has to fit in memory. Defaults to False.
 
+    Returns:
+        pd.DataFrame | pathlib.Path | None: A DataFrame containing the scraped data (its path with ``return_path``), None if no csv file has any URL.
+
+    Raises:
+        RuntimeError: If no csv file is found in the /tmp directory.
+    """
+    csv_files = _find_csv_files()
+
+    cache = cache if cache is not None else HTMLCache()
+    journal = Journal(stage="scrape")
+    if not resume:
+        journal.reset()
+
+    for csv_file in csv_files:
+        urls = _read_urls(csv_file)
+        if len(urls) == 0:
+            continue
+
+        failed: dict[str, dict[str, Any]] = {}
+        for record in track(
+            _iter_scraped(
+                urls, journal, max_workers=max_workers, limiter=limiter, cache=cache
+            ),
+            total=len(urls),
+            description=f"Processing URLs from {csv_file}...",
+        ):
+            if record["job_description"] is None:
+                failed[record["url"]] = record
+
+        output_file = _save_raw(urls, journal, failed)
+        return output_file if return_path else pd.read_parquet(output_file)
+
+
+def __message_content(response: httpx.Response) -> str | None:
     if int(response.status_code) == 200:
         llm_output: dict[str, Any] = response.json()
         for output in llm_output.get("output", []):
             if str(output.get("type")).lower() != "message":
                 continue
 
-            return json.loads(output.get("content", "{}"))
+            return output.get("content", "{}")
 
-    return {}
+    return None
+
+
+def __request_content(prompt: str, message: str) -> str | None:
+    if LLM_STREAMING:
+        return request_llm_json(
+            model=LLM_MODEL,
+            prompt=prompt,
+            message=message,
+            **LLM_REQUEST_KWARGS,
+        )
+
+    response = request_llm_response(
+        model=LLM_MODEL,
+        prompt=prompt,
+        message=message,
+        **LLM_REQUEST_KWARGS,
+    )
+    return __message_content(response)
+
+
+def _rule_based_output(
+    job_description: str, min_confidence: float | None
+) -> dict[str, Any] | None:
+    """The rule-based extraction, None when it isn't confident enough to skip the LLM."""
+    if min_confidence is None:
+        return None
+
+    result = rule_extract(job_description)
+    confident = result.confidence >= min_confidence
+    METRICS.inc(
+        "rule_extractions_total", result="accepted" if confident else "rejected"
+    )
+    return result.output if confident else None
+
+
+def __request_summary_from_llm(job_description: str) -> dict[str, Any]:
+    content = __request_content(LLM_PROMPT, job_description)
+    return json.loads(content) if content is not None else {}
+
+
+def __request_batch_summary_from_llm(
+    job_descriptions: list[str],
+) -> dict[int, dict[str, Any]]:
+    message, ids = build_batch_message(job_descriptions)
+    content = __request_content(LLM_PROMPT + BATCH_PROMPT_SUFFIX, message)
+    if content is None:
+        return {}
+
+    results = split_batch_response(content, ids)
+    return {index: results[id_] for index, id_ in enumerate(ids) if id_ in results}
 
 
 def request_and_parse(url: str, job_description: str) -> dict[str, Any]:
@@ -143,9 +305,7 @@ def request_and_parse(url: str, job_description: str) -> dict[str, Any]:
         llm_output = __request_summary_from_llm(job_description)
     except Exception as e:
         log.error(f"Error fetching/parsing data for URL: {url}. Error: {e}")
-        llm_output = {
-            url: url.strip(),
-        }
+        llm_output = {}
 
     return {
         "url": url.strip(),
@@ -153,15 +313,243 @@ def request_and_parse(url: str, job_description: str) -> dict[str, Any]:
     }
 
 
+def request_and_parse_batch(rows: list[dict[str, str]]) -> list[dict[str, Any]]:
+    """Extract several job descriptions with one LLM request.
+
+    Postings whose part of the answer is missing or invalid are retried one by
+    one with ``request_and_parse``. Results are returned in the order of ``rows``.
+    """
+    try:
+        llm_outputs = __request_batch_summary_from_llm(
+            [row["job_description"] for row in rows]
+        )
+    except Exception as e:
+        log.error(f"Error fetching/parsing batch of {len(rows)} job posts. Error: {e}")
+        llm_outputs = {}
+
+    return [
+        {"url": row["url"].strip(), **llm_outputs[index]}
+        if index in llm_outputs
+        else request_and_parse(url=row["url"], job_description=row["job_description"])
+        for index, row in enumerate(rows)
+    ]
+
+
+def _extraction_key(job_description: str, batched: bool = False) -> str:
+    # Answers extracted in a batch are cached apart from the single ones
+    return cache_key(
+        model=LLM_MODEL,
+        prompt=LLM_PROMPT + BATCH_PROMPT_SUFFIX if batched else LLM_PROMPT,
+        message=job_description,
+        **LLM_REQUEST_KWARGS,
+    )
+
+
+def _streaming_llm_input(
+    record: dict[str, Any], boilerplate: BoilerplateIndex | None
+) -> str:
+    """
+    Text of a streamed posting that is sent to the LLM and keyed in the LLM cache, the job description without the paragraphs ``boilerplate`` has seen often enough so far. The posting is counted first.
+    """
+    llm_input = record["job_description"]
+    if boilerplate is None:
+        return llm_input
+
+    boilerplate.add(llm_input, record["job_posting_company"], record["url"])
+    return boilerplate.strip(llm_input, record["job_posting_company"], record["url"])
+
+
+def _save_processed(
+    records: Iterable[dict[str, Any]],
+    journal: Journal,
+    filename: str | pathlib.Path,
+) -> pathlib.Path:
+    # Stream the scraped records joined with the journaled LLM output, the
+    # records without a valid extraction keep empty LLM columns
+    completed = journal.load()
+
+    def _rows() -> Iterator[dict[str, Any]]:
+        for record in records:
+            url = record["url"].strip()
+            entry = completed.get(url)
+            if entry is not None and entry["fingerprint"] == fingerprint(
+                to_str(record["job_description"])
+            ):
+                yield {**record, **entry["data"], "url": url}
+            else:
+                yield {**record, "url": url}
+
+    return _write_output(_rows(), filename, "processed")
+
+
+def _iter_parquet_records(
+    path: str | pathlib.Path, chunk_size: int
+) -> Iterator[dict[str, Any]]:
+    """Yield the rows of a parquet file, reading one record batch at a time."""
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size):
+        yield from batch.to_pylist()
+
+
+def _process_parquet_in_chunks(
+    path_to_df: str | pathlib.Path,
+    filename: str | pathlib.Path | None,
+    cache: LLMCache,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int | None = None,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    rule_min_confidence: float | None = None,
+) -> pathlib.Path:
+    """
+    Streaming variant of ``process_job_descriptions`` for inputs too large for memory. The parquet file is read in record batches, at most ``queue_size`` postings per queue and one per worker are in flight, and every result is written to the output as soon as it arrives, so the rows are in completion order. Nothing is journaled: a restarted run gets the finished postings back from the LLM cache, and the rule-based ones are cheap to redo. Boilerplate stripping is not applied, its index grows with every posting.
+
+    Args:
+        path_to_df: Path to a parquet file with the scraped data.
+        filename: Path of the output parquet file.
+        cache: LLM result cache.
+        chunk_size: Rows read from the parquet file at a time.
+        workers: Number of threads sending job descriptions to the LLM. Defaults to the LLM pool's maximum concurrency.
+        queue_size: Capacity of the queues between the reader, the workers and the writer.
+        rule_min_confidence: Keep the rule-based extraction of the postings it is at least this confident about. Defaults to None, every posting is sent to the LLM.
+
+    Returns:
+        pathlib.Path: Path of the parquet file with the scraped data and the extracted information.
+    """
+    if filename is None:
+        filename = (
+            tmp_dir
+            / "output"
+            / f"{pendulum.now().to_datetime_string()}_processed.parquet"
+        )
+
+    workers = workers or LLM_POOL.max_limit
+    counts = {"failed": 0, "rule_extracted": 0}
+
+    def _extract(record: dict[str, Any]) -> tuple[dict[str, Any], bool]:
+        # Nothing to extract from pages that failed to scrape
+        if not isinstance(record.get("job_description"), str):
+            return {}, False
+
+        key = _extraction_key(record["job_description"])
+        cached_output = cache.get(key)
+        if cached_output is not None:
+            return cached_output, False
+
+        rule_output = _rule_based_output(
+            record["job_description"], rule_min_confidence
+        )
+        if rule_output is not None:
+            return rule_output, True
+
+        result = request_and_parse(
+            url=record["url"], job_description=record["job_description"]
+        )
+        llm_output = {col: val for col, val in result.items() if col != "url"}
+        if llm_output:
+            cache.put(key, model=LLM_MODEL, result=llm_output)
+
+        return llm_output, False
+
+    with (
+        ParquetStreamWriter(filename, SCHEMAS["processed"]) as writer,
+        PartitionedWriter("processed") as dataset_writer,
+        progress_bar,
+    ):
+        task = progress_bar.add_task(
+            "Processing job descriptions...",
+            total=pq.ParquetFile(path_to_df).metadata.num_rows,
+        )
+
+        def _write(
+            record: dict[str, Any],
+            output: tuple[dict[str, Any], bool] | None,
+        ) -> None:
+            llm_output, rule_based = output if output is not None else ({}, False)
+            counts["rule_extracted"] += rule_based
+            if not llm_output:
+                counts["failed"] += 1
+
+            row = {**record, **llm_output, "url": record["url"].strip()}
+            writer.write(row)
+            dataset_writer.write(row)
+            progress_bar.update(task, advance=1)
+
+        run_stage(
+            _iter_parquet_records(path_to_df, chunk_size),
+            worker=_extract,
+            sink=_write,
+            workers=workers,
+            queue_size=queue_size,
+        )
+
+    log.info(f"{counts['rule_extracted']} job descriptions extracted without the LLM.")
+    log.info(f"LLM cache hits: {cache.hits}, misses: {cache.misses}")
+    log.info(f"LLM concurrency: {LLM_POOL.stats()}")
+    log.info(f"{counts['failed']} job descriptions without extracted information.")
+    log.info(f"Processed data saved to: {filename}")
+    return pathlib.Path(filename)
+
+
 def process_job_descriptions(
     path_to_df: str | pathlib.Path | None = None,
     df: pd.DataFrame | None = None,
     filename: str | pathlib.Path | None = None,
-) -> pd.DataFrame:
+    cache: LLMCache | None = None,
+    resume: bool = True,
+    batch_token_budget: int | None = None,
+    dedup_threshold: float | None = DEFAULT_DEDUP_THRESHOLD,
+    strip_boilerplate: bool = True,
+    rule_min_confidence: float | None = None,
+    chunk_size: int | None = None,
+    workers: int | None = None,
+    return_path: bool = False,
+) -> pd.DataFrame | pathlib.Path:
+    """
+    Extract the job information from the job descriptions with the LLM and save the result to a new parquet file.
+
+    Args:
+        path_to_df: Path to a parquet file with the scraped data.
+        df: DataFrame with the scraped data, used if ``path_to_df`` is not given.
+        filename: Path of the output parquet file.
+        cache: LLM result cache. Defaults to ``LLMCache()``.
+        resume: Replay the records already in the extract journal. Defaults to True.
+        batch_token_budget: If given, pack several job descriptions into one request up to this many estimated tokens. Defaults to None (one request per job description).
+        dedup_threshold: Minimum similarity of near-duplicate job descriptions, only one of them is sent to the LLM and its result is shared. ``None`` disables the de-duplication.
+        strip_boilerplate: Leave the paragraphs that repeat across the postings of a company or a site (company blurbs, benefits, legal notices) out of the LLM input. Defaults to True.
+        rule_min_confidence: Keep the rule-based extraction of the postings it is at least this confident about, only the others are sent to the LLM. Defaults to None, every posting is sent to the LLM.
+        chunk_size: If given, stream ``path_to_df`` in record batches of this many rows instead of loading it, so memory stays flat however large the file is (see ``_process_parquet_in_chunks``). The de-duplication, the request batching and the boilerplate stripping need the whole dataset in memory and are skipped. Use it with ``return_path``, the output is read back into memory otherwise. Defaults to None.
+        workers: Number of threads sending job descriptions to the LLM. Defaults to the LLM pool's maximum concurrency.
+        return_path: Return the path of the parquet file instead of reading it back into a DataFrame. Defaults to False.
+
+    Returns:
+        pd.DataFrame | pathlib.Path: A DataFrame with the scraped data and the extracted information (the path of its parquet file with ``return_path``).
+
+    Raises:
+        ValueError: If neither ``path_to_df`` nor ``df`` is given, or ``chunk_size`` is given without ``path_to_df``.
+    """
     if path_to_df is None and not isinstance(df, pd.DataFrame):
         raise ValueError("Either path_to_df or df must be provided.")
 
-    if isinstance(df, pd.DataFrame) and filename is None:
+    if chunk_size is not None and path_to_df is None:
+        raise ValueError("chunk_size can only be used with path_to_df.")
+
+    cache = cache if cache is not None else LLMCache()
+    if chunk_size is not None:
+        output_file = _process_parquet_in_chunks(
+            path_to_df,
+            filename=filename,
+            cache=cache,
+            chunk_size=chunk_size,
+            workers=workers,
+            rule_min_confidence=rule_min_confidence,
+        )
+        return output_file if return_path else pd.read_parquet(output_file)
+
+    journal = Journal(stage="extract")
+    if not resume:
+        journal.reset()
+
+    if filename is None:
         filename = (
             tmp_dir
             / "output"
@@ -171,49 +559,319 @@ def process_job_descriptions(
     if isinstance(path_to_df, (str, pathlib.Path)):
         df = pd.read_parquet(path_to_df)
 
+    # Paragraphs shared across the dataset are left out of the LLM input
+    boilerplate = (
+        BoilerplateIndex().fit(
+            df[["url", "job_posting_company", "job_description"]].to_dict(
+                orient="records"
+            )
+        )
+        if strip_boilerplate
+        else None
+    )
+
     # Process each job description in the DataFrame using the LLM
-    extracted_data_dict = []
+    completed = journal.load()
+    failed = 0
+    rule_extracted = 0
     with progress_bar:
         task = progress_bar.add_task("Processing job descriptions...", total=len(df))
 
-        url_desc_pair: list[dict[str, str]] = df[["url", "job_description"]].to_dict(
-            orient="records"
-        )
-        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-            futures = [
-                executor.submit(
-                    request_and_parse,
-                    url=row["url"],
-                    job_description=row["job_description"],
+        url_desc_pair: list[dict[str, str]] = df[
+            ["url", "job_posting_company", "job_description"]
+        ].to_dict(orient="records")
+        # The adaptive limiter decides how many requests are really in flight
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers or LLM_POOL.max_limit
+        ) as executor:
+            # Only descriptions that were never processed go to the LLM
+            pending: list[tuple[dict[str, str], str, str]] = []
+            for row in url_desc_pair:
+                url = row["url"].strip()
+
+                # Nothing to extract from pages that failed to scrape
+                if not isinstance(row["job_description"], str):
+                    failed += 1
+                    progress_bar.update(task, advance=1)
+                    continue
+
+                desc_fingerprint = fingerprint(row["job_description"])
+
+                # Already journaled by a previous (interrupted) run
+                entry = completed.get(url)
+                if entry is not None and entry["fingerprint"] == desc_fingerprint:
+                    progress_bar.update(task, advance=1)
+                    continue
+
+                llm_input = (
+                    boilerplate.strip(
+                        row["job_description"], row["job_posting_company"], url
+                    )
+                    if boilerplate is not None
+                    else row["job_description"]
+                )
+                key = _extraction_key(llm_input, batched=bool(batch_token_budget))
+                cached_output = cache.get(key)
+                if cached_output is not None:
+                    journal.append(
+                        url=url, data=cached_output, fingerprint=desc_fingerprint
+                    )
+                    progress_bar.update(task, advance=1)
+                    continue
+
+                # Clear-cut postings don't need the LLM
+                rule_output = _rule_based_output(
+                    row["job_description"], rule_min_confidence
+                )
+                if rule_output is not None:
+                    journal.append(
+                        url=url, data=rule_output, fingerprint=desc_fingerprint
+                    )
+                    rule_extracted += 1
+                    progress_bar.update(task, advance=1)
+                    continue
+
+                pending.append(
+                    (
+                        {"url": row["url"], "job_description": llm_input},
+                        key,
+                        desc_fingerprint,
+                    )
+                )
+
+            if boilerplate is not None:
+                log.info(boilerplate.stats.summary())
+            log.info(f"{rule_extracted} job descriptions extracted without the LLM.")
+
+            # Near-duplicate postings share the result of one representative
+            clusters: dict[int, list[int]] = defaultdict(list)
+            if dedup_threshold is not None:
+                representatives = find_near_duplicates(
+                    [row["job_description"] for row, _, _ in pending],
+                    threshold=dedup_threshold,
                 )
-                for row in url_desc_pair
-            ]
+            else:
+                representatives = range(len(pending))
+            for index, representative in enumerate(representatives):
+                clusters[representative].append(index)
+            log.info(
+                f"Sending {len(clusters)} of {len(pending)} job descriptions to the LLM after de-duplication."
+            )
+
+            futures = {}
+            to_extract = list(clusters)
+            if batch_token_budget:
+                for batch in plan_batches(
+                    [pending[index][0]["job_description"] for index in to_extract],
+                    token_budget=batch_token_budget,
+                ):
+                    batch_indices = [to_extract[index] for index in batch]
+                    future = executor.submit(
+                        request_and_parse_batch,
+                        [pending[index][0] for index in batch_indices],
+                    )
+                    futures[future] = batch_indices
+            else:
+                for index in to_extract:
+                    row = pending[index][0]
+                    future = executor.submit(
+                        request_and_parse,
+                        url=row["url"],
+                        job_description=row["job_description"],
+                    )
+                    futures[future] = [index]
 
             for future in concurrent.futures.as_completed(futures):
-                result = future.result()
-                extracted_data_dict.append(result)
-                progress_bar.update(task, advance=1)
-
-    # Store the processed data in a new parquet file
-    final_df = df.merge(pd.DataFrame(extracted_data_dict), on="url", how="left")
-    __parquet_df = df.merge(
-        pd.DataFrame(extracted_data_dict, dtype=str), on="url", how="left"
+                results = future.result()
+                if isinstance(results, dict):
+                    results = [results]
+
+                for representative, result in zip(futures[future], results):
+                    llm_output = {
+                        col: val for col, val in result.items() if col != "url"
+                    }
+                    # Only the exact description goes into the cache, the
+                    # duplicates are journaled with the same result
+                    if llm_output:
+                        cache.put(
+                            pending[representative][1],
+                            model=LLM_MODEL,
+                            result=llm_output,
+                        )
+
+                    for index in clusters[representative]:
+                        row, _, desc_fingerprint = pending[index]
+                        if llm_output:
+                            journal.append(
+                                url=row["url"].strip(),
+                                data=llm_output,
+                                fingerprint=desc_fingerprint,
+                            )
+                        else:
+                            failed += 1
+
+                        progress_bar.update(task, advance=1)
+
+    log.info(f"LLM cache hits: {cache.hits}, misses: {cache.misses}")
+    log.info(f"LLM concurrency: {LLM_POOL.stats()}")
+    log.info(f"{failed} job descriptions without extracted information.")
+
+    output_file = _save_processed(
+        (row._asdict() for row in df.itertuples(index=False)), journal, filename
     )
-    __parquet_df.to_parquet(filename, index=False)
-    log.info(f"Processed data saved to: {filename}")
+    return output_file if return_path else pd.read_parquet(output_file)
+
+
+def run_pipeline(
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    extract_workers: int | None = None,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    limiter: HostRateLimiter | None = None,
+    html_cache: HTMLCache | None = None,
+    llm_cache: LLMCache | None = None,
+    resume: bool = True,
+    strip_boilerplate: bool = True,
+    rule_min_confidence: float | None = None,
+) -> pathlib.Path | None:
+    """
+    Scrape the URLs from the csv file in the /tmp directory and extract the job information with the LLM in a single streaming pass. Every scraped posting goes straight to the LLM over a bounded queue, so both stages run at the same time and memory stays bounded. Both the raw and the processed parquet files are written to the /tmp/output directory.
+
+    Args:
+        max_workers: Maximum number of concurrent requests across all hosts.
+        extract_workers: Number of threads sending job descriptions to the LLM. Defaults to the adaptive limiter's maximum.
+        queue_size: Capacity of the queues between the stages.
+        limiter: Per-host rate limiter. Defaults to ``HostRateLimiter()``.
+        html_cache: Raw HTML cache the pages are read through. Defaults to ``HTMLCache()``.
+        llm_cache: LLM result cache. Defaults to ``LLMCache()``.
+        resume: Replay the records already in the scrape and extract journals. Defaults to True.
+        strip_boilerplate: Leave the paragraphs that repeat across the postings of a company or a site out of the LLM input. The counts grow as the postings stream in, so a paragraph is only dropped once it has been seen often enough. Defaults to True.
+        rule_min_confidence: Keep the rule-based extraction of the postings it is at least this confident about, only the others are sent to the LLM. Defaults to None, every posting is sent to the LLM.
+
+    Returns:
+        pathlib.Path | None: Path of the parquet file with the processed data, None if no csv file has any URL.
+
+    Raises:
+        RuntimeError: If no csv file is found in the /tmp directory.
+    """
+    csv_files = _find_csv_files()
 
-    return final_df.copy()
+    extract_workers = extract_workers or LLM_POOL.max_limit
+    html_cache = html_cache if html_cache is not None else HTMLCache()
+    llm_cache = llm_cache if llm_cache is not None else LLMCache()
+    scrape_journal = Journal(stage="scrape")
+    extract_journal = Journal(stage="extract")
+    if not resume:
+        scrape_journal.reset()
+        extract_journal.reset()
+
+    for csv_file in csv_files:
+        urls = _read_urls(csv_file)
+        if len(urls) == 0:
+            continue
+
+        extracted = extract_journal.load()
+        scrape_failed: dict[str, dict[str, Any]] = {}
+        boilerplate = BoilerplateIndex() if strip_boilerplate else None
+
+        with progress_bar:
+            scrape_task = progress_bar.add_task("Scraping URLs...", total=len(urls))
+            extract_task = progress_bar.add_task(
+                "Processing job descriptions...", total=len(urls)
+            )
+
+            def _source() -> Iterator[dict[str, Any]]:
+                for record in _iter_scraped(
+                    urls,
+                    scrape_journal,
+                    max_workers=max_workers,
+                    limiter=limiter,
+                    cache=html_cache,
+                ):
+                    progress_bar.update(scrape_task, advance=1)
+                    if record["job_description"] is None:
+                        scrape_failed[record["url"]] = record
+                        progress_bar.update(extract_task, advance=1)
+                        continue
+
+                    # Already journaled by a previous (interrupted) run
+                    entry = extracted.get(record["url"])
+                    if entry is not None and entry["fingerprint"] == fingerprint(
+                        record["job_description"]
+                    ):
+                        progress_bar.update(extract_task, advance=1)
+                        continue
+
+                    yield {
+                        **record,
+                        "llm_input": _streaming_llm_input(record, boilerplate),
+                    }
+
+            def _extract(record: dict[str, Any]) -> tuple[dict[str, Any], bool]:
+                cached_output = llm_cache.get(_extraction_key(record["llm_input"]))
+                if cached_output is not None:
+                    return cached_output, True
+
+                # Not an LLM answer, so it is kept out of the LLM cache too
+                rule_output = _rule_based_output(
+                    record["job_description"], rule_min_confidence
+                )
+                if rule_output is not None:
+                    return rule_output, True
+
+                result = request_and_parse(
+                    url=record["url"], job_description=record["llm_input"]
+                )
+                return {col: val for col, val in result.items() if col != "url"}, False
+
+            def _write(
+                record: dict[str, Any],
+                output: tuple[dict[str, Any], bool] | None,
+            ) -> None:
+                llm_output, from_cache = output if output is not None else ({}, False)
+                if llm_output:
+                    if not from_cache:
+                        llm_cache.put(
+                            _extraction_key(record["llm_input"]),
+                            model=LLM_MODEL,
+                            result=llm_output,
+                        )
+                    extract_journal.append(
+                        url=record["url"],
+                        data=llm_output,
+                        fingerprint=fingerprint(record["job_description"]),
+                    )
+
+                progress_bar.update(extract_task, advance=1)
+
+            run_stage(
+                _source(),
+                worker=_extract,
+                sink=_write,
+                workers=extract_workers,
+                queue_size=queue_size,
+            )
+
+        log.info(f"LLM cache hits: {llm_cache.hits}, misses: {llm_cache.misses}")
+        log.info(f"LLM concurrency: {LLM_POOL.stats()}")
+        if boilerplate is not None:
+            log.info(boilerplate.stats.summary())
+
+        _save_raw(urls, scrape_journal, scrape_failed)
+        return _save_processed(
+            _iter_raw(urls, scrape_journal, scrape_failed),
+            extract_journal,
+            tmp_dir
+            / "output"
+            / f"{pendulum.now().to_datetime_string()}_processed.parquet",
+        )
 
 
 if __name__ == "__main__":
     start_time = time.perf_counter()
-    df = scrape_data()
-    log.info(
-        "Data scraping completed after %s seconds.", (time.perf_counter() - start_time)
-    )
-
-    process_job_descriptions(df=df)
+    # Log the metrics every minute and keep the latest in a Prometheus text file
+    with MetricsReporter(logger=log, prometheus_path=tmp_dir / "metrics.prom"):
+        run_pipeline()
     log.info(
-        "Job description processing completed after %s seconds.",
+        "Scraping and job description processing completed after %s seconds.",
         (time.perf_counter() - start_time),
     )
@@ -0,0 +1,238 @@
+"""Vectorized skills analytics over the processed postings.
+
+Every report works on Arrow tables with Arrow compute and numpy, the list
+columns are flattened once and never walked row by row in Python, so reports
+over millions of postings take seconds.
+
+Usage:
+    python -m module.analytics SOURCE {frequency,cooccurrence,python,experience} [options]
+
+``SOURCE`` is a processed parquet file, a directory of them, or ``dataset`` for
+the partitioned history in ``module.dataset``.
+"""
+
+import argparse
+import datetime
+import pathlib
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from module import dataset
+
+# Defaults
+LIST_COLUMNS = ("required_technologies", "other_programming_languages", "nice_to_know")
+DEFAULT_TOP = 30
+DEFAULT_EXPERIENCE_BINS = (0, 1, 2, 3, 5, 8, 10, float("inf"))
+
+
+def load_postings(
+    source: str | pathlib.Path,
+    columns: list[str] | None = None,
+    since: datetime.date | None = None,
+    until: datetime.date | None = None,
+) -> pa.Table:
+    """Read the processed postings, only the given columns.
+
+    Args:
+        source: Processed parquet file, directory of them, or ``"dataset"``.
+        columns: Columns to read. Defaults to None (all columns).
+        since: With ``"dataset"``, only read postings scraped on or after this date.
+        until: With ``"dataset"``, only read postings scraped on or before this date.
+    """
+    if str(source) == "dataset":
+        return dataset.query(columns=columns, since=since, until=until)
+
+    return pq.read_table(source, columns=columns)
+
+
+def _explode(table: pa.Table, column: str) -> pa.Table:
+    """One ``(row, value)`` pair per distinct, non-empty value of a list column."""
+    values = table.column(column)
+    pairs = pa.table(
+        {
+            "row": pc.list_parent_indices(values),
+            "value": pc.utf8_trim_whitespace(pc.list_flatten(values)),
+        }
+    )
+    pairs = pairs.filter(
+        pc.fill_null(pc.greater(pc.utf8_length(pairs.column("value")), 0), False)
+    )
+
+    # The LLM sometimes repeats a value, a posting only counts once
+    return pairs.group_by(["row", "value"], use_threads=False).aggregate([])
+
+
+def _value_counts(pairs: pa.Table, top: int | None = None) -> pa.Table:
+    counts = (
+        pairs.group_by("value")
+        .aggregate([([], "count_all")])
+        .rename_columns(["value", "postings"])
+        .sort_by([("postings", "descending"), ("value", "ascending")])
+    )
+    return counts.slice(0, top) if top is not None else counts
+
+
+def technology_frequency(
+    table: pa.Table,
+    column: str = "required_technologies",
+    top: int | None = DEFAULT_TOP,
+) -> pa.Table:
+    """Number and share of postings that mention each value of a list column.
+
+    Returns:
+        pa.Table: ``value``, ``postings`` and ``share`` columns, most frequent first.
+    """
+    counts = _value_counts(_explode(table, column), top=top)
+    share = pc.divide(pc.cast(counts.column("postings"), pa.float64()), max(len(table), 1))
+    return counts.append_column("share", share)
+
+
+def co_occurrence(
+    table: pa.Table,
+    column: str = "required_technologies",
+    top: int = DEFAULT_TOP,
+) -> tuple[list[str], np.ndarray]:
+    """Count the postings that mention each pair of the ``top`` most frequent values.
+
+    The pairs come from a hash self-join of the exploded ``(row, value)`` pairs on
+    the row, restricted to the dictionary codes of the ``top`` values, and are
+    counted with ``np.bincount`` into a dense ``top x top`` matrix.
+
+    Returns:
+        The labels and the symmetric matrix of counts, the diagonal holds the
+        number of postings that mention each value.
+    """
+    pairs = _explode(table, column)
+    labels = _value_counts(pairs, top=top).column("value").to_pylist()
+
+    codes = pc.index_in(pairs.column("value"), value_set=pa.array(labels, pa.string()))
+    pairs = pa.table({"row": pairs.column("row"), "code": codes}).filter(
+        pc.is_valid(codes)
+    )
+    joined = pairs.join(pairs, keys="row", right_suffix="_other")
+
+    size = len(labels)
+    keys = (
+        joined.column("code").to_numpy().astype(np.int64) * size
+        + joined.column("code_other").to_numpy()
+    )
+    matrix = np.bincount(keys, minlength=size * size).reshape(size, size)
+    return labels, matrix
+
+
+def python_required_share(
+    table: pa.Table,
+    by: str = "job_posting_company",
+    min_postings: int = 1,
+) -> pa.Table:
+    """Share of postings that require Python, per company, title or any other column.
+
+    Postings without an answer don't count towards the share.
+
+    Returns:
+        pa.Table: ``by``, ``postings``, ``python_required`` and ``share`` columns,
+        highest share first.
+    """
+    grouped = (
+        table.select([by, "python_required"])
+        .group_by(by)
+        .aggregate([("python_required", "sum"), ("python_required", "count")])
+        .rename_columns([by, "python_required", "postings"])
+    )
+    grouped = grouped.filter(pc.greater_equal(grouped.column("postings"), min_postings))
+
+    share = pc.divide(
+        pc.cast(grouped.column("python_required"), pa.float64()),
+        pc.cast(grouped.column("postings"), pa.float64()),
+    )
+    return (
+        grouped.select([by, "postings", "python_required"])
+        .append_column("share", share)
+        .sort_by([("share", "descending"), ("postings", "descending")])
+    )
+
+
+def experience_distribution(
+    table: pa.Table,
+    bins: tuple[float, ...] = DEFAULT_EXPERIENCE_BINS,
+) -> tuple[pa.Table, dict[str, float]]:
+    """Histogram and summary statistics of the required years of experience.
+
+    Returns:
+        A ``bucket``/``postings`` table, with the last bucket open ended, and the
+        mean and quartiles of the postings that state a requirement.
+    """
+    years = pc.drop_null(table.column("experience_required")).to_numpy()
+    years = years[np.isfinite(years) & (years >= 0)]
+
+    counts, edges = np.histogram(years, bins=np.asarray(bins, dtype=float))
+    buckets = [
+        f"{low:g}+" if np.isinf(high) else f"{low:g}-{high:g}"
+        for low, high in zip(edges[:-1], edges[1:])
+    ]
+    histogram = pa.table({"bucket": buckets, "postings": counts})
+
+    stats = {"postings": float(len(years))}
+    if len(years):
+        quartiles = np.percentile(years, [25, 50, 75])
+        stats.update(
+            mean=float(years.mean()),
+            p25=float(quartiles[0]),
+            median=float(quartiles[1]),
+            p75=float(quartiles[2]),
+        )
+
+    return histogram, stats
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Skills analytics over the processed postings."
+    )
+    arg_parser.add_argument(
+        "source", help="Processed parquet file, directory, or 'dataset'."
+    )
+    arg_parser.add_argument(
+        "report", choices=["frequency", "cooccurrence", "python", "experience"]
+    )
+    arg_parser.add_argument("--column", choices=LIST_COLUMNS, default=LIST_COLUMNS[0])
+    arg_parser.add_argument("--top", type=int, default=DEFAULT_TOP)
+    arg_parser.add_argument("--by", default="job_posting_company")
+    arg_parser.add_argument("--min-postings", type=int, default=5)
+    arg_parser.add_argument("--since", type=datetime.date.fromisoformat)
+    arg_parser.add_argument("--until", type=datetime.date.fromisoformat)
+    args = arg_parser.parse_args()
+
+    columns = {
+        "frequency": [args.column],
+        "cooccurrence": [args.column],
+        "python": [args.by, "python_required"],
+        "experience": ["experience_required"],
+    }[args.report]
+
+    start_time = time.perf_counter()
+    table = load_postings(args.source, columns, since=args.since, until=args.until)
+    if args.report == "frequency":
+        print(technology_frequency(table, args.column, top=args.top).to_pandas())
+    elif args.report == "cooccurrence":
+        labels, matrix = co_occurrence(table, args.column, top=args.top)
+        print(pd.DataFrame(matrix, index=labels, columns=labels).to_string())
+    elif args.report == "python":
+        share = python_required_share(table, by=args.by, min_postings=args.min_postings)
+        print(share.slice(0, args.top).to_pandas())
+    else:
+        histogram, stats = experience_distribution(table)
+        print(histogram.to_pandas())
+        print(stats)
+
+    elapsed = time.perf_counter() - start_time
+    print(f"{len(table)} postings in {elapsed:.2f} s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""Corpus-level boilerplate stripping for job descriptions.
+
+Company blurbs, benefit lists and EEO/legal paragraphs repeat across the
+postings of a company, and site notices across a whole job board. Every line of
+a description (the parsers put each text block on its own line) is hashed after
+normalisation and counted per company and per host. A line is boilerplate when
+
+- it is in at least ``min_postings`` postings of the same company, or
+- it is in the postings of at least ``min_companies`` companies on one host,
+
+and it is long enough to be a paragraph and doesn't look like a requirement.
+Those lines are left out of the text sent to the LLM.
+
+The index can be fit on a whole dataset up front, or fed posting by posting
+while streaming, in which case a paragraph is only dropped once it has been
+seen often enough. A long running stream can cap the index with
+``max_postings``, the counts then cover a rolling window of the latest postings.
+"""
+
+import hashlib
+import re
+import threading
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+
+from module.dataset import source_host
+from module.llm_batching import estimate_tokens
+
+# Defaults
+DEFAULT_MIN_POSTINGS = 3  # Postings of one company sharing a paragraph
+DEFAULT_MIN_COMPANIES = 5  # Companies of one host sharing a paragraph
+DEFAULT_MIN_CHARS = 60  # Shorter lines (headings, bullets) are always kept
+MAX_TOP_PARAGRAPHS = 1000  # Dropped paragraphs tracked for ``most_dropped``
+# Lines the extraction depends on are kept even when they repeat
+DEFAULT_PROTECT_PATTERN = re.compile(
+    r"\bpython\b|\d+\+?\s*(years?|yrs)|experience (with|in)\b|proficien\w* (in|with)\b",
+    re.IGNORECASE,
+)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_BULLET_RE = re.compile(r"^[\s\-*•·–—\d.)]+")
+
+
+def paragraph_hash(paragraph: str) -> bytes:
+    """Hash of a paragraph that ignores case, spacing and bullet markers."""
+    normalized = _WHITESPACE_RE.sub(" ", _BULLET_RE.sub("", paragraph)).strip().lower()
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest()
+
+
+def _company_key(company: str | None) -> str:
+    # Missing values read back from parquet can be NaN
+    if not isinstance(company, str):
+        return ""
+
+    return _WHITESPACE_RE.sub(" ", company.strip().lower())
+
+
+@dataclass
+class BoilerplateStats:
+    postings: int = 0
+    stripped_postings: int = 0
+    paragraphs_dropped: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+    top_paragraphs: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    def summary(self) -> str:
+        share = self.tokens_saved / self.tokens_before if self.tokens_before else 0.0
+        return (
+            f"Boilerplate stripping dropped {self.paragraphs_dropped} paragraphs from "
+            f"{self.stripped_postings} of {self.postings} job descriptions, "
+            f"~{self.tokens_saved} of {self.tokens_before} input tokens saved ({share:.1%})."
+        )
+
+
+class BoilerplateIndex:
+    """Counts of the description paragraphs per company and per host.
+
+    Args:
+        min_postings: Postings of the same company a paragraph must be in.
+        min_companies: Companies of the same host a paragraph must be in.
+        min_chars: Minimum length of a droppable paragraph.
+        protect_pattern: Paragraphs matching it are never dropped.
+        max_postings: Only count the latest this many postings, the older ones
+            are forgotten. Defaults to None (every posting is counted).
+    """
+
+    def __init__(
+        self,
+        min_postings: int = DEFAULT_MIN_POSTINGS,
+        min_companies: int = DEFAULT_MIN_COMPANIES,
+        min_chars: int = DEFAULT_MIN_CHARS,
+        protect_pattern: re.Pattern | None = DEFAULT_PROTECT_PATTERN,
+        max_postings: int | None = None,
+    ):
+        self.min_postings = min_postings
+        self.min_companies = min_companies
+        self.min_chars = min_chars
+        self.protect_pattern = protect_pattern
+        self.max_postings = max_postings
+        # (company, paragraph hash) -> postings
+        self._company_counts: dict[tuple[str, bytes], int] = defaultdict(int)
+        # (host, paragraph hash) -> postings per company
+        self._host_companies: dict[tuple[str, bytes], Counter[str]] = defaultdict(
+            Counter
+        )
+        self._seen: set[tuple[str, str, bytes]] = set()
+        # (url, company, host, hashes counted) of the postings in the window
+        self._window: deque[tuple[str, str, str, list[bytes]]] = deque()
+        self._lock = threading.Lock()
+        self.stats = BoilerplateStats()
+
+    def _candidates(self, description: str) -> set[bytes]:
+        return {
+            paragraph_hash(line)
+            for line in description.split("\n")
+            if self._droppable(line)
+        }
+
+    def _droppable(self, line: str) -> bool:
+        line = line.strip()
+        return len(line) >= self.min_chars and not (
+            self.protect_pattern is not None and self.protect_pattern.search(line)
+        )
+
+    def add(self, description: str | None, company: str | None, url: str | None) -> None:
+        """Count the paragraphs of one posting, each at most once."""
+        if not isinstance(description, str) or not description:
+            return
+
+        url, company, host = url or "", _company_key(company), source_host(url)
+        hashes = self._candidates(description)
+        with self._lock:
+            counted = []
+            for hash_ in hashes:
+                # The same posting scraped twice doesn't count twice
+                if (url, company, hash_) in self._seen:
+                    continue
+                self._seen.add((url, company, hash_))
+                if company:
+                    self._company_counts[(company, hash_)] += 1
+                self._host_companies[(host, hash_)][company] += 1
+                counted.append(hash_)
+
+            if self.max_postings is not None:
+                self._window.append((url, company, host, counted))
+                while len(self._window) > self.max_postings:
+                    self._forget(*self._window.popleft())
+
+    def _forget(
+        self, url: str, company: str, host: str, hashes: list[bytes]
+    ) -> None:
+        """Undo the counts of a posting that left the window."""
+        for hash_ in hashes:
+            self._seen.discard((url, company, hash_))
+            if company:
+                self._company_counts[(company, hash_)] -= 1
+                if not self._company_counts[(company, hash_)]:
+                    del self._company_counts[(company, hash_)]
+
+            companies = self._host_companies[(host, hash_)]
+            companies[company] -= 1
+            if not companies[company]:
+                del companies[company]
+            if not companies:
+                del self._host_companies[(host, hash_)]
+
+    def fit(self, records) -> "BoilerplateIndex":
+        """``add`` every record, mappings with the ``JobData`` fields."""
+        for record in records:
+            self.add(
+                record.get("job_description"),
+                record.get("job_posting_company"),
+                record.get("url"),
+            )
+
+        return self
+
+    def is_boilerplate(self, line: str, company: str | None, url: str | None) -> bool:
+        if not self._droppable(line):
+            return False
+
+        hash_ = paragraph_hash(line)
+        company = _company_key(company)
+        with self._lock:
+            return (
+                bool(company)
+                and self._company_counts.get((company, hash_), 0) >= self.min_postings
+            ) or len(
+                self._host_companies.get((source_host(url), hash_), ())
+            ) >= self.min_companies
+
+    def strip(self, description: str, company: str | None, url: str | None) -> str:
+        """``description`` without its boilerplate paragraphs.
+
+        The description is returned unchanged when nothing would be left of it.
+        """
+        kept, dropped = [], []
+        for line in description.split("\n"):
+            (dropped if self.is_boilerplate(line, company, url) else kept).append(line)
+
+        if not any(line.strip() for line in kept):
+            kept, dropped = [description], []
+        stripped = "\n".join(kept)
+
+        with self._lock:
+            self.stats.postings += 1
+            self.stats.tokens_before += estimate_tokens(description)
+            self.stats.tokens_after += estimate_tokens(stripped)
+            if dropped:
+                self.stats.stripped_postings += 1
+                self.stats.paragraphs_dropped += len(dropped)
+                for line in dropped:
+                    snippet = line.strip()[:80]
+                    self.stats.top_paragraphs[snippet] = (
+                        self.stats.top_paragraphs.get(snippet, 0) + 1
+                    )
+                # Keep the most frequent half once too many are tracked
+                if len(self.stats.top_paragraphs) > MAX_TOP_PARAGRAPHS:
+                    self.stats.top_paragraphs = dict(
+                        Counter(self.stats.top_paragraphs).most_common(
+                            MAX_TOP_PARAGRAPHS // 2
+                        )
+                    )
+
+        return stripped
+
+    def most_dropped(self, top: int = 10) -> list[tuple[str, int]]:
+        """The beginnings of the most often dropped paragraphs and their counts."""
+        with self._lock:
+            return sorted(
+                self.stats.top_paragraphs.items(), key=lambda item: -item[1]
+            )[:top]
@@ -0,0 +1,287 @@
+"""Hive-partitioned history of the pipeline outputs.
+
+Every run appends its raw and processed rows to ``tmp/dataset/{raw,processed}``,
+partitioned by scrape date and source host::
+
+    tmp/dataset/processed/scrape_date=2026-01-31/source_host=example.com/part-<run>.parquet
+
+The scrape date is the one of the ``scraped_at`` timestamp of each row, so
+processing an older raw file files its rows under the day they were scraped.
+
+Part files are only ever added, never rewritten, so concurrent runs can't lose
+each other's rows. ``query`` reads them back through ``pyarrow.dataset`` and
+keeps one row per URL and partition, the one of the latest run, so reruns and
+journal replays don't duplicate postings. A rerun row without data (a failed
+scrape, an empty LLM answer) doesn't hide an earlier row that has it. The
+partition filters prune whole directories and only the requested columns are
+read, so a query over months of history only touches the files it needs.
+
+Example:
+    >>> query(
+    ...     columns=["url", "job_title"],
+    ...     filter=ds.field("python_required") == True,
+    ...     hosts=["example.com"],
+    ...     since=datetime.date(2026, 1, 1),
+    ... )
+"""
+
+import datetime
+import functools
+import operator
+import pathlib
+import time
+import uuid
+from collections.abc import Iterable
+from typing import Any
+from urllib.parse import quote, urlparse
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from module.output import (
+    DEFAULT_ROW_GROUP_SIZE,
+    JOB_DATA_SCHEMA,
+    LLM_OUTPUT_SCHEMA,
+    PROCESSED_SCHEMA,
+    ParquetStreamWriter,
+)
+from utils.paths import TMP_DIR
+
+# Defaults
+DEFAULT_DATASET_DIR = TMP_DIR / "dataset"
+UNKNOWN_HOST = "unknown"
+
+SCHEMAS: dict[str, pa.Schema] = {
+    "raw": JOB_DATA_SCHEMA,
+    "processed": PROCESSED_SCHEMA,
+}
+PARTITION_SCHEMA = pa.schema(
+    [("scrape_date", pa.date32()), ("source_host", pa.string())]
+)
+PARTITIONING = ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+# The data a row can carry, per dataset. Of the rows of a URL, the ones with the
+# most of these groups filled win, the latest run among them
+CONTENT_COLUMNS: dict[str, list[list[str]]] = {
+    "raw": [["job_description"]],
+    "processed": [["job_description"], LLM_OUTPUT_SCHEMA.names],
+}
+
+
+def source_host(url: str | None) -> str:
+    """Partition value of a URL: its host name without ``www.``."""
+    host = urlparse((url or "").strip()).hostname or ""
+    return host.removeprefix("www.") or UNKNOWN_HOST
+
+
+def parse_scrape_date(scraped_at: str | None) -> datetime.date | None:
+    """Partition value of a ``scraped_at`` timestamp, None if it is missing."""
+    # pandas reads missing strings back as NaN
+    if not isinstance(scraped_at, str):
+        return None
+
+    try:
+        return datetime.datetime.fromisoformat(scraped_at).date()
+    except ValueError:
+        return None
+
+
+class PartitionedWriter:
+    """Stream rows into the partitions of one dataset.
+
+    Each run writes its own ``part-<run id>.parquet`` file in every partition it
+    touches. The run id starts with the start time of the run, ``query`` uses it
+    to pick the latest row of a URL.
+
+    Args:
+        name: Dataset to write, ``"raw"`` or ``"processed"``.
+        root: Root directory of the datasets.
+        scrape_date: Partition of the rows without a ``scraped_at`` timestamp, e.g. from raw files written before it was recorded. Defaults to today.
+        row_group_size: Rows per row group of the part files.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        root: str | pathlib.Path = DEFAULT_DATASET_DIR,
+        scrape_date: datetime.date | None = None,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    ):
+        if name not in SCHEMAS:
+            raise ValueError(f"Unknown dataset {name!r}, expected one of {list(SCHEMAS)}.")
+
+        self.path = pathlib.Path(root) / name
+        self.schema = SCHEMAS[name]
+        self.scrape_date = scrape_date or datetime.date.today()
+        self.row_group_size = row_group_size
+        self.run_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        self._writers: dict[tuple[datetime.date, str], ParquetStreamWriter] = {}
+
+    def _writer(self, date: datetime.date, host: str) -> ParquetStreamWriter:
+        writer = self._writers.get((date, host))
+        if writer is None:
+            # Hive partitioning URI-decodes the directory names
+            partition_dir = (
+                self.path
+                / f"scrape_date={date.isoformat()}"
+                / f"source_host={quote(host, safe='')}"
+            )
+            writer = ParquetStreamWriter(
+                partition_dir / f"part-{self.run_id}.parquet",
+                self.schema,
+                row_group_size=self.row_group_size,
+            )
+            self._writers[(date, host)] = writer
+
+        return writer
+
+    def write(self, row: dict[str, Any]) -> None:
+        date = parse_scrape_date(row.get("scraped_at")) or self.scrape_date
+        self._writer(date, source_host(row.get("url"))).write(row)
+
+    def write_many(self, rows: Iterable[dict[str, Any]]) -> None:
+        for row in rows:
+            self.write(row)
+
+    @property
+    def rows_written(self) -> int:
+        return sum(writer.rows_written for writer in self._writers.values())
+
+    def close(self) -> None:
+        for writer in self._writers.values():
+            writer.close()
+
+    def __enter__(self) -> "PartitionedWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_dataset(
+    name: str = "processed",
+    root: str | pathlib.Path = DEFAULT_DATASET_DIR,
+) -> ds.Dataset:
+    """Open one of the datasets, with the partition columns in its schema."""
+    if name not in SCHEMAS:
+        raise ValueError(f"Unknown dataset {name!r}, expected one of {list(SCHEMAS)}.")
+
+    return ds.dataset(
+        pathlib.Path(root) / name,
+        format="parquet",
+        partitioning=PARTITIONING,
+        # The schema is known, so the files don't have to be inspected
+        schema=pa.unify_schemas([SCHEMAS[name], PARTITION_SCHEMA]),
+    )
+
+
+def _run_time(path: str) -> int:
+    """Start time of the run that wrote the part file ``path``, 0 if unknown."""
+    run_time = pathlib.PurePath(path).name.removeprefix("part-").split("-", 1)[0]
+    return int(run_time) if run_time.isdigit() else 0
+
+
+def _latest_urls(
+    dataset: ds.Dataset, name: str, fragments: list[ds.Fragment]
+) -> dict[int, list[str]]:
+    """URLs whose current row is in each fragment, keyed by fragment index."""
+    content = {
+        f"content_{i}": functools.reduce(
+            operator.or_, (ds.field(column).is_valid() for column in group)
+        )
+        for i, group in enumerate(CONTENT_COLUMNS[name])
+    }
+    keys = []
+    for index, fragment in enumerate(fragments):
+        table = fragment.to_table(
+            schema=dataset.schema,
+            columns={"url": ds.field("url"), **content},
+            filter=ds.field("url").is_valid(),
+        )
+        rank = functools.reduce(
+            pc.add, (pc.cast(table.column(column), pa.int8()) for column in content)
+        )
+        keys.append(
+            pa.table(
+                {
+                    "partition": pa.repeat(
+                        str(fragment.partition_expression), table.num_rows
+                    ),
+                    "url": table.column("url"),
+                    "rank": rank,
+                    "run_time": pa.repeat(_run_time(fragment.path), table.num_rows),
+                    "fragment": pa.repeat(index, table.num_rows),
+                }
+            )
+        )
+
+    # Sorted by rank then run, the last row of each URL is the current one
+    latest = (
+        pa.concat_tables(keys)
+        .sort_by([("rank", "ascending"), ("run_time", "ascending")])
+        .group_by(["partition", "url"], use_threads=False)
+        .aggregate([("fragment", "last")])
+        .group_by("fragment_last")
+        .aggregate([("url", "list")])
+    )
+    return dict(
+        zip(
+            latest.column("fragment_last").to_pylist(),
+            latest.column("url_list").to_pylist(),
+        )
+    )
+
+
+def query(
+    name: str = "processed",
+    columns: list[str] | None = None,
+    filter: ds.Expression | None = None,
+    hosts: Iterable[str] | None = None,
+    since: datetime.date | None = None,
+    until: datetime.date | None = None,
+    root: str | pathlib.Path = DEFAULT_DATASET_DIR,
+) -> pa.Table:
+    """Read rows from a dataset, only scanning the partitions and columns needed.
+
+    Args:
+        name: Dataset to read, ``"raw"`` or ``"processed"``.
+        columns: Columns to read. Defaults to None (all columns).
+        filter: Extra row filter, e.g. ``ds.field("python_required") == True``.
+        hosts: Only read these source hosts.
+        since: Only read rows scraped on or after this date.
+        until: Only read rows scraped on or before this date.
+        root: Root directory of the datasets.
+
+    Returns:
+        pa.Table: The matching rows, the current row of every URL.
+    """
+    conditions = []
+    if hosts is not None:
+        conditions.append(ds.field("source_host").isin(list(hosts)))
+    if since is not None:
+        conditions.append(ds.field("scrape_date") >= since)
+    if until is not None:
+        conditions.append(ds.field("scrape_date") <= until)
+    partitions = functools.reduce(operator.and_, conditions) if conditions else None
+
+    dataset = open_dataset(name, root=root)
+    fragments = list(dataset.get_fragments(filter=partitions))
+    if not fragments:
+        return dataset.schema.empty_table().select(columns or dataset.schema.names)
+
+    # The filter applies to the current rows only, so the URLs are resolved first
+    latest = _latest_urls(dataset, name, fragments)
+    tables = []
+    for index, fragment in enumerate(fragments):
+        current = ds.field("url").is_null()
+        if index in latest:
+            current = current | ds.field("url").isin(latest[index])
+        tables.append(
+            fragment.to_table(
+                schema=dataset.schema,
+                columns=columns,
+                filter=current if filter is None else filter & current,
+            )
+        )
+
+    return pa.concat_tables(tables)
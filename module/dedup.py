@@ -0,0 +1,120 @@
+"""Near-duplicate detection for job descriptions.
+
+Every description is reduced to a MinHash signature over its word shingles.
+Signatures are split into LSH bands, and only descriptions that share a band
+bucket are compared, so clustering runs in linear time over the dataset.
+Candidates whose estimated Jaccard similarity reaches the threshold are merged
+into one cluster with a union-find.
+"""
+
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+# Defaults
+DEFAULT_DEDUP_THRESHOLD = 0.9
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE_SIZE = 5
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_WORD_RE = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = DEFAULT_SHINGLE_SIZE) -> np.ndarray:
+    """Hash the word ``size``-grams of ``text`` into an array of 32-bit values."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        words_ngrams = [" ".join(words)]
+    else:
+        words_ngrams = [
+            " ".join(words[i : i + size]) for i in range(len(words) - size + 1)
+        ]
+
+    return np.fromiter(
+        (zlib.crc32(ngram.encode("utf-8")) for ngram in set(words_ngrams)),
+        dtype=np.uint64,
+    )
+
+
+def _lsh_params(threshold: float, num_perm: int) -> tuple[int, int]:
+    """Pick the (bands, rows) split whose S-curve midpoint is closest to ``threshold``."""
+    candidates = [
+        (bands, num_perm // bands)
+        for bands in range(1, num_perm + 1)
+        if num_perm % bands == 0
+    ]
+    return min(
+        candidates,
+        key=lambda params: abs((1 / params[0]) ** (1 / params[1]) - threshold),
+    )
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a: int, b: int) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        # The lowest index stays the representative
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def find_near_duplicates(
+    texts: list[str | None],
+    threshold: float = DEFAULT_DEDUP_THRESHOLD,
+    num_perm: int = DEFAULT_NUM_PERM,
+    shingle_size: int = DEFAULT_SHINGLE_SIZE,
+    seed: int = 1,
+) -> list[int]:
+    """Cluster near-duplicate texts.
+
+    Args:
+        texts: Texts to cluster. Empty texts are never treated as duplicates.
+        threshold: Minimum estimated Jaccard similarity of two duplicates.
+        num_perm: Number of MinHash permutations.
+        shingle_size: Number of words per shingle.
+        seed: Seed of the MinHash permutations.
+
+    Returns:
+        For every text the index of its cluster representative, the first text
+        of the cluster. Texts without duplicates map to their own index.
+    """
+    rng = np.random.default_rng(seed)
+    perm_a = rng.integers(1, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+    perm_b = rng.integers(0, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+    bands, rows = _lsh_params(threshold, num_perm)
+
+    signatures: dict[int, np.ndarray] = {}
+    buckets: dict[tuple[int, bytes], list[int]] = defaultdict(list)
+    for index, text in enumerate(texts):
+        if not text or not text.strip():
+            continue
+
+        hashes = shingles(text, size=shingle_size) % _MERSENNE_PRIME
+        signature = ((perm_a * hashes + perm_b) % _MERSENNE_PRIME).min(axis=1)
+        signatures[index] = signature
+        for band in range(bands):
+            band_key = signature[band * rows : (band + 1) * rows].tobytes()
+            buckets[(band, band_key)].append(index)
+
+    clusters = _UnionFind(len(texts))
+    for members in buckets.values():
+        first = members[0]
+        for other in members[1:]:
+            if clusters.find(first) == clusters.find(other):
+                continue
+
+            similarity = np.mean(signatures[first] == signatures[other])
+            if similarity >= threshold:
+                clusters.union(first, other)
+
+    return [clusters.find(index) for index in range(len(texts))]
@@ -0,0 +1,118 @@
+"""Tiered page fetching: a plain httpx GET first, cloudscraper only when challenged.
+
+``cloud_scrp`` solves anti-bot challenges but pays for it on every page (js2py,
+stealth delays of several seconds). ``TieredFetcher`` tries the cheapest tier
+first, recognises challenge and block pages, and escalates to the next tier only
+then. The tier that worked is remembered per host, so later pages go straight to
+it. Escalated hosts are retried on the cheap tier after ``retry_after`` seconds,
+in case the protection was lifted.
+
+Example:
+    set_fetcher(TieredFetcher())
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Sequence
+from urllib.parse import urlsplit
+
+from module.scrapers import cloud_scrp, httpx_scrp
+from utils.metrics import METRICS
+
+# Defaults
+DEFAULT_TIERS = (("httpx", httpx_scrp), ("cloudscraper", cloud_scrp))
+DEFAULT_RETRY_AFTER = 6 * 60 * 60  # Seconds before an escalated host tries tier 0 again
+# Statuses that are a real answer of the site. Anything else outside 2xx is a
+# block (403/429/503, LinkedIn's 999) or a redirect the tier did not follow
+FINAL_STATUS_CODES = {304, 404, 410}
+CHALLENGE_SCAN_CHARS = 4096  # Challenge pages give themselves away early
+CHALLENGE_MARKERS = (
+    "<title>just a moment...</title>",
+    "attention required! | cloudflare",
+    "cf-browser-verification",
+    "cf_chl_opt",
+    "captcha-delivery.com",  # DataDome
+    "px-captcha",  # PerimeterX
+    "/_incapsula_resource",
+)
+
+
+def is_challenge(resp) -> bool:
+    """Whether ``resp`` is an anti-bot challenge or block page instead of content."""
+    if resp.headers.get("cf-mitigated") == "challenge":
+        return True
+
+    if resp.status_code in FINAL_STATUS_CODES:
+        return False
+
+    # A bare 403/429/503/999 from a bot manager, even without a known marker
+    if not 200 <= resp.status_code < 300:
+        return True
+
+    head = resp.text[:CHALLENGE_SCAN_CHARS].lower()
+    return any(marker in head for marker in CHALLENGE_MARKERS)
+
+
+class TieredFetcher:
+    """Fetch with the cheapest tier that gets past the host's protection.
+
+    Args:
+        tiers: ``(name, fetch)`` pairs from the cheapest to the most capable.
+            ``fetch(url, **kwargs)`` returns a response with ``status_code``,
+            ``headers`` and ``text``.
+        retry_after: Seconds an escalated host stays on its tier before the
+            cheaper ones are tried again.
+    """
+
+    def __init__(
+        self,
+        tiers: Sequence[tuple[str, callable]] = DEFAULT_TIERS,
+        retry_after: float = DEFAULT_RETRY_AFTER,
+    ):
+        if not tiers:
+            raise ValueError("At least one tier is required.")
+
+        self.tiers = tuple(tiers)
+        self.retry_after = retry_after
+        # host -> (index of the tier that worked, when it was escalated to)
+        self._host_tiers: dict[str, tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def tier_for(self, host: str) -> int:
+        """Index of the tier ``host`` starts at."""
+        with self._lock:
+            index, since = self._host_tiers.get(host, (0, 0.0))
+            if index > 0 and time.monotonic() - since > self.retry_after:
+                del self._host_tiers[host]
+                return 0
+
+            return index
+
+    def _remember(self, host: str, index: int) -> None:
+        with self._lock:
+            previous = self._host_tiers.get(host)
+            if previous is None or previous[0] != index:
+                self._host_tiers[host] = (index, time.monotonic())
+
+    def __call__(self, url: str, **kwargs):
+        host = urlsplit(url.strip()).netloc.lower()
+        last_index = len(self.tiers) - 1
+
+        for index in range(self.tier_for(host), last_index + 1):
+            name, fetch = self.tiers[index]
+            try:
+                resp = fetch(url, **kwargs)
+            except Exception as e:
+                if index == last_index:
+                    raise
+                logging.warning(f"{name} fetch failed for {url.strip()}, escalating: {e}")
+            else:
+                if index == last_index or not is_challenge(resp):
+                    self._remember(host, index)
+                    METRICS.inc("fetch_tier_total", host=host, tier=name)
+                    return resp
+
+                logging.info(f"Challenge page from {host} with {name}, escalating.")
+
+            METRICS.inc("fetch_escalations_total", host=host, tier=name)
@@ -0,0 +1,203 @@
+"""Persistent on-disk cache for raw HTML pages.
+
+Pages are stored content-addressed under the SHA-256 of their normalized URL as
+gzip compressed JSON documents holding the body, the fetch timestamp and the
+``ETag``/``Last-Modified`` validators of the response. Expired pages that have
+validators are revalidated with a conditional GET instead of downloaded again.
+The file modification time doubles as the last access time, which drives the
+size-based LRU eviction.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from utils.paths import TMP_DIR
+
+# Defaults
+DEFAULT_CACHE_DIR = TMP_DIR / "cache" / "html"
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_MAX_SIZE_MB = 1024
+EVICTION_TARGET_RATIO = 0.9  # Evict down to 90% of the max size
+
+# Query parameters that only track the visitor and don't change the page
+TRACKING_PARAMS = {"trk", "trkinfo", "trackingid", "refid", "ref", "from", "src"}
+TRACKING_PARAM_PREFIXES = ("utm_",)
+
+
+def normalize_url(url: str) -> str:
+    """Normalize ``url`` so the same posting always maps to the same cache key.
+
+    The scheme and host are lowercased, the fragment and tracking parameters are
+    dropped and the remaining query parameters are sorted.
+    """
+    parsed = urlparse(url.strip())
+    query = sorted(
+        (key, val)
+        for key, val in parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS
+        and not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    )
+    return urlunparse(
+        (
+            parsed.scheme.lower(),
+            parsed.netloc.lower(),
+            parsed.path.rstrip("/") or "/",
+            parsed.params,
+            urlencode(query),
+            "",
+        )
+    )
+
+
+@dataclass
+class CachedPage:
+    url: str
+    text: str
+    fetched_at: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def conditional_headers(self) -> dict[str, str]:
+        """``If-None-Match``/``If-Modified-Since`` headers to revalidate the page."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        return headers
+
+
+class HTMLCache:
+    """Content-addressed HTML cache with a TTL and size-based LRU eviction."""
+
+    def __init__(
+        self,
+        cache_dir: str | pathlib.Path = DEFAULT_CACHE_DIR,
+        ttl: float | None = DEFAULT_TTL_SECONDS,
+        max_size_mb: float = DEFAULT_MAX_SIZE_MB,
+    ):
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_size = int(max_size_mb * 1000000)
+        self._size: int | None = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(normalize_url(url).encode()).hexdigest()
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.cache_dir / key[:2] / f"{key}.json.gz"
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return self.ttl is None or time.time() - page.fetched_at <= self.ttl
+
+    def get_page(self, url: str, allow_expired: bool = False) -> CachedPage | None:
+        """Return the cached page for ``url`` or None on a miss."""
+        path = self._path(self.key(url))
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Dropping unreadable cache entry {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        page = CachedPage(
+            url=payload["url"],
+            text=payload["text"],
+            fetched_at=payload["fetched_at"],
+            etag=payload.get("etag"),
+            last_modified=payload.get("last_modified"),
+        )
+        if not allow_expired and not self.is_fresh(page):
+            return None
+
+        # Mark the entry as recently used
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+        return page
+
+    def get(self, url: str) -> str | None:
+        page = self.get_page(url)
+        return page.text if page is not None else None
+
+    def put(
+        self,
+        url: str,
+        text: str,
+        fetched_at: float | None = None,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None:
+        path = self._path(self.key(url))
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        payload = {
+            "url": url.strip(),
+            "fetched_at": fetched_at if fetched_at is not None else time.time(),
+            "text": text,
+        }
+        if etag:
+            payload["etag"] = etag
+        if last_modified:
+            payload["last_modified"] = last_modified
+        data = gzip.compress(json.dumps(payload).encode("utf-8"))
+
+        # Write atomically so concurrent readers never see a partial file, the
+        # temporary name is unique per process and thread sharing the cache
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        with self._lock:
+            size = self._current_size()
+            old_size = path.stat().st_size if path.exists() else 0
+            os.replace(tmp_path, path)
+
+            self._size = size + len(data) - old_size
+            if self._size > self.max_size:
+                self._evict()
+
+    def _current_size(self) -> int:
+        if self._size is None:
+            self._size = sum(f.stat().st_size for f in self.cache_dir.glob("*/*.gz"))
+
+        return self._size
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until under the target size."""
+        entries = []
+        for f in self.cache_dir.glob("*/*.gz"):
+            try:
+                stat = f.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, f))
+
+        entries.sort()
+        size = sum(entry[1] for entry in entries)
+        target = self.max_size * EVICTION_TARGET_RATIO
+        removed = 0
+        for _, file_size, f in entries:
+            if size <= target:
+                break
+            f.unlink(missing_ok=True)
+            size -= file_size
+            removed += 1
+
+        self._size = size
+        logging.debug(f"Evicted {removed} entries from the HTML cache.")
@@ -1,11 +1,22 @@
+import functools
+import hashlib
+import json
 import logging
+import os
 from dataclasses import dataclass
 from urllib.parse import urlparse
 
-from selectolax.parser import HTMLParser
-
-from module.scrapers import cloud_scrp
+from module.html_cache import HTMLCache
+from module.fetch import TieredFetcher, is_challenge
+from module.site_specs import CompiledSpec, FieldSpec, SiteSpec, strip_css_suffix
 from utils.encryption import decrypt_data
+from utils.metrics import METRICS
+from utils.paths import TMP_DIR
+
+# Decrypted parser host names, so they are only decrypted once per machine.
+# The names are in plain text: the file is only readable by its owner and
+# ``tmp/`` is git-ignored, don't copy or commit it.
+PARSER_HOSTS_CACHE = TMP_DIR / "cache" / "parser_hosts.json"
 
 
 @dataclass
@@ -14,90 +25,265 @@ class JobData:
     job_posting_company: str | None = None
     job_title: str | None = None
     job_description: str | None = None
+    scraped_at: str | None = None  # ISO timestamp, set by ``iter_scrape``
+
+
+# Parsers added at run time with ``register_parser``, e.g. for local test servers
+_REGISTERED_PARSERS: dict[str, callable] = {}
+
+# Downloads a page, replaceable with ``set_fetcher``. Plain httpx first, and
+# cloudscraper only for the hosts that answer with a challenge
+_fetcher: callable = TieredFetcher()
+
+
+def register_parser(host: str, parse_fn: callable) -> None:
+    """Handle ``host`` and its subdomains with ``parse_fn``, e.g. ``_parse_l``.
+
+    Registered hosts are resolved before the ``PARSER_CONFIG`` ones, without
+    decrypting them.
+    """
+    _REGISTERED_PARSERS[host.lower()] = parse_fn
+    _resolve_netloc.cache_clear()
+
+
+def set_fetcher(fetcher: callable) -> None:
+    """Download pages with ``fetcher(url)`` instead of a ``TieredFetcher``.
+
+    To revalidate cached pages, ``fetcher`` must also take a ``headers`` dict.
+    """
+    global _fetcher
+    _fetcher = fetcher
+
+
+def _match_host(netloc: str, parser_config: dict[str, callable]) -> str | None:
+    # Exact host or any parent domain, e.g. www.example.com -> example.com
+    host = netloc.lower().rsplit("@", 1)[-1].split(":", 1)[0]
+    labels = host.split(".")
+    for i in range(len(labels)):
+        if (suffix := ".".join(labels[i:])) in parser_config:
+            return suffix
+
+    # Fall back to a substring match for host names that aren't plain domains
+    for __parser_domain in parser_config.keys():
+        if __parser_domain in netloc:
+            return __parser_domain
+
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _resolve_netloc(netloc: str) -> str | None:
+    return _match_host(netloc, _REGISTERED_PARSERS) or _match_host(
+        netloc, get_parser_config()
+    )
+
+
+def resolve_host(url: str) -> str | None:
+    """Return the ``PARSER_CONFIG`` domain that handles ``url``, if any."""
+    return _resolve_netloc(urlparse(url.strip()).netloc)
+
+
+def fetch_html(url: str, cache: HTMLCache | None = None) -> str:
+    """Fetch the page behind ``url``, reading through ``cache`` when one is given.
+
+    An expired cached page is revalidated with ``If-None-Match``/
+    ``If-Modified-Since``, and reused as is when the server answers 304. Only
+    successful responses are stored, so failed fetches are retried on the next
+    run. A challenge page served with a 200 isn't stored either.
+    """
+    stale_page = None
+    if cache is not None:
+        stale_page = cache.get_page(url, allow_expired=True)
+        if stale_page is not None and cache.is_fresh(stale_page):
+            logging.debug(f"HTML cache hit for URL: {url.strip()}")
+            return stale_page.text
+
+    # Only pass headers when there are some, custom fetchers may not take them
+    headers = stale_page.conditional_headers() if stale_page is not None else {}
+    host_name = resolve_host(url) or "unknown"
+    with METRICS.timer("fetch_seconds", host=host_name):
+        resp = _fetcher(url, headers=headers) if headers else _fetcher(url)
+    METRICS.inc("fetch_responses_total", host=host_name, status=resp.status_code)
+
+    if resp.status_code == 304 and stale_page is not None:
+        logging.debug(f"Cached page not modified for URL: {url.strip()}")
+        cache.put(
+            url,
+            stale_page.text,
+            etag=resp.headers.get("ETag") or stale_page.etag,
+            last_modified=resp.headers.get("Last-Modified") or stale_page.last_modified,
+        )
+        return stale_page.text
+
+    if resp.status_code == 200 and is_challenge(resp):
+        logging.warning(f"Challenge page not cached for URL: {url.strip()}")
+    elif cache is not None and resp.status_code == 200:
+        cache.put(
+            url,
+            resp.text,
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+        )
+
+    return resp.text
 
 
-def parser(url: str, response_text: str | None = None, **kwargs) -> JobData:
+def parser(
+    url: str,
+    response_text: str | None = None,
+    cache: HTMLCache | None = None,
+    **kwargs,
+) -> JobData:
     # Find the correct parser
-    parser_hosts = set(PARSER_CONFIG.keys())
-    host_name: str | None = None
-    url_host = urlparse(url.strip()).netloc
-    for __parser_domain in parser_hosts:
-        if __parser_domain in url_host:
-            host_name: str = __parser_domain
-            break
+    host_name = resolve_host(url)
 
     if host_name is None:
         logging.warning(f"No parser found for URL: {url.strip()}")
         return JobData(url=url.strip())
 
-    return PARSER_CONFIG.get(host_name)(
+    # Read-through mode, the page is only downloaded on a cache miss
+    if response_text is None and cache is not None:
+        try:
+            response_text = fetch_html(url.strip(), cache=cache)
+        except Exception as e:
+            logging.error(f"Error fetching: {e}")
+            return JobData(url=url.strip())
+
+    parse_fn = _REGISTERED_PARSERS.get(host_name) or get_parser_config()[host_name]
+    return parse_fn(
         url=url.strip(),
         response_text=response_text,
         **kwargs,
     )
 
 
-def _parse_l(url: str, response_text: str | None = None) -> JobData:
+# One declarative spec per site, adding a site only takes a new spec
+SITE_SPECS: dict[str, SiteSpec] = {
+    "l": SiteSpec(
+        name="l",
+        fields={
+            "job_posting_company": FieldSpec(
+                selectors=(
+                    'a[data-tracking-control-name="public_jobs_topcard-org-name"]',
+                ),
+                post=(strip_css_suffix,),
+            ),
+            "job_title": FieldSpec(
+                selectors=('h1[class*="top-card-layout__title"]',),
+            ),
+            "job_description": FieldSpec(
+                selectors=(
+                    'div[class*="description__text description__text--rich"] section div[class*="show-more-less-html__markup"]',
+                ),
+                separator="\n",
+            ),
+        },
+    ),
+    "i": SiteSpec(
+        name="i",
+        fields={
+            "job_posting_company": FieldSpec(
+                selectors=('span[class*="css-qcqa6h"] a',),
+                post=(strip_css_suffix,),
+            ),
+            "job_title": FieldSpec(
+                selectors=('div[class*="jobsearch-JobInfoHeader-title-container"]',),
+            ),
+            "job_description": FieldSpec(
+                selectors=("div#jobDescriptionText",),
+                separator="\n",
+            ),
+        },
+    ),
+}
+COMPILED_SPECS: dict[str, CompiledSpec] = {
+    name: CompiledSpec(spec) for name, spec in SITE_SPECS.items()
+}
+
+
+def parse_with_spec(
+    spec_name: str,
+    url: str,
+    response_text: str | None = None,
+) -> JobData:
     try:
         if not response_text:
-            resp = cloud_scrp(url)
+            response_text = fetch_html(url)
 
-        html = HTMLParser(response_text or resp.text)
+        with METRICS.timer("parse_seconds", spec=spec_name):
+            fields = COMPILED_SPECS[spec_name].extract(response_text)
 
-        job_posting_company = html.css_first(
-            'a[data-tracking-control-name="public_jobs_topcard-org-name"]'
-        )
-        job_title = html.css_first('h1[class*="top-card-layout__title"]')
-        job_description = html.css_first(
-            'div[class*="description__text description__text--rich"] section div[class*="show-more-less-html__markup"]'
-        )
-        return JobData(
-            url=url.strip(),
-            job_posting_company=job_posting_company.text(strip=True).split(".css-")[0]
-            if job_posting_company is not None
-            else None,
-            job_title=job_title.text(strip=True) if job_title is not None else None,
-            job_description=job_description.text(strip=True, separator="\n")
-            if job_description
-            else None,
-        )
+        return JobData(url=url.strip(), **fields)
     except Exception as e:
         logging.error(f"Error parsing: {e}")
         return JobData(url=url.strip())
 
 
+def _parse_l(url: str, response_text: str | None = None) -> JobData:
+    return parse_with_spec("l", url=url, response_text=response_text)
+
+
 def _parse_i(url: str, response_text: str | None = None) -> JobData:
+    return parse_with_spec("i", url=url, response_text=response_text)
+
+
+_ENCRYPTED_PARSER_CONFIG: dict[bytes, callable] = {
+    b'Ne%C\x1b\x04\xfe\xf8\x8aBp\x19\xf3mYh\x05\xc5\xa9\x16H\xe0\x81\xdc\xa4\x19\xb5\xc6\x05\xd9\x85\x08z\x97\xbb\xe9\xf6?+\xcaC|\r,UVQU\xa6G/\x92\x8d\xdc\xdde\x1d\xeb\xd2p\x89\xdf\xb7\xccB\x8f\xc2\xad\xb5OLc\xccg\xe5f\x18\xc9\xeeL}g\xf7c\\Etl\x08b\x92\xa8\xc8\xc4\xb9\xb4O6d/\x8d\x19\x96\x98\xbc/\xfe\xcb\xf1\x92\x91\x8c\x11\xd5":\xe1\x91\x141\x0e@\xbb\x97\x91\xf8P5\x9dQ\\\xc9/s2\xbc1\xfa))\x93\x1c\xa2\x85\x1c\xfeL\x0b\x90\x9cde\x0e\x97\x92e\xb53\x08\x8bH\xd2+\x1b~\x12\x99\x1f\xe4%\xe1`\x88!\xdb\x87\x99\xcbF\xe8\x9aeb8.CJ\x98\xd4Ro+\\;=3\x1a\xbb%\x86\xa41y#\x90\xa1\t)\x8a\xf7w\x871Asg|\xaeGm\x1e\xe2\xf5\x84\xb1\xae>\xa6\x16\x9a*\xa6\xd9\xa5N\xaeX|\x85\x83z\xcf!kn\x00N\x01\x1a\xea\x98x\r\x15\x93\xca': _parse_l,
+    b'x0\x9c\xe2<\xf6\xfe\xc7\x06\x89\xc2\xec\x8c\x8a\x1eblr\xe1\xaf\xcf\xea3\xebWHwY-g\xfc\x80l3\x83M\x899\xddO\x13^\xa4PO\xc4x\xd7\x0e\xd2"\xc4I\xb2\x98[V\x0c\x93\x17\xdc\xed\xa9\xec"\xfb\xb9\xc4\xfc-\x82\xf7!\xba\xadZ\xc4\xdbV`\xa1\xe8*1W m\xc0\xd9k\xb0\xde\xbcz<\xda\xb9#T\x13;\xd0O\x91\xd9\xe9\x1c_\xc9\xfbm{Q\xd7wTU\x03!\xff\xe2aZ(\xda\x91]\x06\xa29\xa4\xef\x17\xec\xbd%\xd8\xfc\x92Z\xd1\x15\xe4\x9b\x979\xae\xd0s8\x84\xce\xfc\x91d\x87\xb7z~\xe3\x915\xdb\xe4\x8bo\x1db28H\xbe\x9a03\xca\xba\xd0\xc5\xe3\xfb\xba\xe8\x14\'\x92\xa2d\xa0O5\xfc\xd3\x99\t\xc1\xa0LNVt,\x9e^\xd5-\xed\x02\x99.\xea{h\x146\x85A\xeb\x1d\x19\x00\xaa\x00I\xc8\xe0\'\x00!\xbcj\x8d\xa33%"\x16\x91\xa9\xfam-\xfe\xc5\xbd\xb9\x9f\x10\x98\xd1r%"\xabo\xe3': _parse_i,
+}
+
+
+def _load_parser_hosts() -> dict[bytes, str]:
+    """Decrypt the parser host names, using the local artifact when it's up to date.
+
+    RSA decryption in pure Python is slow, so the decrypted names are stored in
+    ``PARSER_HOSTS_CACHE`` keyed by the hash of their ciphertext and only missing
+    entries are decrypted again. The file holds the secret names in plain text,
+    it is written with owner-only permissions.
+    """
     try:
-        if not response_text:
-            resp = cloud_scrp(url)
+        cached_hosts: dict[str, str] = json.loads(PARSER_HOSTS_CACHE.read_text())
+    except (OSError, ValueError):
+        cached_hosts = {}
 
-        html = HTMLParser(response_text or resp.text)
+    hosts: dict[bytes, str] = {}
+    updated = False
+    for encrypted_host in _ENCRYPTED_PARSER_CONFIG:
+        digest = hashlib.sha256(encrypted_host).hexdigest()
+        if digest not in cached_hosts:
+            cached_hosts[digest] = decrypt_data(encrypted_host)
+            updated = True
+        hosts[encrypted_host] = cached_hosts[digest]
 
-        job_posting_company = html.css_first('span[class*="css-qcqa6h"] a')
-        job_title = html.css_first(
-            'div[class*="jobsearch-JobInfoHeader-title-container"]'
-        )
-        job_description = html.css_first("div#jobDescriptionText")
-        return JobData(
-            url=url.strip(),
-            job_posting_company=job_posting_company.text(strip=True).split(".css-")[0]
-            if job_posting_company is not None
-            else None,
-            job_title=job_title.text(strip=True) if job_title is not None else None,
-            job_description=job_description.text(strip=True, separator="\n")
-            if job_description
-            else None,
-        )
-    except Exception as e:
-        logging.error(f"Error parsing: {e}")
-        return JobData(url=url.strip())
+    if updated:
+        try:
+            PARSER_HOSTS_CACHE.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(
+                PARSER_HOSTS_CACHE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(cached_hosts, f)
+            # Files created before are tightened too
+            PARSER_HOSTS_CACHE.chmod(0o600)
+        except OSError as e:
+            logging.warning(f"Could not write the parser host cache: {e}")
 
+    return hosts
 
-PARSER_CONFIG: dict[str, callable] = {
-    decrypt_data(
-        b'Ne%C\x1b\x04\xfe\xf8\x8aBp\x19\xf3mYh\x05\xc5\xa9\x16H\xe0\x81\xdc\xa4\x19\xb5\xc6\x05\xd9\x85\x08z\x97\xbb\xe9\xf6?+\xcaC|\r,UVQU\xa6G/\x92\x8d\xdc\xdde\x1d\xeb\xd2p\x89\xdf\xb7\xccB\x8f\xc2\xad\xb5OLc\xccg\xe5f\x18\xc9\xeeL}g\xf7c\\Etl\x08b\x92\xa8\xc8\xc4\xb9\xb4O6d/\x8d\x19\x96\x98\xbc/\xfe\xcb\xf1\x92\x91\x8c\x11\xd5":\xe1\x91\x141\x0e@\xbb\x97\x91\xf8P5\x9dQ\\\xc9/s2\xbc1\xfa))\x93\x1c\xa2\x85\x1c\xfeL\x0b\x90\x9cde\x0e\x97\x92e\xb53\x08\x8bH\xd2+\x1b~\x12\x99\x1f\xe4%\xe1`\x88!\xdb\x87\x99\xcbF\xe8\x9aeb8.CJ\x98\xd4Ro+\\;=3\x1a\xbb%\x86\xa41y#\x90\xa1\t)\x8a\xf7w\x871Asg|\xaeGm\x1e\xe2\xf5\x84\xb1\xae>\xa6\x16\x9a*\xa6\xd9\xa5N\xaeX|\x85\x83z\xcf!kn\x00N\x01\x1a\xea\x98x\r\x15\x93\xca'
-    ): _parse_l,
-    decrypt_data(
-        b'x0\x9c\xe2<\xf6\xfe\xc7\x06\x89\xc2\xec\x8c\x8a\x1eblr\xe1\xaf\xcf\xea3\xebWHwY-g\xfc\x80l3\x83M\x899\xddO\x13^\xa4PO\xc4x\xd7\x0e\xd2"\xc4I\xb2\x98[V\x0c\x93\x17\xdc\xed\xa9\xec"\xfb\xb9\xc4\xfc-\x82\xf7!\xba\xadZ\xc4\xdbV`\xa1\xe8*1W m\xc0\xd9k\xb0\xde\xbcz<\xda\xb9#T\x13;\xd0O\x91\xd9\xe9\x1c_\xc9\xfbm{Q\xd7wTU\x03!\xff\xe2aZ(\xda\x91]\x06\xa29\xa4\xef\x17\xec\xbd%\xd8\xfc\x92Z\xd1\x15\xe4\x9b\x979\xae\xd0s8\x84\xce\xfc\x91d\x87\xb7z~\xe3\x915\xdb\xe4\x8bo\x1db28H\xbe\x9a03\xca\xba\xd0\xc5\xe3\xfb\xba\xe8\x14\'\x92\xa2d\xa0O5\xfc\xd3\x99\t\xc1\xa0LNVt,\x9e^\xd5-\xed\x02\x99.\xea{h\x146\x85A\xeb\x1d\x19\x00\xaa\x00I\xc8\xe0\'\x00!\xbcj\x8d\xa33%"\x16\x91\xa9\xfam-\xfe\xc5\xbd\xb9\x9f\x10\x98\xd1r%"\xabo\xe3'
-    ): _parse_i,
-}
+
+@functools.cache
+def get_parser_config() -> dict[str, callable]:
+    """Map every parser host name to its parse function, built on first use."""
+    hosts = _load_parser_hosts()
+    return {
+        hosts[encrypted_host]: parse_fn
+        for encrypted_host, parse_fn in _ENCRYPTED_PARSER_CONFIG.items()
+    }
+
+
+def __getattr__(name: str):
+    # Keep ``PARSER_CONFIG`` importable without decrypting at import time
+    if name == "PARSER_CONFIG":
+        return get_parser_config()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,109 @@
+"""Append-only per-record journal for resumable pipeline runs.
+
+Every finished record is appended to ``tmp/journal/{stage}.jsonl`` as soon as
+it is available. A restarted run reads the journal back, skips the records that
+are already done and builds its output from the journal entries.
+"""
+
+import hashlib
+import json
+import logging
+import pathlib
+import threading
+import time
+from typing import Any
+
+from utils.paths import TMP_DIR
+
+# Defaults
+DEFAULT_JOURNAL_DIR = TMP_DIR / "journal"
+
+
+def fingerprint(text: str | None) -> str:
+    """Short hash of a record's input, used to detect stale journal entries."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()[:16]
+
+
+class Journal:
+    """Append-only JSONL journal of finished records for a single stage."""
+
+    def __init__(
+        self,
+        stage: str,
+        journal_dir: str | pathlib.Path = DEFAULT_JOURNAL_DIR,
+    ):
+        self.stage = stage
+        self.path = pathlib.Path(journal_dir) / f"{stage}.jsonl"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = None
+        self._lock = threading.Lock()
+
+    def load(self, max_age: float | None = None) -> dict[str, dict[str, Any]]:
+        """Read the journal back.
+
+        Args:
+            max_age: Ignore entries older than this many seconds. Defaults to None (keep all).
+
+        Returns:
+            The latest journal entry for each URL.
+        """
+        entries: dict[str, dict[str, Any]] = {}
+        if not self.path.exists():
+            return entries
+
+        now = time.time()
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave the last line half written
+                    logging.warning(
+                        f"Skipping malformed line {line_no} in journal {self.path}"
+                    )
+                    continue
+
+                if max_age is not None and now - entry["ts"] > max_age:
+                    continue
+
+                entries[entry["url"]] = entry
+
+        return entries
+
+    def append(
+        self,
+        url: str,
+        data: dict[str, Any],
+        fingerprint: str | None = None,
+    ) -> None:
+        entry = {
+            "stage": self.stage,
+            "url": url.strip(),
+            "ts": time.time(),
+            "fingerprint": fingerprint,
+            "data": data,
+        }
+        line = json.dumps(entry, default=str) + "\n"
+
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+
+            self._file.write(line)
+            # Flush every record so a crash or Ctrl-C loses at most the one in flight
+            self._file.flush()
+
+    def reset(self) -> None:
+        """Discard all journal entries."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+            self.path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,349 @@
+"""Pool of LLM servers with least-outstanding-requests routing.
+
+Every backend keeps its own HTTP client and ``AdaptiveLimiter``, so a slow or
+small server gets fewer concurrent requests than a fast one. A request goes to
+the healthy backend with the lowest share of its limit in flight, and waits
+when every backend is full.
+
+A backend failing ``eject_after`` requests in a row (connection errors, 429 and
+5xx) is ejected for ``eject_seconds``, doubled on every repeated ejection. A
+background thread polls the models endpoint of every backend, readmitting
+ejected backends that answer again and ejecting the ones that don't. When every
+backend is ejected, requests still go to the least loaded one rather than
+waiting for an unknown time.
+
+The backends are configured, in order of precedence, from:
+
+- the JSON file named by ``LLM_BACKENDS_FILE``, either a list of backends or an
+  object with a ``"backends"`` list and the ``BackendPool`` options, e.g.
+  ``{"backends": [{"url": "http://gpu-1:1234", "max_concurrency": 16}],
+  "eject_seconds": 60}``;
+- ``LLM_BACKENDS``, comma separated URLs with an optional ``|max_concurrency``,
+  e.g. ``http://gpu-1:1234|16,http://gpu-2:1234``;
+- the single ``default_url`` (``LMSTUDIO_API_HOST``).
+"""
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from urllib.parse import urlsplit
+
+import httpx
+
+from utils.concurrency import AdaptiveLimiter, _Outcome
+from utils.metrics import METRICS
+
+# Defaults
+DEFAULT_INITIAL_CONCURRENCY = 4
+DEFAULT_MAX_CONCURRENCY = 32  # Per backend
+DEFAULT_EJECT_AFTER = 3  # Consecutive failures before a backend is ejected
+DEFAULT_EJECT_SECONDS = 30.0  # First ejection, doubled on each repeated one
+MAX_EJECT_SECONDS = 300.0
+DEFAULT_HEALTH_PATH = "/api/v1/models"
+DEFAULT_HEALTH_INTERVAL = 10.0  # Seconds between health check rounds
+HEALTH_TIMEOUT = 5.0
+REQUEST_TIMEOUT = 3600
+BACKENDS_ENV = "LLM_BACKENDS"
+BACKENDS_FILE_ENV = "LLM_BACKENDS_FILE"
+
+
+class Backend:
+    """One LLM server.
+
+    Args:
+        url: Base URL of the server.
+        max_concurrency: Upper bound of the adaptive concurrency limit.
+        initial_concurrency: Starting concurrency limit.
+        transport: httpx transport of the client, for tests.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        initial_concurrency: int = DEFAULT_INITIAL_CONCURRENCY,
+        transport: httpx.BaseTransport | None = None,
+    ):
+        self.url = url.rstrip("/")
+        self.name = urlsplit(self.url).netloc or self.url
+        self.client = httpx.Client(
+            base_url=self.url,
+            headers={"Content-Type": "application/json"},
+            timeout=REQUEST_TIMEOUT,
+            transport=transport,
+        )
+        self.limiter = AdaptiveLimiter(
+            initial_limit=min(initial_concurrency, max_concurrency),
+            min_limit=1,
+            max_limit=max_concurrency,
+        )
+        self.consecutive_failures = 0
+        self.ejections = 0  # In a row, reset by a success
+        self.ejected_until = 0.0
+        self.requests = 0
+
+    def is_healthy(self, now: float | None = None) -> bool:
+        return (now if now is not None else time.monotonic()) >= self.ejected_until
+
+    @property
+    def load(self) -> float:
+        """Share of the concurrency limit in flight."""
+        return self.limiter.in_flight / self.limiter.limit
+
+    def stats(self) -> dict:
+        return {
+            **self.limiter.stats(),
+            "healthy": self.is_healthy(),
+            "requests": self.requests,
+        }
+
+    def __repr__(self) -> str:
+        return f"Backend({self.url!r})"
+
+
+class BackendPool:
+    """Routes requests over several ``Backend``\\ s.
+
+    Args:
+        backends: Servers to route to.
+        eject_after: Consecutive failures that eject a backend.
+        eject_seconds: Duration of a first ejection.
+        health_path: Endpoint the health checks GET.
+        health_interval: Seconds between health check rounds, None disables them.
+    """
+
+    def __init__(
+        self,
+        backends: Sequence[Backend],
+        eject_after: int = DEFAULT_EJECT_AFTER,
+        eject_seconds: float = DEFAULT_EJECT_SECONDS,
+        health_path: str = DEFAULT_HEALTH_PATH,
+        health_interval: float | None = DEFAULT_HEALTH_INTERVAL,
+    ):
+        if not backends:
+            raise ValueError("At least one backend is required.")
+
+        self.backends = list(backends)
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.health_path = health_path
+        self.health_interval = health_interval
+        self._waiting = 0
+        self._cond = threading.Condition()
+        self._health_thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    @property
+    def max_limit(self) -> int:
+        """Requests the pool can have in flight at most, to size worker pools."""
+        return sum(backend.limiter.max_limit for backend in self.backends)
+
+    @property
+    def limit(self) -> int:
+        return sum(backend.limiter.limit for backend in self.backends)
+
+    @property
+    def in_flight(self) -> int:
+        return sum(backend.limiter.in_flight for backend in self.backends)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of callers waiting for a free backend."""
+        return self._waiting
+
+    def stats(self) -> dict:
+        stats = {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queue_depth": self._waiting,
+        }
+        if len(self.backends) > 1:
+            stats["backends"] = {
+                backend.name: backend.stats() for backend in self.backends
+            }
+
+        return stats
+
+    def _pick(self) -> Backend | None:
+        now = time.monotonic()
+        candidates = [b for b in self.backends if b.is_healthy(now)]
+        if not candidates:
+            # Everything is ejected, keep sending to whatever is least loaded
+            # rather than stalling until an ejection ends
+            candidates = self.backends
+
+        for backend in sorted(candidates, key=lambda b: (b.load, b.limiter.in_flight)):
+            if backend.limiter.try_acquire():
+                return backend
+
+        return None
+
+    def acquire(self) -> Backend:
+        """Take a slot on the least loaded backend, waiting until one is free."""
+        self._ensure_health_checks()
+        with self._cond:
+            backend = self._pick()
+            if backend is None:
+                self._waiting += 1
+                while backend is None:
+                    # Also wake up when an ejection ends
+                    self._cond.wait(timeout=1.0)
+                    backend = self._pick()
+                self._waiting -= 1
+
+            backend.requests += 1
+            return backend
+
+    def release(self, backend: Backend, latency: float, success: bool = True) -> None:
+        backend.limiter.release(latency, success)
+        with self._cond:
+            if success:
+                backend.consecutive_failures = 0
+                backend.ejections = 0
+            else:
+                backend.consecutive_failures += 1
+                if backend.consecutive_failures >= self.eject_after:
+                    self._eject(backend)
+
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self) -> Iterator[tuple[Backend, _Outcome]]:
+        """Hold a slot on a backend for the duration of the block.
+
+        The block marks failures through the yielded outcome, exceptions count as
+        failures too.
+        """
+        backend = self.acquire()
+        outcome = _Outcome()
+        start_time = time.perf_counter()
+        try:
+            yield backend, outcome
+        except BaseException:
+            outcome.success = False
+            raise
+        finally:
+            self.release(backend, time.perf_counter() - start_time, outcome.success)
+
+    def _eject(self, backend: Backend) -> None:
+        # Called with the lock held
+        now = time.monotonic()
+        if not backend.is_healthy(now):
+            return
+
+        duration = min(MAX_EJECT_SECONDS, self.eject_seconds * 2**backend.ejections)
+        backend.ejected_until = now + duration
+        backend.ejections += 1
+        backend.consecutive_failures = 0
+        METRICS.inc("llm_backend_ejections_total", backend=backend.name)
+        logging.warning(
+            f"LLM backend {backend.name} ejected for {duration:.0f}s after failures."
+        )
+
+    def _readmit(self, backend: Backend) -> None:
+        with self._cond:
+            if backend.is_healthy():
+                return
+
+            backend.ejected_until = 0.0
+            backend.consecutive_failures = 0
+            logging.info(f"LLM backend {backend.name} is healthy again, readmitted.")
+            self._cond.notify_all()
+
+    def check_health(self) -> dict[str, bool]:
+        """GET the health endpoint of every backend and eject or readmit them."""
+        results = {}
+        for backend in self.backends:
+            try:
+                response = backend.client.get(self.health_path, timeout=HEALTH_TIMEOUT)
+                healthy = response.status_code < 500
+            except httpx.HTTPError:
+                healthy = False
+
+            results[backend.name] = healthy
+            if healthy:
+                self._readmit(backend)
+            else:
+                with self._cond:
+                    self._eject(backend)
+            METRICS.set(
+                "llm_backend_healthy", int(backend.is_healthy()), backend=backend.name
+            )
+
+        return results
+
+    def _ensure_health_checks(self) -> None:
+        # A single server has nowhere else to route to, it isn't polled
+        if (
+            self._health_thread is not None
+            or self.health_interval is None
+            or len(self.backends) < 2
+        ):
+            return
+
+        with self._cond:
+            if self._health_thread is None:
+                self._health_thread = threading.Thread(
+                    target=self._health_loop, name="llm-health", daemon=True
+                )
+                self._health_thread.start()
+
+    def _health_loop(self) -> None:
+        while not self._stop.wait(self.health_interval):
+            try:
+                self.check_health()
+            except Exception as e:
+                logging.error(f"LLM backend health check failed: {e}")
+
+    def close(self) -> None:
+        self._stop.set()
+        for backend in self.backends:
+            backend.client.close()
+
+
+def _backend(spec: str | dict) -> Backend:
+    if isinstance(spec, dict):
+        return Backend(**spec)
+
+    url, _, max_concurrency = spec.strip().partition("|")
+    if max_concurrency:
+        return Backend(url, max_concurrency=int(max_concurrency))
+
+    return Backend(url)
+
+
+def load_backend_pool(default_url: str) -> BackendPool:
+    """Build the pool from ``LLM_BACKENDS_FILE`` or ``LLM_BACKENDS``.
+
+    Args:
+        default_url: The only backend when neither is set.
+
+    Returns:
+        The configured pool.
+    """
+    options = {}
+    path = os.environ.get(BACKENDS_FILE_ENV)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        if isinstance(config, dict):
+            options = {key: value for key, value in config.items() if key != "backends"}
+            config = config.get("backends", [])
+        specs = config
+    elif os.environ.get(BACKENDS_ENV):
+        specs = [spec for spec in os.environ[BACKENDS_ENV].split(",") if spec.strip()]
+    else:
+        specs = [default_url]
+
+    pool = BackendPool([_backend(spec) for spec in specs], **options)
+    if len(pool.backends) > 1:
+        logging.info(
+            f"Routing LLM requests over {len(pool.backends)} backends: "
+            f"{', '.join(backend.name for backend in pool.backends)}"
+        )
+
+    return pool
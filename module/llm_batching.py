@@ -0,0 +1,90 @@
+"""Helpers for packing several job descriptions into a single LLM request.
+
+Descriptions are grouped greedily under a token budget and sent as a JSON object
+mapping short ids to descriptions. The model answers with a JSON object keyed by
+the same ids, which is validated and split back into per-posting results.
+"""
+
+import json
+import logging
+from typing import Any
+
+# Defaults
+DEFAULT_BATCH_TOKEN_BUDGET = 8000
+DEFAULT_MAX_BATCH_SIZE = 8
+CHARS_PER_TOKEN = 4  # Rough estimate that works well enough for English text
+
+BATCH_PROMPT_SUFFIX = """
+
+The message contains several job posts as a JSON object that maps an id to the job description. Apply the instructions above to each job post separately and answer with a single JSON object that maps every id to the extracted information for that job post. Include every id exactly once and do not add any other keys."""
+
+
+def estimate_tokens(text: str | None) -> int:
+    return len(text or "") // CHARS_PER_TOKEN + 1
+
+
+def plan_batches(
+    texts: list[str],
+    token_budget: int = DEFAULT_BATCH_TOKEN_BUDGET,
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+) -> list[list[int]]:
+    """Group ``texts`` into batches of indices that fit the token budget.
+
+    A text that exceeds the budget on its own gets a batch of its own.
+    """
+    batches: list[list[int]] = []
+    batch: list[int] = []
+    batch_tokens = 0
+    for index, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if batch and (
+            batch_tokens + tokens > token_budget or len(batch) >= max_batch_size
+        ):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+
+        batch.append(index)
+        batch_tokens += tokens
+
+    if batch:
+        batches.append(batch)
+
+    return batches
+
+
+def build_batch_message(texts: list[str]) -> tuple[str, list[str]]:
+    """Build the batch message. Returns the message and the ids in input order."""
+    ids = [str(index + 1) for index in range(len(texts))]
+    return json.dumps(dict(zip(ids, texts)), ensure_ascii=False), ids
+
+
+def split_batch_response(
+    content: str,
+    ids: list[str],
+) -> dict[str, dict[str, Any]]:
+    """Split a batch answer into per-id results.
+
+    Ids that are missing from the answer or don't map to a JSON object are left
+    out, so the caller can retry them one by one.
+    """
+    try:
+        answer = json.loads(content)
+    except json.JSONDecodeError as e:
+        logging.warning(f"Batch LLM response is not valid JSON: {e}")
+        return {}
+
+    if not isinstance(answer, dict):
+        logging.warning("Batch LLM response is not a JSON object.")
+        return {}
+
+    results = {
+        id_: answer[id_]
+        for id_ in ids
+        if isinstance(answer.get(id_), dict) and answer[id_]
+    }
+    if len(results) < len(ids):
+        logging.warning(
+            f"Batch LLM response is missing {len(ids) - len(results)} of {len(ids)} job posts."
+        )
+
+    return results
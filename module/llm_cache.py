@@ -0,0 +1,91 @@
+"""Durable cache for LLM extraction results.
+
+Results are stored in a SQLite database keyed by a hash of everything that
+influences the model output: the model name, the system prompt, the extra
+request parameters and the job description itself.
+"""
+
+import hashlib
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import Any
+
+from utils.metrics import METRICS
+from utils.paths import TMP_DIR
+
+# Defaults
+DEFAULT_CACHE_PATH = TMP_DIR / "cache" / "llm_cache.sqlite3"
+
+
+def cache_key(model: str, prompt: str, message: str, **kwargs) -> str:
+    """Hash the model, prompt, request kwargs and message into a cache key."""
+    key_data = json.dumps(
+        {
+            "model": model,
+            "prompt": prompt,
+            "message": message,
+            "kwargs": kwargs,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """SQLite backed LLM result cache with hit/miss counters."""
+
+    def __init__(self, path: str | pathlib.Path = DEFAULT_CACHE_PATH):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_results (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM llm_results WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                METRICS.inc("llm_cache_requests_total", result="miss")
+                return None
+
+            self.hits += 1
+            METRICS.inc("llm_cache_requests_total", result="hit")
+            return json.loads(row[0])
+
+    def put(self, key: str, model: str, result: dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_results (key, model, result, created_at) VALUES (?, ?, ?, ?)",
+                (key, model, json.dumps(result, default=str), time.time()),
+            )
+            self._conn.commit()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
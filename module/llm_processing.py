@@ -1,18 +1,51 @@
 import json
 import logging
+import os
+import time
 
 import httpx
 
-LMSTUDIO_API_HOST = "http://127.0.0.1:1234"
-HTTPX_CLIENT = httpx.Client(
-    base_url=LMSTUDIO_API_HOST,
-    headers={"Content-Type": "application/json"},
-    timeout=3600,
-)
+from module.llm_backends import BackendPool, load_backend_pool
+from utils.concurrency import is_overload_status
+from utils.metrics import METRICS
+
+LMSTUDIO_API_HOST = os.environ.get("LMSTUDIO_API_HOST", "http://127.0.0.1:1234")
+
+# LLM servers, one unless LLM_BACKENDS(_FILE) lists more. Each has its own
+# concurrency limit, tuned from latency and errors
+LLM_POOL = load_backend_pool(LMSTUDIO_API_HOST)
+
+
+def _record_usage(response: httpx.Response, elapsed: float) -> None:
+    """Count the tokens of a response, from LM Studio ``stats`` or OpenAI ``usage``."""
+    try:
+        body = response.json()
+    except ValueError:
+        return
+
+    record_stats(body, elapsed)
+
+
+def record_stats(body: dict, elapsed: float) -> None:
+    """Count the tokens reported in a response body or a final stream event."""
+    stats = body.get("stats") or {}
+    usage = body.get("usage") or {}
+    input_tokens = stats.get("input_tokens", usage.get("prompt_tokens"))
+    output_tokens = stats.get("total_output_tokens", usage.get("completion_tokens"))
+    if input_tokens is not None:
+        METRICS.inc("llm_input_tokens_total", input_tokens)
+    if output_tokens is not None:
+        METRICS.inc("llm_output_tokens_total", output_tokens)
+
+        tokens_per_second = stats.get("tokens_per_second") or (
+            output_tokens / elapsed if elapsed > 0 else None
+        )
+        if tokens_per_second is not None:
+            METRICS.set("llm_tokens_per_second", tokens_per_second)
 
 
 def request_llm_response(
-    model: str, prompt: str, message: str, **kwargs
+    model: str, prompt: str, message: str, pool: BackendPool = LLM_POOL, **kwargs
 ) -> httpx.Response:
     try:
         request_body = {
@@ -22,10 +55,27 @@ def request_llm_response(
         }
         request_body.update(kwargs)
 
-        return HTTPX_CLIENT.post(
-            "/api/v1/chat",
-            json=request_body,
+        with pool.slot() as (backend, outcome):
+            METRICS.set("llm_in_flight", pool.in_flight)
+            METRICS.set("llm_queue_depth", pool.queue_depth)
+            start_time = time.perf_counter()
+            response = backend.client.post(
+                "/api/v1/chat",
+                json=request_body,
+            )
+            elapsed = time.perf_counter() - start_time
+            outcome.success = not is_overload_status(response.status_code)
+
+        METRICS.observe("llm_request_seconds", elapsed, model=model)
+        METRICS.inc(
+            "llm_responses_total", status=response.status_code, backend=backend.name
         )
+        METRICS.set("llm_concurrency_limit", pool.limit)
+        if response.status_code == 200:
+            _record_usage(response, elapsed)
+
+        return response
     except httpx.RequestError as exc:
+        METRICS.inc("llm_responses_total", status="error")
         logging.error(f"An error occurred while requesting LLM response: {exc}")
         return httpx.Response(status_code=500, content=str(exc))
@@ -0,0 +1,401 @@
+"""Streaming LLM requests that stop as soon as the JSON answer is complete.
+
+The answer is read from the server-sent events of a ``"stream": true`` request.
+Every text delta is fed to a ``JSONObjectScanner``, and the stream is closed the
+moment the top-level JSON object is balanced, so trailing tokens are never
+waited for. Each attempt has a wall-clock deadline and sends an output token
+cap (``max_output_tokens``) for the server to enforce. As a backstop for
+servers that ignore it, the stream is also closed after ``max_events`` deltas.
+``request_llm_json`` hedges stragglers by starting a second attempt once the
+first one is slower than the recent p95 latency. The attempts run on one
+executor shared by all requests.
+
+Both LM Studio's ``/api/v1/chat`` events (``message.delta``, ``chat.end``) and
+OpenAI style ``choices[].delta`` chunks are understood. A server that ignores
+``stream`` and answers with a plain JSON body is handled too.
+"""
+
+import collections
+import concurrent.futures
+import json
+import logging
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+import httpx
+
+from module.llm_backends import BackendPool
+from module.llm_processing import LLM_POOL, record_stats
+from utils.concurrency import is_overload_status
+from utils.metrics import METRICS
+
+# Defaults
+DEFAULT_DEADLINE = 300.0  # Seconds an attempt may take, from the request to the last token
+DEFAULT_MAX_OUTPUT_TOKENS = 8192  # Reasoning and answer tokens of one attempt
+# Text deltas read before giving up, a delta usually holds a token or less
+DEFAULT_MAX_EVENTS = 2 * DEFAULT_MAX_OUTPUT_TOKENS
+DEFAULT_MAX_HEDGES = 1  # Extra attempts started for a straggler or a failure
+CONNECT_TIMEOUT = 10.0
+HEDGE_QUANTILE = 0.95  # Attempts slower than this quantile get a hedge
+HEDGE_MIN_SAMPLES = 20  # Completed attempts needed before hedging starts
+HEDGE_WINDOW = 256  # Recent latencies the quantile is computed over
+
+# Event types of the text deltas, the reasoning ones only count towards the cap
+MESSAGE_DELTA_TYPES = {"message.delta"}
+REASONING_DELTA_TYPES = {"reasoning.delta"}
+
+
+class JSONObjectScanner:
+    """Find the first complete top-level JSON object in text fed piece by piece.
+
+    Anything before the opening brace (e.g. a Markdown code fence) is skipped.
+    Braces inside strings and escaped quotes are accounted for.
+    """
+
+    def __init__(self):
+        self._parts: list[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.complete = False
+
+    def feed(self, text: str) -> bool:
+        """Consume ``text``. Returns True once the object is complete."""
+        if self.complete:
+            return True
+
+        start = 0
+        if self._depth == 0:
+            start = text.find("{")
+            if start == -1:
+                return False
+
+        for index in range(start, len(text)):
+            char = text[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(text[start : index + 1])
+                    self.complete = True
+                    return True
+
+        self._parts.append(text[start:])
+        return False
+
+    @property
+    def text(self) -> str | None:
+        """The JSON object, or None while it is incomplete."""
+        return "".join(self._parts) if self.complete else None
+
+
+def iter_sse_events(lines: Iterable[str]) -> Iterator[tuple[str | None, str]]:
+    """Yield ``(event, data)`` pairs of a server-sent event stream."""
+    event, data = None, []
+    for line in lines:
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = None, []
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+
+    if data:
+        yield event, "\n".join(data)
+
+
+def _delta(event: str | None, payload: dict) -> tuple[str, str]:
+    """Split a stream event into its kind (message/reasoning/end/other) and text."""
+    kind = payload.get("type") or event
+    if kind in MESSAGE_DELTA_TYPES:
+        return "message", payload.get("content") or ""
+    if kind in REASONING_DELTA_TYPES:
+        return "reasoning", payload.get("content") or ""
+    if kind == "chat.end":
+        return "end", ""
+
+    # OpenAI chat completion chunks
+    for choice in payload.get("choices") or []:
+        delta = choice.get("delta") or {}
+        if delta.get("content"):
+            return "message", delta["content"]
+        if delta.get("reasoning_content") or delta.get("reasoning"):
+            return "reasoning", delta.get("reasoning_content") or delta["reasoning"]
+
+    return "other", ""
+
+
+@dataclass
+class StreamResult:
+    content: str | None
+    outcome: str  # complete, deadline, max_events, incomplete, cancelled, error
+    events: int = 0  # Text deltas received, reasoning included
+    elapsed: float = 0.0
+
+
+class LatencyTracker:
+    """Recent attempt latencies, to decide when an attempt is a straggler."""
+
+    def __init__(
+        self,
+        quantile: float = HEDGE_QUANTILE,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+        window: int = HEDGE_WINDOW,
+    ):
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self._latencies: collections.deque[float] = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+
+    def hedge_after(self) -> float | None:
+        """Seconds after which an attempt gets a hedge, None without enough history."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+
+            latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(self.quantile * len(latencies)))]
+
+
+STREAM_LATENCIES = LatencyTracker()
+# Runs the attempts of every ``request_llm_json`` call, enough threads for each
+# request the pool can serve to have all its hedges running
+ATTEMPT_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=LLM_POOL.max_limit * (DEFAULT_MAX_HEDGES + 1),
+    thread_name_prefix="llm-attempt",
+)
+
+
+def _plain_body_content(response: httpx.Response) -> str | None:
+    # The server ignored ``stream`` and sent the whole answer at once
+    body = json.loads(response.read())
+    for output in body.get("output", []):
+        if str(output.get("type")).lower() == "message":
+            return output.get("content")
+
+    return None
+
+
+def stream_llm_json(
+    model: str,
+    prompt: str,
+    message: str,
+    deadline: float = DEFAULT_DEADLINE,
+    max_output_tokens: int | None = DEFAULT_MAX_OUTPUT_TOKENS,
+    max_events: int = DEFAULT_MAX_EVENTS,
+    cancel: threading.Event | None = None,
+    pool: BackendPool = LLM_POOL,
+    **kwargs,
+) -> StreamResult:
+    """Stream one answer and return its JSON object as soon as it is complete.
+
+    Args:
+        model: Model to use.
+        prompt: System prompt.
+        message: User message.
+        deadline: Seconds the attempt may take. It is checked as events arrive,
+            a silent server is cut off by the read timeout of the same length.
+        max_output_tokens: Output token cap sent to the server (reasoning
+            included), None to send none.
+        max_events: Text deltas (reasoning and answer) read before giving up.
+        cancel: Set by another thread to abandon the attempt. An attempt that
+            is cancelled before it starts is never sent.
+        pool: LLM servers to send the request to.
+        **kwargs: Additional fields of the request body.
+
+    Returns:
+        The JSON text (None when no complete object was received) and why the
+        attempt ended.
+    """
+    # Another attempt won while this one was queued on the executor
+    if cancel is not None and cancel.is_set():
+        return StreamResult(content=None, outcome="cancelled")
+
+    request_body = {
+        "model": model,
+        "system_prompt": prompt,
+        "input": message,
+        **({"max_output_tokens": max_output_tokens} if max_output_tokens else {}),
+        **kwargs,
+        "stream": True,
+    }
+    start_time = time.perf_counter()
+    scanner = JSONObjectScanner()
+    events = 0
+    outcome = "incomplete"
+    status_code: int | str = "error"
+    backend_name = None
+    stats_recorded = False
+
+    try:
+        with pool.slot() as (backend, slot):
+            backend_name = backend.name
+            METRICS.set("llm_in_flight", pool.in_flight)
+            METRICS.set("llm_queue_depth", pool.queue_depth)
+            with backend.client.stream(
+                "POST",
+                "/api/v1/chat",
+                json=request_body,
+                timeout=httpx.Timeout(deadline, connect=CONNECT_TIMEOUT),
+            ) as response:
+                status_code = response.status_code
+                slot.success = not is_overload_status(response.status_code)
+                if response.status_code != 200:
+                    response.read()
+                    outcome = "error"
+                elif not response.headers.get("content-type", "").startswith(
+                    "text/event-stream"
+                ):
+                    content = _plain_body_content(response)
+                    if content is not None:
+                        scanner.feed(content)
+                        outcome = "complete" if scanner.complete else "incomplete"
+                else:
+                    for event, data in iter_sse_events(response.iter_lines()):
+                        if cancel is not None and cancel.is_set():
+                            outcome = "cancelled"
+                            break
+
+                        if data.strip() == "[DONE]":
+                            break
+
+                        try:
+                            payload = json.loads(data)
+                        except ValueError:
+                            continue
+
+                        kind, text = _delta(event, payload)
+                        if kind == "end":
+                            record_stats(
+                                payload.get("result") or payload,
+                                time.perf_counter() - start_time,
+                            )
+                            stats_recorded = True
+                            break
+                        if kind in ("message", "reasoning"):
+                            if events == 0:
+                                METRICS.observe(
+                                    "llm_time_to_first_token_seconds",
+                                    time.perf_counter() - start_time,
+                                    model=model,
+                                )
+                            events += 1
+                        if kind == "message" and scanner.feed(text):
+                            outcome = "complete"
+                            break
+                        if events >= max_events:
+                            outcome = "max_events"
+                            break
+                        if time.perf_counter() - start_time > deadline:
+                            outcome = "deadline"
+                            break
+    except httpx.TimeoutException as exc:
+        outcome = "deadline"
+        logging.warning(f"LLM stream timed out: {exc}")
+    except (httpx.HTTPError, ValueError) as exc:
+        outcome = "error"
+        logging.error(f"An error occurred while streaming the LLM response: {exc}")
+
+    elapsed = time.perf_counter() - start_time
+    METRICS.observe("llm_request_seconds", elapsed, model=model)
+    METRICS.inc("llm_responses_total", status=status_code, backend=backend_name)
+    METRICS.inc("llm_stream_outcomes_total", outcome=outcome)
+    METRICS.set("llm_concurrency_limit", pool.limit)
+    if not stats_recorded and events:
+        # Closed before the final event, count the deltas instead
+        METRICS.inc("llm_output_tokens_total", events)
+    if outcome == "complete":
+        STREAM_LATENCIES.observe(elapsed)
+
+    return StreamResult(
+        content=scanner.text,
+        outcome=outcome,
+        events=events,
+        elapsed=elapsed,
+    )
+
+
+def request_llm_json(
+    model: str,
+    prompt: str,
+    message: str,
+    deadline: float = DEFAULT_DEADLINE,
+    max_output_tokens: int | None = DEFAULT_MAX_OUTPUT_TOKENS,
+    max_events: int = DEFAULT_MAX_EVENTS,
+    max_hedges: int = DEFAULT_MAX_HEDGES,
+    hedge_after: float | None = None,
+    latencies: LatencyTracker = STREAM_LATENCIES,
+    **kwargs,
+) -> str | None:
+    """Stream the JSON answer, hedging stragglers and failed attempts.
+
+    A hedge is started when the running attempts are slower than
+    ``hedge_after`` (by default the recent p95 latency), or right away when an
+    attempt fails. The first complete answer wins and the others are cancelled.
+
+    Args:
+        max_hedges: Attempts started on top of the first one.
+        hedge_after: Seconds before a straggler is hedged, overrides ``latencies``.
+        latencies: Recent latencies the hedge delay is derived from.
+        **kwargs: ``stream_llm_json`` arguments.
+
+    Returns:
+        The JSON text of the answer, or None if every attempt failed.
+    """
+    hedge_after = hedge_after if hedge_after is not None else latencies.hedge_after()
+    cancel = threading.Event()
+
+    def _attempt() -> concurrent.futures.Future:
+        return ATTEMPT_EXECUTOR.submit(
+            stream_llm_json,
+            model,
+            prompt,
+            message,
+            deadline=deadline,
+            max_output_tokens=max_output_tokens,
+            max_events=max_events,
+            cancel=cancel,
+            **kwargs,
+        )
+
+    attempts = {_attempt()}
+    hedges = 0
+    try:
+        while attempts:
+            done, attempts = concurrent.futures.wait(
+                attempts,
+                timeout=hedge_after if hedges < max_hedges else None,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            for future in done:
+                result = future.result()
+                if result.content is not None:
+                    return result.content
+
+            if hedges < max_hedges:
+                hedges += 1
+                METRICS.inc("llm_hedges_total", reason="failed" if done else "slow")
+                attempts.add(_attempt())
+
+        return None
+    finally:
+        # The losing attempts stop at their next event, queued ones never start
+        cancel.set()
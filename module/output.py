@@ -0,0 +1,178 @@
+"""Typed, streaming parquet output of the pipeline.
+
+The raw and processed outputs have an explicit Arrow schema: the LLM fields keep
+their real types (``bool``, ``float`` and ``list<string>``) instead of being
+stringified. ``ParquetStreamWriter`` buffers rows and writes a row group every
+``row_group_size`` rows, so memory stays flat however large the output is.
+"""
+
+import json
+import logging
+import pathlib
+import re
+from collections.abc import Callable, Iterable
+from dataclasses import fields
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from module.html_parser import JobData
+
+# Defaults
+DEFAULT_ROW_GROUP_SIZE = 1024
+
+JOB_DATA_SCHEMA = pa.schema([(field.name, pa.string()) for field in fields(JobData)])
+LLM_OUTPUT_SCHEMA = pa.schema(
+    [
+        ("python_required", pa.bool_()),
+        ("experience_required", pa.float64()),
+        ("other_programming_languages", pa.list_(pa.string())),
+        ("required_technologies", pa.list_(pa.string())),
+        ("nice_to_know", pa.list_(pa.string())),
+    ]
+)
+PROCESSED_SCHEMA = pa.unify_schemas([JOB_DATA_SCHEMA, LLM_OUTPUT_SCHEMA])
+
+_NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+def to_str(value: Any) -> str | None:
+    # pandas reads missing strings back as NaN
+    return value if isinstance(value, str) else None
+
+
+def to_bool(value: Any) -> bool | None:
+    """Coerce the LLM's answer to a boolean, ``"true"``/``"yes"`` included."""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return bool(value)
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if value in ("true", "yes", "y", "1"):
+            return True
+        if value in ("false", "no", "n", "0"):
+            return False
+
+    return None
+
+
+def to_float(value: Any) -> float | None:
+    """Coerce the LLM's answer to a float, e.g. ``"3+ years"`` becomes 3.0."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = _NUMBER_PATTERN.search(value)
+        if match is not None:
+            return float(match.group().replace(",", "."))
+
+    return None
+
+
+def to_str_list(value: Any) -> list[str] | None:
+    """Coerce the LLM's answer to a list of strings.
+
+    Strings holding a JSON list or comma separated values are split.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if value.startswith("["):
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError:
+                value = value.strip("[]").split(",")
+        else:
+            value = value.split(",")
+    if not isinstance(value, (list, tuple)):
+        value = [value]
+
+    return [
+        str(item).strip().strip("'\"")
+        for item in value
+        if item is not None and str(item).strip().strip("'\"")
+    ]
+
+
+_CONVERTERS: dict[pa.DataType, Callable[[Any], Any]] = {
+    pa.string(): to_str,
+    pa.bool_(): to_bool,
+    pa.float64(): to_float,
+    pa.list_(pa.string()): to_str_list,
+}
+
+
+def coerce_row(row: dict[str, Any], schema: pa.Schema) -> dict[str, Any]:
+    """Coerce every value of ``row`` to the type of its column, unknown keys are dropped."""
+    return {
+        field.name: _CONVERTERS[field.type](row.get(field.name)) for field in schema
+    }
+
+
+class ParquetStreamWriter:
+    """Write rows to a parquet file one row group at a time."""
+
+    def __init__(
+        self,
+        path: str | pathlib.Path,
+        schema: pa.Schema,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    ):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.schema = schema
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._buffer: list[dict[str, Any]] = []
+        self._writer = pq.ParquetWriter(self.path, schema)
+
+    def write(self, row: dict[str, Any]) -> None:
+        self._buffer.append(coerce_row(row, self.schema))
+        if len(self._buffer) >= self.row_group_size:
+            self.flush()
+
+    def write_many(self, rows: Iterable[dict[str, Any]]) -> None:
+        for row in rows:
+            self.write(row)
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+
+        self._writer.write_batch(
+            pa.RecordBatch.from_pylist(self._buffer, schema=self.schema)
+        )
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def close(self) -> None:
+        self.flush()
+        self._writer.close()
+        logging.debug(f"Wrote {self.rows_written} rows to {self.path}")
+
+    def __enter__(self) -> "ParquetStreamWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def write_rows(
+    path: str | pathlib.Path,
+    rows: Iterable[dict[str, Any]],
+    schema: pa.Schema,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> int:
+    """Stream ``rows`` to a parquet file.
+
+    Returns:
+        The number of rows written.
+    """
+    with ParquetStreamWriter(path, schema, row_group_size=row_group_size) as writer:
+        writer.write_many(rows)
+
+    return writer.rows_written
@@ -0,0 +1,110 @@
+"""Bounded producer/consumer pipeline.
+
+A stage pulls items from a source iterator on its own thread, hands them to a
+pool of worker threads over a bounded queue and passes every result to a single
+sink running on the calling thread. Because both queues are bounded, a slow
+stage holds the faster ones back and memory use stays constant.
+"""
+
+import logging
+import queue
+import threading
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from utils.metrics import METRICS
+
+# Defaults
+DEFAULT_QUEUE_SIZE = 64
+
+_DONE = object()
+
+
+def run_stage(
+    source: Iterable[Any],
+    worker: Callable[[Any], Any],
+    sink: Callable[[Any, Any], None],
+    workers: int = 4,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+) -> None:
+    """Stream ``source`` through ``worker`` into ``sink``.
+
+    Args:
+        source: Items to process. Iterated on a dedicated producer thread.
+        worker: Function applied to every item on one of the worker threads.
+        sink: Called on the calling thread with ``(item, result)`` as results arrive.
+        workers: Number of worker threads.
+        queue_size: Capacity of the input and output queues.
+
+    Raises:
+        Exception: Re-raises any exception raised while iterating ``source``.
+    """
+    in_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    out_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    errors: list[BaseException] = []
+    stop = threading.Event()
+
+    def _produce() -> None:
+        try:
+            for item in source:
+                # Don't block forever if the sink side gave up
+                while not stop.is_set():
+                    try:
+                        in_queue.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+
+                if stop.is_set():
+                    break
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            for _ in range(workers):
+                in_queue.put(_DONE)
+
+    def _consume() -> None:
+        while (item := in_queue.get()) is not _DONE:
+            if stop.is_set():
+                continue
+
+            try:
+                result = worker(item)
+            except Exception as e:
+                logging.error(f"Error processing pipeline item: {e}")
+                result = None
+
+            out_queue.put((item, result))
+
+        out_queue.put(_DONE)
+
+    threads = [threading.Thread(target=_produce, name="pipeline-producer", daemon=True)]
+    threads += [
+        threading.Thread(target=_consume, name=f"pipeline-worker-{i}", daemon=True)
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        finished_workers = 0
+        while finished_workers < workers:
+            output = out_queue.get()
+            if output is _DONE:
+                finished_workers += 1
+                continue
+
+            METRICS.set("pipeline_queue_depth", in_queue.qsize(), queue="input")
+            METRICS.set("pipeline_queue_depth", out_queue.qsize(), queue="output")
+            sink(*output)
+    finally:
+        stop.set()
+        # Drain the output queue so no worker stays blocked on a full queue
+        while any(thread.is_alive() for thread in threads[1:]):
+            try:
+                out_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    if errors:
+        raise errors[0]
@@ -0,0 +1,261 @@
+"""Offline bulk re-parse of saved HTML pages.
+
+Re-extracts ``JobData`` from pages stored on disk, without touching the network,
+after a selector change. The source can be a directory or a zip/tar archive
+holding ``.html`` files or ``HTMLCache`` entries. Pages are dispatched in chunks
+to a ``ProcessPoolExecutor`` and the rows are written straight to parquet.
+
+Usage:
+    python -m module.reparse SOURCE OUTPUT [--workers N] [--chunk-size N] [--host HOST]
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import gzip
+import json
+import logging
+import os
+import pathlib
+import tarfile
+import time
+import zipfile
+from collections.abc import Iterator
+from dataclasses import asdict
+from functools import partial
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from selectolax.parser import HTMLParser
+
+from module.html_parser import JobData, get_parser_config, parser
+from module.output import JOB_DATA_SCHEMA
+
+# Defaults
+DEFAULT_CHUNK_SIZE = 256
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+HTML_SUFFIXES = (".html", ".htm", ".html.gz", ".htm.gz")
+CACHE_SUFFIX = ".json.gz"  # Entries written by ``HTMLCache``
+
+
+def _is_page(name: str) -> bool:
+    return name.lower().endswith(HTML_SUFFIXES + (CACHE_SUFFIX,))
+
+
+def list_pages(source: str | pathlib.Path) -> list[str]:
+    """List the page names in a directory or archive, sorted for stable output."""
+    source = pathlib.Path(source)
+    if source.is_dir():
+        names = [
+            str(path.relative_to(source))
+            for path in source.rglob("*")
+            if path.is_file() and _is_page(path.name)
+        ]
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            names = [name for name in archive.namelist() if _is_page(name)]
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source) as archive:
+            names = [
+                member.name
+                for member in archive.getmembers()
+                if member.isfile() and _is_page(member.name)
+            ]
+    else:
+        raise ValueError(f"{source} is neither a directory nor a zip/tar archive.")
+
+    return sorted(names)
+
+
+def _read_pages(source: pathlib.Path, names: list[str]) -> Iterator[tuple[str, bytes]]:
+    """Yield ``(name, raw bytes)`` for ``names`` from a directory or zip archive."""
+    if source.is_dir():
+        for name in names:
+            yield name, (source / name).read_bytes()
+    else:
+        with zipfile.ZipFile(source) as archive:
+            for name in names:
+                yield name, archive.read(name)
+
+
+def _iter_tar_chunks(
+    source: pathlib.Path,
+    chunk_size: int,
+) -> Iterator[list[tuple[str, bytes]]]:
+    """Read a tar archive front to back, yielding chunks of ``(name, raw bytes)``.
+
+    Compressed tar files can't be read at random offsets, so unlike directories
+    and zip files they are read once on the parent process.
+    """
+    chunk = []
+    with tarfile.open(source) as archive:
+        for member in archive:
+            if not member.isfile() or not _is_page(member.name):
+                continue
+
+            chunk.append((member.name, archive.extractfile(member).read()))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def _decode_page(name: str, data: bytes) -> tuple[str | None, str]:
+    """Return the URL, when it's known, and the HTML of a stored page."""
+    if name.lower().endswith(".gz"):
+        data = gzip.decompress(data)
+
+    if name.lower().endswith(CACHE_SUFFIX):
+        payload = json.loads(data)
+        return payload["url"], payload["text"]
+
+    html = data.decode("utf-8", errors="replace")
+    return page_url(html), html
+
+
+def page_url(html: str) -> str | None:
+    """Find the URL of a saved page from its canonical link or ``og:url``."""
+    tree = HTMLParser(html)
+    for selector, attribute in (
+        ('link[rel="canonical"]', "href"),
+        ('meta[property="og:url"]', "content"),
+    ):
+        node = tree.css_first(selector)
+        if node is not None and node.attributes.get(attribute):
+            return node.attributes[attribute].strip()
+
+    return None
+
+
+def _parse_pages(
+    pages: Iterator[tuple[str, bytes]],
+    host: str | None = None,
+) -> list[dict[str, str | None]]:
+    """Parse one chunk of pages. Runs in a worker process."""
+    parse_fn = get_parser_config()[host] if host is not None else None
+
+    rows = []
+    for name, data in pages:
+        try:
+            url, html = _decode_page(name, data)
+            url = url or name
+            # The parsers fetch the page when they get no HTML, which an
+            # offline re-parse must never do. Empty pages keep an empty row.
+            if not html.strip():
+                logging.warning(f"Skipping empty saved page {name}")
+                job_data = JobData(url=url)
+            elif parse_fn is not None:
+                job_data = parse_fn(url=url, response_text=html)
+            else:
+                job_data = parser(url=url, response_text=html)
+        except Exception as e:
+            logging.error(f"Error re-parsing {name}: {e}")
+            job_data = JobData(url=name)
+
+        rows.append(asdict(job_data))
+
+    return rows
+
+
+def _reparse_chunk(
+    source: str,
+    names: list[str],
+    host: str | None = None,
+) -> list[dict[str, str | None]]:
+    return _parse_pages(_read_pages(pathlib.Path(source), names), host=host)
+
+
+def _write_rows(writer: pq.ParquetWriter, rows: list[dict[str, str | None]]) -> int:
+    writer.write_table(pa.Table.from_pylist(rows, schema=JOB_DATA_SCHEMA))
+    return len(rows)
+
+
+def reparse(
+    source: str | pathlib.Path,
+    output: str | pathlib.Path,
+    workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    host: str | None = None,
+) -> int:
+    """Re-parse every saved page in ``source`` and write the rows to ``output``.
+
+    Args:
+        source: Directory or zip/tar archive with the saved pages.
+        output: Path of the parquet file to write.
+        workers: Number of worker processes. Defaults to the number of CPUs.
+        chunk_size: Number of pages sent to a worker at once.
+        host: Parse every page with the parser of this host instead of
+            resolving it from the page URL.
+
+    Returns:
+        The number of pages re-parsed.
+    """
+    source = pathlib.Path(source)
+    workers = workers or os.cpu_count() or 1
+
+    # Decrypt the host names once in the parent, the workers read the artifact
+    get_parser_config()
+
+    count = 0
+    with (
+        concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor,
+        pq.ParquetWriter(output, JOB_DATA_SCHEMA) as writer,
+    ):
+        if source.is_file() and not zipfile.is_zipfile(source):
+            if not tarfile.is_tarfile(source):
+                raise ValueError(
+                    f"{source} is neither a directory nor a zip/tar archive."
+                )
+            tasks = (
+                partial(_parse_pages, chunk, host=host)
+                for chunk in _iter_tar_chunks(source, chunk_size)
+            )
+        else:
+            names = list_pages(source)
+            logging.info(f"Re-parsing {len(names)} pages.")
+            tasks = (
+                partial(_reparse_chunk, str(source), names[i : i + chunk_size], host)
+                for i in range(0, len(names), chunk_size)
+            )
+
+        # Keep a bounded number of chunks in flight so memory stays flat, the
+        # chunks are written in order
+        in_flight: collections.deque[concurrent.futures.Future] = collections.deque()
+        for task in tasks:
+            in_flight.append(executor.submit(task))
+            if len(in_flight) >= workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                count += _write_rows(writer, in_flight.popleft().result())
+
+        while in_flight:
+            count += _write_rows(writer, in_flight.popleft().result())
+
+    return count
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Re-parse saved HTML pages into a parquet file."
+    )
+    arg_parser.add_argument("source", help="Directory or zip/tar archive of pages.")
+    arg_parser.add_argument("output", help="Parquet file to write.")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count())
+    arg_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    arg_parser.add_argument("--host", help="Parser host to use for every page.")
+    args = arg_parser.parse_args()
+
+    start_time = time.perf_counter()
+    count = reparse(
+        args.source,
+        args.output,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        host=args.host,
+    )
+    elapsed = time.perf_counter() - start_time
+    print(f"Re-parsed {count} pages in {elapsed:.1f} s ({count / elapsed:.0f} pages/s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""Rule-based extraction of the ``LLM_PROMPT`` columns, to skip the LLM when confident.
+
+Languages and technologies are found with a multi-pattern dictionary match over
+a curated lexicon. The text is tokenised once and every 1..n-gram of tokens is
+looked up, which finds all the aliases in a single linear pass like an
+Aho-Corasick automaton, without a compiled dependency. Section headings ("Requirements",
+"Nice to have", ...) and inline markers ("is a plus") decide whether a mention
+is required or nice to know.
+
+Mentions outside of a requirements section (no section, or e.g.
+"Responsibilities") are not counted as required, they are listed as nice to
+know. Aliases that are also common words or names ("Oracle", "Spark", "Swift")
+only count on a line that mentions another technology or language.
+
+Every result has a confidence score. Postings without recognisable sections,
+with mentions outside of them, or with very short descriptions score lower and
+are left to the LLM. The pipeline only uses the extractor when it is given a
+minimum confidence, ``DEFAULT_MIN_CONFIDENCE`` is the one the agreement was
+measured with.
+
+The agreement with stored LLM outputs can be measured with:
+    python -m module.rule_extractor SOURCE [--min-confidence 0.8]
+"""
+
+import argparse
+import datetime
+import json
+import pathlib
+import re
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any
+
+from module.output import to_bool, to_float, to_str_list
+
+# Defaults
+DEFAULT_MIN_CONFIDENCE = 0.8  # Results below this go to the LLM
+AMBIGUOUS_PENALTY = 0.15  # Per mention outside of a requirements section
+MAX_AMBIGUOUS_PENALTY = 0.4
+MIN_DESCRIPTION_CHARS = 300
+MAX_HEADING_CHARS = 80
+MAX_HEADING_WORDS = 6
+
+# Canonical name -> aliases, matched case-insensitively on token boundaries
+LANGUAGES: dict[str, tuple[str, ...]] = {
+    "Python": ("python", "python3"),
+    "SQL": ("sql", "t-sql", "tsql", "pl/sql", "plsql", "ansi sql"),
+    "Java": ("java",),
+    "Scala": ("scala",),
+    "Kotlin": ("kotlin",),
+    "C": ("c language", "c programming"),
+    "C++": ("c++", "cpp"),
+    "C#": ("c#", "csharp"),
+    "Go": ("golang", "go lang"),
+    "Rust": ("rust",),
+    "R": ("r language", "r programming", "rstudio"),
+    "JavaScript": ("javascript", "js", "node.js", "nodejs"),
+    "TypeScript": ("typescript",),
+    "Ruby": ("ruby",),
+    "PHP": ("php",),
+    "Bash": ("bash", "shell scripting", "shell script", "powershell"),
+    "Julia": ("julia language", "julialang"),
+    "MATLAB": ("matlab",),
+    "Perl": ("perl",),
+    "Swift": ("swift",),
+    "SAS": ("sas",),
+}
+TECHNOLOGIES: dict[str, tuple[str, ...]] = {
+    "Spark": ("spark", "apache spark", "pyspark", "spark sql"),
+    "Databricks": ("databricks",),
+    "dbt": ("dbt", "data build tool"),
+    "Airflow": ("airflow", "apache airflow"),
+    "Kafka": ("kafka", "apache kafka"),
+    "Flink": ("flink", "apache flink"),
+    "Hadoop": ("hadoop", "hdfs"),
+    "Hive": ("hive",),
+    "Snowflake": ("snowflake",),
+    "BigQuery": ("bigquery", "big query"),
+    "Redshift": ("redshift",),
+    "Synapse": ("synapse", "azure synapse"),
+    "Data Factory": ("data factory", "adf"),
+    "AWS": ("aws", "amazon web services"),
+    "Azure": ("azure", "microsoft azure"),
+    "GCP": ("gcp", "google cloud", "google cloud platform"),
+    "S3": ("s3",),
+    "Glue": ("aws glue",),
+    "Kinesis": ("kinesis",),
+    "Lambda": ("aws lambda",),
+    "Docker": ("docker",),
+    "Kubernetes": ("kubernetes", "k8s"),
+    "Terraform": ("terraform",),
+    "Git": ("git", "github", "gitlab"),
+    "CI/CD": ("ci/cd", "ci cd", "cicd"),
+    "Linux": ("linux",),
+    "PostgreSQL": ("postgresql", "postgres"),
+    "MySQL": ("mysql",),
+    "SQL Server": ("sql server", "mssql"),
+    "Oracle": ("oracle",),
+    "MongoDB": ("mongodb", "mongo"),
+    "Cassandra": ("cassandra",),
+    "Elasticsearch": ("elasticsearch", "elastic search"),
+    "Redis": ("redis",),
+    "Delta Lake": ("delta lake",),
+    "Iceberg": ("iceberg", "apache iceberg"),
+    "Parquet": ("parquet",),
+    "pandas": ("pandas",),
+    "NumPy": ("numpy",),
+    "scikit-learn": ("scikit-learn", "sklearn"),
+    "TensorFlow": ("tensorflow",),
+    "PyTorch": ("pytorch",),
+    "MLflow": ("mlflow",),
+    "Tableau": ("tableau",),
+    "Power BI": ("power bi", "powerbi"),
+    "Looker": ("looker",),
+    "Excel": ("ms excel", "microsoft excel", "advanced excel"),
+    "Jira": ("jira",),
+    "REST APIs": ("rest api", "rest apis", "restful"),
+    "FastAPI": ("fastapi",),
+    "Django": ("django",),
+    "Flask": ("flask",),
+}
+# Aliases that are also everyday words or company names
+GENERIC_ALIASES = ("oracle", "spark", "swift", "git", "adf", "hive", "rust")
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+# Headings, checked in this order ("preferred qualifications" is nice to have)
+_NICE_HEADING_RE = re.compile(
+    r"nice[- ]to[- ](have|know)|bonus|preferred|good[- ]to[- ]have|desirable|"
+    r"\bplus(es)?\b|advantage|additional skills|would be great"
+)
+_REQUIRED_HEADING_RE = re.compile(
+    r"requirement|required|qualifications|must[- ]haves?|who you are|your profile|"
+    r"skills|what (you|we)('ll)? (need|bring|expect|look for)|you (have|bring|should)|"
+    r"we('re| are) looking for|expectations|experience"
+)
+_NEUTRAL_HEADING_RE = re.compile(
+    r"responsibilit|what you('ll| will) do|your (role|tasks)|about (us|the)|benefits|"
+    r"we offer|perks|how to apply|tech stack|our stack|the role|duties"
+)
+# Inline markers of a single line, e.g. "Kafka is a plus"
+_NICE_INLINE_RE = re.compile(
+    r"nice[- ]to[- ]have|is a plus|are a plus|a big plus|bonus|preferred|"
+    r"good[- ]to[- ]have|desirable|advantage|familiarity with"
+)
+_MUST_RE = re.compile(r"\bmust\b")
+_EXPERIENCE_RE = re.compile(
+    r"(\d+(?:[.,]\d+)?)\s*(?:\+|plus)?\s*(?:(?:-|–|to)\s*\d+(?:[.,]\d+)?\s*\+?\s*)?(?:years?|yrs)\b"
+)
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class KeywordMatcher:
+    """Find every alias of a lexicon in a text in one pass over its tokens.
+
+    Args:
+        lexicons: Lexicon name -> canonical name -> aliases.
+        generic: Aliases that only count when the text has another match.
+    """
+
+    def __init__(
+        self,
+        lexicons: dict[str, dict[str, tuple[str, ...]]],
+        generic: Iterable[str] = (),
+    ):
+        # Alias tokens joined by spaces -> (lexicon, canonical name)
+        self._aliases: dict[str, tuple[str, str]] = {}
+        for lexicon, entries in lexicons.items():
+            for canonical, aliases in entries.items():
+                for alias in aliases:
+                    self._aliases[" ".join(_tokens(alias))] = (lexicon, canonical)
+        self.max_tokens = max(len(alias.split(" ")) for alias in self._aliases)
+        self._generic = {" ".join(_tokens(alias)) for alias in generic}
+
+    def find(self, text: str) -> Iterator[tuple[str, str]]:
+        """Yield ``(lexicon, canonical name)`` of every alias in ``text``, longest first."""
+        tokens = _tokens(text)
+        matches: list[tuple[tuple[str, str], bool]] = []
+        index = 0
+        while index < len(tokens):
+            for size in range(min(self.max_tokens, len(tokens) - index), 0, -1):
+                alias = " ".join(tokens[index : index + size])
+                match = self._aliases.get(alias)
+                if match is not None:
+                    matches.append((match, alias in self._generic))
+                    index += size
+                    break
+            else:
+                index += 1
+
+        # "Oracle is an equal opportunity employer" has no other technology
+        in_context = any(not generic for _, generic in matches)
+        for match, generic in matches:
+            if in_context or not generic:
+                yield match
+
+
+MATCHER = KeywordMatcher(
+    {"language": LANGUAGES, "technology": TECHNOLOGIES}, generic=GENERIC_ALIASES
+)
+
+
+def _heading_section(line: str) -> str | None:
+    """Section a heading line starts, None if the line isn't a heading."""
+    if len(line) > MAX_HEADING_CHARS or len(line.split()) > MAX_HEADING_WORDS:
+        return None
+
+    lowered = line.lower()
+    if _NICE_HEADING_RE.search(lowered):
+        return "nice"
+    if _NEUTRAL_HEADING_RE.search(lowered):
+        return "neutral"
+    if _REQUIRED_HEADING_RE.search(lowered):
+        return "required"
+
+    return None
+
+
+@dataclass
+class RuleResult:
+    output: dict[str, Any]  # The columns of ``LLM_OUTPUT_SCHEMA``
+    confidence: float
+
+
+def extract(description: str) -> RuleResult:
+    """Extract the ``LLM_PROMPT`` columns from a job description."""
+    # Mentions per section: required, nice, or ambiguous (no section or neutral)
+    found: dict[str, dict[tuple[str, str], None]] = {
+        "required": {},
+        "nice": {},
+        "ambiguous": {},
+    }
+    years: list[float] = []
+    section = None
+    sections_found = False
+
+    for raw_line in description.split("\n"):
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        heading = _heading_section(line)
+        if heading is not None and not any(MATCHER.find(line)):
+            section = heading
+            sections_found = True
+            continue
+
+        lowered = line.lower()
+        if _NICE_INLINE_RE.search(lowered):
+            line_section = "nice"
+        elif section == "required" or heading == "required" or _MUST_RE.search(lowered):
+            line_section = "required"
+        elif section == "nice":
+            line_section = "nice"
+        else:
+            line_section = "ambiguous"
+
+        for match in MATCHER.find(line):
+            found[line_section][match] = None
+
+        if line_section != "nice" and "experience" in lowered:
+            years += [
+                float(value.replace(",", "."))
+                for value in _EXPERIENCE_RE.findall(lowered)
+            ]
+
+    # A mention in the responsibilities or the company blurb isn't a requirement
+    required = found["required"]
+    nice = [
+        match
+        for match in {**found["nice"], **found["ambiguous"]}
+        if match not in required
+    ]
+    output = {
+        "python_required": ("language", "Python") in required,
+        "experience_required": min(years) if years else None,
+        "other_programming_languages": [
+            name for kind, name in required if kind == "language" and name != "Python"
+        ],
+        "required_technologies": [
+            name for kind, name in required if kind == "technology"
+        ],
+        "nice_to_know": [
+            f"{'Lang' if kind == 'language' else 'Tech'}: {name}" for kind, name in nice
+        ],
+    }
+
+    confidence = 1.0
+    if not sections_found:
+        confidence -= 0.3
+    confidence -= min(
+        MAX_AMBIGUOUS_PENALTY,
+        AMBIGUOUS_PENALTY * len(found["ambiguous"].keys() - required.keys()),
+    )
+    if len(description) < MIN_DESCRIPTION_CHARS:
+        confidence -= 0.3
+    if not required and not nice:
+        confidence -= 0.2
+
+    return RuleResult(output=output, confidence=round(max(confidence, 0.0), 3))
+
+
+def _normalize_list(values: Any) -> set[str]:
+    return {value.strip().lower() for value in to_str_list(values) or [] if value.strip()}
+
+
+def agreement(
+    rule_outputs: Iterable[dict[str, Any]],
+    llm_outputs: Iterable[dict[str, Any]],
+) -> dict[str, float]:
+    """How often the rule-based outputs agree with the LLM ones, per column.
+
+    ``python_required`` agrees when equal, ``experience_required`` when within
+    half a year (or both missing), and the list columns are scored with the
+    Jaccard similarity of their lowercased values (1 when both are empty).
+    """
+    totals = {
+        "python_required": 0.0,
+        "experience_required": 0.0,
+        "other_programming_languages": 0.0,
+        "required_technologies": 0.0,
+        "nice_to_know": 0.0,
+    }
+    count = 0
+    for rule_output, llm_output in zip(rule_outputs, llm_outputs):
+        count += 1
+        totals["python_required"] += bool(rule_output["python_required"]) == bool(
+            to_bool(llm_output.get("python_required"))
+        )
+        rule_years = rule_output["experience_required"]
+        llm_years = to_float(llm_output.get("experience_required"))
+        totals["experience_required"] += (
+            rule_years is None and llm_years is None
+        ) or (
+            rule_years is not None
+            and llm_years is not None
+            and abs(rule_years - llm_years) <= 0.5
+        )
+        for column in ("other_programming_languages", "required_technologies", "nice_to_know"):
+            rule_values = _normalize_list(rule_output[column])
+            llm_values = _normalize_list(llm_output.get(column))
+            union = rule_values | llm_values
+            totals[column] += len(rule_values & llm_values) / len(union) if union else 1.0
+
+    return {
+        "postings": count,
+        **{column: total / count if count else 0.0 for column, total in totals.items()},
+    }
+
+
+def main() -> None:
+    from module.analytics import load_postings
+
+    arg_parser = argparse.ArgumentParser(
+        description="Agreement of the rule-based extractor with stored LLM outputs."
+    )
+    arg_parser.add_argument(
+        "source", help="Processed parquet file, directory, or 'dataset'."
+    )
+    arg_parser.add_argument("--min-confidence", type=float, default=DEFAULT_MIN_CONFIDENCE)
+    arg_parser.add_argument("--since", type=datetime.date.fromisoformat)
+    arg_parser.add_argument("--until", type=datetime.date.fromisoformat)
+    args = arg_parser.parse_args()
+
+    source = args.source if args.source == "dataset" else pathlib.Path(args.source)
+    rows = [
+        row
+        for row in load_postings(source, since=args.since, until=args.until).to_pylist()
+        if isinstance(row.get("job_description"), str)
+        and row.get("python_required") is not None
+    ]
+
+    start_time = time.perf_counter()
+    results = [extract(row["job_description"]) for row in rows]
+    elapsed = time.perf_counter() - start_time
+
+    confident = [
+        (result.output, row)
+        for result, row in zip(results, rows)
+        if result.confidence >= args.min_confidence
+    ]
+    report = {
+        "postings_per_s": round(len(rows) / elapsed, 1) if elapsed else None,
+        "confident_share": round(len(confident) / len(rows), 3) if rows else 0.0,
+        "all": agreement((result.output for result in results), rows),
+        "confident": agreement(
+            (output for output, _ in confident), (row for _, row in confident)
+        ),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
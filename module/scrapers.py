@@ -1,47 +1,140 @@
+import functools
+import importlib.util
 import logging
+import threading
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
 
-import cloudscraper
-import httpx
-import requests
-from fake_useragent import UserAgent
-
-USER_AGENT = UserAgent().chrome
-CLIENT = httpx.Client(headers={"User-Agent": USER_AGENT})
-SCRAPER = cloudscraper.create_scraper(
-    # Challenge handling
-    interpreter="js2py",  # Best compatibility for v3 challenges
-    delay=5,  # Extra time for complex challenges
-    # Stealth mode
-    enable_stealth=True,
-    stealth_options={
-        "min_delay": 2.0,
-        "max_delay": 6.0,
-        "human_like_delays": True,
-        "randomize_headers": True,
-        "browser_quirks": True,
-    },
-    # Browser emulation
-    browser="firefox",
-    # Debug mode
-    debug=False,
-)
-
-
-def httpx_scrp(url, **kwargs) -> httpx.Response:
-    logging.debug(f"Making GET request to {url} with User-Agent: {USER_AGENT}")
-
-    # Setup headers with User-Agent
-    if kwargs.get("headers"):
-        logging.info("Custom headers provided, updating CLIENT headers.")
-        CLIENT.headers.update(kwargs.get("headers", {}))
+if TYPE_CHECKING:
+    import cloudscraper
+    import httpx
+    import requests
+
+# Defaults
+MAX_CONNECTIONS_PER_HOST = 8
+MAX_KEEPALIVE_PER_HOST = 4
+KEEPALIVE_EXPIRY = 30.0  # Seconds an idle connection is kept open
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None  # httpx[http2]
+
+# The clients are expensive to build (cloudscraper pulls in requests and js2py,
+# fake_useragent loads its browser database), so they are only created on first
+# use, and there is one per host so every site keeps its own connections and
+# cookies. ``USER_AGENT``, ``CLIENT`` and ``SCRAPER`` (the clients of the empty
+# host) stay importable through the module ``__getattr__``.
+_LAZY_ATTRIBUTES = {
+    "USER_AGENT": "get_user_agent",
+    "CLIENT": "get_client",
+    "SCRAPER": "get_scraper",
+}
+
+
+@functools.cache
+def get_user_agent() -> str:
+    from fake_useragent import UserAgent
+
+    return UserAgent().chrome
+
+
+_CLIENTS: dict[str, "httpx.Client"] = {}
+_SCRAPERS: dict[str, "cloudscraper.CloudScraper"] = {}
+_POOL_LOCK = threading.Lock()
+
+
+def _host(url: str) -> str:
+    return urlsplit(url.strip()).netloc.lower()
+
+
+def _pooled(pool: dict, host: str, factory: callable):
+    with _POOL_LOCK:
+        if host not in pool:
+            pool[host] = factory()
+
+        return pool[host]
+
+
+def _new_client() -> "httpx.Client":
+    import httpx
+
+    return httpx.Client(
+        headers={"User-Agent": get_user_agent()},
+        http2=HTTP2_AVAILABLE,
+        # Follow redirects like requests/cloudscraper do, job URLs often move.
+        # Per-request headers are sent again on every hop
+        follow_redirects=True,
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=MAX_KEEPALIVE_PER_HOST,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def _new_scraper() -> "cloudscraper.CloudScraper":
+    import cloudscraper
+
+    return cloudscraper.create_scraper(
+        # Challenge handling
+        interpreter="js2py",  # Best compatibility for v3 challenges
+        delay=5,  # Extra time for complex challenges
+        # Stealth mode
+        enable_stealth=True,
+        stealth_options={
+            "min_delay": 2.0,
+            "max_delay": 6.0,
+            "human_like_delays": True,
+            "randomize_headers": True,
+            "browser_quirks": True,
+        },
+        # Browser emulation
+        browser="firefox",
+        # Debug mode
+        debug=False,
+    )
+
+
+def get_client(host: str = "") -> "httpx.Client":
+    """The keep-alive httpx client of ``host``, HTTP/2 when ``h2`` is installed."""
+    return _pooled(_CLIENTS, host.lower(), _new_client)
+
+
+def get_scraper(host: str = "") -> "cloudscraper.CloudScraper":
+    """The cloudscraper session of ``host``."""
+    return _pooled(_SCRAPERS, host.lower(), _new_scraper)
+
+
+def close_clients() -> None:
+    """Close every pooled client and session."""
+    with _POOL_LOCK:
+        for session in [*_CLIENTS.values(), *_SCRAPERS.values()]:
+            session.close()
+        _CLIENTS.clear()
+        _SCRAPERS.clear()
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return globals()[_LAZY_ATTRIBUTES[name]]()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def httpx_scrp(url, headers: dict[str, str] | None = None, **kwargs) -> "httpx.Response":
+    """GET ``url`` with the pooled client of its host.
+
+    ``headers`` only apply to this request, they are merged over the client's
+    and never change it, so concurrent requests can't see each other's.
+    """
+    client = get_client(_host(url))
+    logging.debug(f"Making GET request to {url} with User-Agent: {get_user_agent()}")
 
     # Do the request using httpx
-    resp = CLIENT.get(url, **kwargs)
+    resp = client.get(url, headers=headers, **kwargs)
 
     return resp
 
 
-def cloud_scrp(url: str, **kwargs) -> requests.Response:
+def cloud_scrp(url: str, **kwargs) -> "requests.Response":
     logging.debug(f"Making CloudScraper GET request to {url}")
 
-    return SCRAPER.get(url, **kwargs)
+    # requests merges per-request headers over the session's without storing them
+    return get_scraper(_host(url)).get(url, **kwargs)
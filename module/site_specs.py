@@ -0,0 +1,85 @@
+"""Declarative extraction specs for job posting pages.
+
+A ``SiteSpec`` lists the fields of a site, each with ordered fallback selectors
+and post-processors. ``CompiledSpec`` prepares a spec once: all selectors are
+merged into a single grouped selector, so a page is traversed once and every
+match is assigned to the highest priority field selector it satisfies.
+
+Adding a host only takes a new ``SiteSpec``.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from selectolax.lexbor import LexborHTMLParser
+
+
+def strip_css_suffix(text: str) -> str:
+    """Drop inline CSS that leaks into the text, e.g. ``Company.css-1x2y{...}``."""
+    return text.split(".css-")[0]
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    selectors: tuple[str, ...]  # Ordered fallbacks, the first one that matches wins
+    separator: str = ""  # Separator between the text nodes of the element
+    post: tuple[Callable[[str], str], ...] = ()
+
+
+@dataclass(frozen=True)
+class SiteSpec:
+    name: str
+    fields: dict[str, FieldSpec] = field(default_factory=dict)
+
+
+class CompiledSpec:
+    """A ``SiteSpec`` prepared for single-pass extraction."""
+
+    def __init__(self, spec: SiteSpec):
+        self.spec = spec
+        # (field name, priority, selector) for every fallback of every field
+        self._candidates = [
+            (name, priority, selector)
+            for name, field_spec in spec.fields.items()
+            for priority, selector in enumerate(field_spec.selectors)
+        ]
+        self._field_count = len(spec.fields)
+        self._selector = ", ".join(
+            dict.fromkeys(selector for _, _, selector in self._candidates)
+        )
+
+    def extract(self, html: str) -> dict[str, str | None]:
+        """Extract every field of the spec from ``html``.
+
+        Fields without a matching element are None.
+        """
+        tree = LexborHTMLParser(html)
+
+        # Matches come back in document order, so the first match of a selector
+        # is the same element ``css_first`` would return
+        best: dict[str, tuple[int, object]] = {}
+        for node in tree.css(self._selector):
+            for name, priority, selector in self._candidates:
+                if name in best and best[name][0] <= priority:
+                    continue
+                if node.css_matches(selector):
+                    best[name] = (priority, node)
+
+            # Stop once every field has its preferred selector
+            if len(best) == self._field_count and not any(
+                priority for priority, _ in best.values()
+            ):
+                break
+
+        values: dict[str, str | None] = {}
+        for name, field_spec in self.spec.fields.items():
+            if name not in best:
+                values[name] = None
+                continue
+
+            text = best[name][1].text(strip=True, separator=field_spec.separator)
+            for post in field_spec.post:
+                text = post(text)
+            values[name] = text
+
+        return values
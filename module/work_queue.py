@@ -0,0 +1,289 @@
+"""Durable lease-based work queue in SQLite.
+
+Tasks live in ``tmp/queue/work_queue.sqlite3`` (WAL mode) so several worker
+processes can pull from the same queue. A task is
+
+- ``pending`` until a worker leases it,
+- ``leased`` while a worker holds it. A lease that isn't completed, failed or
+  extended within ``lease_seconds`` expires and the task can be leased again,
+  so work held by a crashed worker is not lost. Workers hold a ``heartbeat``
+  while they run a task, so a slow task keeps its lease;
+- ``done`` once completed. Completing is idempotent: the first result wins and
+  later completions of the same task (e.g. by a worker whose lease expired)
+  are ignored;
+- ``failed`` after ``max_attempts`` failed attempts. Failed attempts before that
+  put the task back to ``pending`` with an exponential backoff.
+
+Tasks are unique per ``(queue, key)``, enqueueing an existing key is a no-op.
+
+WAL mode needs all processes on the machine that holds the database file, so
+workers on other machines must not open it over a network file system.
+"""
+
+import contextlib
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from utils.metrics import METRICS
+from utils.paths import TMP_DIR
+
+# Defaults
+DEFAULT_QUEUE_PATH = TMP_DIR / "queue" / "work_queue.sqlite3"
+DEFAULT_LEASE_SECONDS = 10 * 60
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF = 30.0  # Seconds before the first retry, doubled on each one
+MAX_BACKOFF = 60 * 60
+BUSY_TIMEOUT = 30.0  # Seconds to wait for another process's write lock
+
+STATES = ("pending", "leased", "done", "failed")
+
+
+@dataclass
+class Task:
+    id: int
+    queue: str
+    key: str
+    payload: dict[str, Any]
+    attempts: int
+    owner: str
+
+
+class WorkQueue:
+    """SQLite backed task queue shared by processes on one machine.
+
+    Args:
+        path: Database file.
+        lease_seconds: Time a worker has to finish a task before it is handed out again.
+        max_attempts: Attempts before a task is marked ``failed``.
+        backoff: Delay before the first retry, doubled for every further one.
+    """
+
+    def __init__(
+        self,
+        path: str | pathlib.Path = DEFAULT_QUEUE_PATH,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        backoff: float = DEFAULT_BACKOFF,
+    ):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+
+        self._lock = threading.Lock()
+        # Transactions are explicit, BEGIN IMMEDIATE takes the write lock up
+        # front so two processes can't lease the same task
+        self._conn = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY,
+                queue TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL,
+                lease_owner TEXT,
+                lease_expires REAL,
+                result TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                UNIQUE (queue, key)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (queue, state, available_at)"
+        )
+
+    def enqueue(self, queue: str, key: str, payload: dict[str, Any]) -> bool:
+        """Add a task. Returns False if ``key`` is already in ``queue``."""
+        return self.enqueue_many(queue, [(key, payload)]) == 1
+
+    def enqueue_many(self, queue: str, tasks: Iterable[tuple[str, dict]]) -> int:
+        """Add ``(key, payload)`` pairs in one transaction. Returns the number added."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                added = 0
+                for key, payload in tasks:
+                    cursor = self._conn.execute(
+                        "INSERT OR IGNORE INTO tasks (queue, key, payload, available_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                        (queue, key, json.dumps(payload, default=str), now, now),
+                    )
+                    added += cursor.rowcount
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        METRICS.inc("queue_enqueued_total", added, queue=queue)
+        return added
+
+    def lease(self, queue: str, owner: str, limit: int = 1) -> list[Task]:
+        """Lease up to ``limit`` pending tasks or tasks whose lease expired."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Tasks whose worker keeps dying with them don't come back forever
+                self._conn.execute(
+                    "UPDATE tasks SET state = 'failed', error = 'Lease expired', lease_owner = NULL, lease_expires = NULL, updated_at = ? WHERE queue = ? AND state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                    (now, queue, now, self.max_attempts),
+                )
+                rows = self._conn.execute(
+                    """
+                    SELECT id, key, payload, attempts FROM tasks
+                    WHERE queue = ? AND (
+                        (state = 'pending' AND available_at <= ?)
+                        OR (state = 'leased' AND lease_expires < ?)
+                    )
+                    ORDER BY available_at, id
+                    LIMIT ?
+                    """,
+                    (queue, now, now, limit),
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE tasks SET state = 'leased', attempts = attempts + 1, lease_owner = ?, lease_expires = ?, updated_at = ? WHERE id = ?",
+                    [(owner, now + self.lease_seconds, now, row[0]) for row in rows],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        METRICS.inc("queue_leased_total", len(rows), queue=queue)
+        return [
+            Task(
+                id=id_,
+                queue=queue,
+                key=key,
+                payload=json.loads(payload),
+                attempts=attempts + 1,
+                owner=owner,
+            )
+            for id_, key, payload, attempts in rows
+        ]
+
+    def extend(self, task: Task) -> bool:
+        """Renew the lease of a long running task. False if it was lost."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE tasks SET lease_expires = ?, updated_at = ? WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                (now + self.lease_seconds, now, task.id, task.owner),
+            )
+            return cursor.rowcount == 1
+
+    @contextlib.contextmanager
+    def heartbeat(
+        self, tasks: Sequence[Task], interval: float | None = None
+    ) -> Iterator[None]:
+        """Extend the leases of ``tasks`` in a background thread while the block runs.
+
+        Args:
+            tasks: Leased tasks. Done or lost ones are skipped by ``extend``.
+            interval: Seconds between renewals. Defaults to a third of ``lease_seconds``.
+        """
+        interval = interval if interval is not None else self.lease_seconds / 3
+        stop = threading.Event()
+
+        def _beat() -> None:
+            while not stop.wait(interval):
+                for task in tasks:
+                    self.extend(task)
+
+        thread = threading.Thread(target=_beat, name="queue-heartbeat", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, task: Task, result: dict[str, Any] | None = None) -> bool:
+        """Mark ``task`` done. False (and the result dropped) if it already was."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE tasks SET state = 'done', result = ?, lease_owner = NULL, lease_expires = NULL, error = NULL, updated_at = ? WHERE id = ? AND state != 'done'",
+                (json.dumps(result, default=str), time.time(), task.id),
+            )
+            completed = cursor.rowcount == 1
+
+        METRICS.inc(
+            "queue_completed_total",
+            queue=task.queue,
+            result="done" if completed else "duplicate",
+        )
+        return completed
+
+    def fail(self, task: Task, error: str) -> str | None:
+        """Give ``task`` back after a failed attempt.
+
+        Returns:
+            The new state, ``pending`` (retried after a backoff) or ``failed``,
+            None if the lease had already been lost.
+        """
+        now = time.time()
+        state = "failed" if task.attempts >= self.max_attempts else "pending"
+        delay = min(MAX_BACKOFF, self.backoff * 2 ** (task.attempts - 1))
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE tasks SET state = ?, available_at = ?, lease_owner = NULL, lease_expires = NULL, error = ?, updated_at = ? WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                (state, now + delay, error, now, task.id, task.owner),
+            )
+            if cursor.rowcount != 1:
+                return None
+
+        METRICS.inc("queue_failed_total", queue=task.queue, state=state)
+        return state
+
+    def counts(self, queue: str) -> dict[str, int]:
+        """Number of tasks in ``queue`` per state."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) FROM tasks WHERE queue = ? GROUP BY state",
+                (queue,),
+            ).fetchall()
+
+        return {state: 0 for state in STATES} | dict(rows)
+
+    def results(self, queue: str) -> dict[str, dict[str, Any]]:
+        """Result of every done task of ``queue``, by key."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, result FROM tasks WHERE queue = ? AND state = 'done' ORDER BY id",
+                (queue,),
+            ).fetchall()
+
+        return {key: json.loads(result) for key, result in rows}
+
+    def keys(self, queue: str, state: str) -> list[str]:
+        """Keys of the tasks of ``queue`` in ``state``."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM tasks WHERE queue = ? AND state = ? ORDER BY id",
+                (queue, state),
+            ).fetchall()
+
+        return [key for (key,) in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
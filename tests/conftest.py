@@ -0,0 +1,8 @@
+"""
+Shared test setup: the pipeline's data directory points to a throwaway directory."""
+
+import os
+import tempfile
+
+# Set before anything imports utils.paths, main refuses to import without it
+os.environ.setdefault("JOBS_TMP_DIR", tempfile.mkdtemp(prefix="jobs-tests-"))
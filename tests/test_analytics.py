@@ -0,0 +1,60 @@
+"""
+Tests for the skills analytics in module.analytics."""
+
+import pyarrow as pa
+
+from module.analytics import (
+    co_occurrence,
+    experience_distribution,
+    python_required_share,
+    technology_frequency,
+)
+
+TABLE = pa.table(
+    {
+        "job_posting_company": ["A", "A", "B", "B"],
+        "python_required": [True, False, True, None],
+        "experience_required": [1.0, 3.0, None, 12.0],
+        "required_technologies": [
+            ["Spark", "dbt", "Spark"],
+            ["Spark", " "],
+            ["dbt"],
+            None,
+        ],
+    }
+)
+
+
+def test_technology_frequency():
+    frequency = technology_frequency(TABLE)
+
+    assert frequency.column("value").to_pylist() == ["Spark", "dbt"]
+    assert frequency.column("postings").to_pylist() == [2, 2]
+    assert frequency.column("share").to_pylist() == [0.5, 0.5]
+
+
+def test_co_occurrence():
+    labels, matrix = co_occurrence(TABLE, top=2)
+
+    assert labels == ["Spark", "dbt"]
+    assert matrix.tolist() == [[2, 1], [1, 2]]
+
+
+def test_python_required_share():
+    share = python_required_share(TABLE)
+
+    assert share.to_pylist() == [
+        {"job_posting_company": "B", "postings": 1, "python_required": 1, "share": 1.0},
+        {"job_posting_company": "A", "postings": 2, "python_required": 1, "share": 0.5},
+    ]
+
+
+def test_experience_distribution():
+    histogram, stats = experience_distribution(TABLE, bins=(0, 2, float("inf")))
+
+    assert histogram.to_pylist() == [
+        {"bucket": "0-2", "postings": 1},
+        {"bucket": "2+", "postings": 2},
+    ]
+    assert stats["postings"] == 3
+    assert stats["median"] == 3.0
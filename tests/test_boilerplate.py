@@ -0,0 +1,61 @@
+"""
+Tests for the boilerplate stripping in module.boilerplate."""
+
+from module.boilerplate import BoilerplateIndex, paragraph_hash
+
+BLURB = "Acme builds the data platform behind thousands of happy customers worldwide."
+EEO = "We are an equal opportunity employer and value diversity at our company, always."
+
+
+def _posting(company: str, index: int, *paragraphs: str) -> dict[str, str]:
+    return {
+        "url": f"https://www.board.test/jobs/{company}/{index}",
+        "job_posting_company": company,
+        "job_description": "\n".join(
+            [f"Data Engineer role number {index}", *paragraphs]
+        ),
+    }
+
+
+def test_paragraph_hash_normalizes():
+    assert paragraph_hash("- Great  Benefits!") == paragraph_hash("great benefits!")
+
+
+def test_strip_company_and_host_boilerplate():
+    requirement = "You need 3+ years of experience with Spark, shared by every posting here."
+    records = [_posting("acme", i, BLURB, requirement) for i in range(3)]
+    records += [_posting(f"company {i}", i, EEO) for i in range(5)]
+    index = BoilerplateIndex().fit(records)
+
+    stripped = index.strip(records[0]["job_description"], "Acme", records[0]["url"])
+    assert stripped == f"Data Engineer role number 0\n{requirement}"
+
+    # Shared by 5 companies of the same host
+    assert index.strip(records[3]["job_description"], "company 0", records[3]["url"]) == (
+        "Data Engineer role number 0"
+    )
+    # Too rare for a company with a single posting on another host
+    other = _posting("globex", 0, BLURB)
+    assert index.strip(other["job_description"], "globex", "https://other.test/1") == (
+        other["job_description"]
+    )
+
+    assert index.stats.postings == 3
+    assert index.stats.paragraphs_dropped == 2
+    assert index.stats.tokens_saved > 0
+
+
+def test_rolling_window_forgets_old_postings():
+    index = BoilerplateIndex(max_postings=3)
+    records = [_posting("acme", i, BLURB) for i in range(3)]
+    index.fit(records)
+    assert index.is_boilerplate(BLURB, "acme", records[0]["url"])
+
+    # Older postings leave the window, the blurb is no longer common enough
+    index.fit(_posting("acme", i, EEO) for i in range(3, 5))
+    assert not index.is_boilerplate(BLURB, "acme", records[0]["url"])
+    assert len(index._seen) == 3 and len(index._window) == 3
+
+    # Every count is gone once all its postings are forgotten
+    index.fit(_posting("globex", i, EEO) for i in range(3))
+    assert not any(company == "acme" for company, _ in index._company_counts)
@@ -0,0 +1,46 @@
+"""
+Tests for the adaptive concurrency limiter in utils.concurrency."""
+
+import pytest
+
+from utils.concurrency import AdaptiveLimiter, is_overload_status
+
+
+def test_limiter_additive_increase():
+    limiter = AdaptiveLimiter(initial_limit=2, max_limit=4)
+
+    for _ in range(20):
+        with limiter.slot():
+            pass
+
+    assert limiter.limit == 4
+    assert limiter.stats() == {"limit": 4, "in_flight": 0, "queue_depth": 0}
+
+
+def test_limiter_multiplicative_decrease():
+    limiter = AdaptiveLimiter(initial_limit=8, min_limit=1, max_limit=16)
+
+    with pytest.raises(RuntimeError):
+        with limiter.slot():
+            raise RuntimeError("request failed")
+
+    assert limiter.limit == 4
+
+
+def test_limiter_backs_off_once_per_round_trip():
+    limiter = AdaptiveLimiter(initial_limit=8, min_limit=1, max_limit=16)
+
+    # Two requests that were in flight together fail one after the other
+    limiter.acquire()
+    limiter.acquire()
+    limiter.release(latency=10, success=False)
+    limiter.release(latency=10, success=False)
+
+    assert limiter.limit == 4
+
+
+def test_is_overload_status():
+    assert is_overload_status(429)
+    assert is_overload_status(503)
+    assert not is_overload_status(200)
+    assert not is_overload_status(404)
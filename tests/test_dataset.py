@@ -0,0 +1,137 @@
+"""
+Tests for the partitioned output dataset in module.dataset."""
+
+import datetime
+
+import pyarrow.dataset as ds
+
+from module.dataset import PartitionedWriter, query, source_host
+
+
+def _write(root, scrape_date, rows):
+    with PartitionedWriter("processed", root=root, scrape_date=scrape_date) as writer:
+        writer.write_many(rows)
+
+
+def test_source_host():
+    assert source_host("https://www.Example.com/jobs/1") == "example.com"
+    assert source_host(None) == "unknown"
+
+
+def test_query(tmp_path):
+    _write(
+        tmp_path,
+        datetime.date(2026, 1, 5),
+        [
+            {"url": "https://a.test/1", "python_required": True},
+            {"url": "https://b.test/1", "python_required": True},
+        ],
+    )
+    _write(
+        tmp_path,
+        datetime.date(2026, 2, 5),
+        [
+            {"url": "https://a.test/2", "python_required": True},
+            {"url": "https://a.test/3", "python_required": False},
+        ],
+    )
+
+    assert len(list((tmp_path / "processed").glob("*/*/*.parquet"))) == 3
+
+    table = query(
+        columns=["url", "scrape_date"],
+        filter=ds.field("python_required") == True,  # noqa: E712
+        hosts=["a.test"],
+        since=datetime.date(2026, 2, 1),
+        root=tmp_path,
+    )
+    assert table.column_names == ["url", "scrape_date"]
+    assert table.column("url").to_pylist() == ["https://a.test/2"]
+    assert len(query(until=datetime.date(2026, 1, 31), root=tmp_path)) == 2
+
+
+def test_rows_go_to_their_scrape_date(tmp_path):
+    rows = [
+        {"url": "https://a.test/1", "scraped_at": "2026-01-05T23:10:00+01:00"},
+        {"url": "https://a.test/2", "scraped_at": "2026-01-06T08:00:00+01:00"},
+        {"url": "https://a.test/3"},
+    ]
+    _write(tmp_path, datetime.date(2026, 3, 1), rows)
+
+    table = query(columns=["url", "scrape_date"], root=tmp_path).sort_by("url")
+    assert table.column("scrape_date").to_pylist() == [
+        datetime.date(2026, 1, 5),
+        datetime.date(2026, 1, 6),
+        datetime.date(2026, 3, 1),
+    ]
+
+
+def test_rerun_replaces_earlier_rows(tmp_path):
+    scrape_date = datetime.date(2026, 1, 5)
+    _write(
+        tmp_path,
+        scrape_date,
+        [
+            {"url": "https://a.test/1", "python_required": False},
+            {"url": "https://a.test/2", "python_required": False},
+        ],
+    )
+    # A rerun, or a journal replay, writes some of the same URLs again
+    _write(tmp_path, scrape_date, [{"url": "https://a.test/1", "python_required": True}])
+    _write(tmp_path, scrape_date, [{"url": "https://a.test/2", "python_required": True}])
+
+    table = query(columns=["url", "python_required"], root=tmp_path).sort_by("url")
+    assert table.to_pylist() == [
+        {"url": "https://a.test/1", "python_required": True},
+        {"url": "https://a.test/2", "python_required": True},
+    ]
+    # Filters apply to the current rows, not to the replaced ones
+    not_required = ds.field("python_required") == False  # noqa: E712
+    assert len(query(filter=not_required, root=tmp_path)) == 0
+    # The earlier part files are left untouched
+    assert len(list((tmp_path / "processed").glob("*/*/*.parquet"))) == 3
+
+
+def test_rerun_without_data_keeps_earlier_rows(tmp_path):
+    scrape_date = datetime.date(2026, 1, 5)
+    _write(
+        tmp_path,
+        scrape_date,
+        [
+            {
+                "url": "https://a.test/1",
+                "job_description": "Python",
+                "python_required": True,
+            },
+            {
+                "url": "https://a.test/2",
+                "job_description": "Java",
+                "python_required": False,
+            },
+        ],
+    )
+    # A failed scrape, and a scrape whose LLM call came back empty
+    _write(
+        tmp_path,
+        scrape_date,
+        [
+            {"url": "https://a.test/1"},
+            {"url": "https://a.test/2", "job_description": "Java and Python"},
+        ],
+    )
+
+    table = query(
+        columns=["url", "job_description", "python_required"], root=tmp_path
+    ).sort_by("url")
+    assert table.to_pylist() == [
+        {
+            "url": "https://a.test/1",
+            "job_description": "Python",
+            "python_required": True,
+        },
+        {
+            "url": "https://a.test/2",
+            "job_description": "Java",
+            "python_required": False,
+        },
+    ]
@@ -0,0 +1,28 @@
+"""
+Tests for the near-duplicate detection in module.dedup."""
+
+import pytest
+
+from module.dedup import find_near_duplicates
+
+BASE = " ".join(f"word{i}" for i in range(200))
+
+
+def test_find_near_duplicates():
+    texts = [
+        BASE,
+        " ".join(f"other{i}" for i in range(200)),
+        BASE + " apply now",
+        None,
+        BASE,
+    ]
+
+    assert find_near_duplicates(texts, threshold=0.8) == [0, 1, 0, 3, 0]
+
+
+def test_find_near_duplicates_threshold():
+    half = " ".join(f"word{i}" for i in range(100)) + " " + " ".join(
+        f"new{i}" for i in range(100)
+    )
+
+    assert find_near_duplicates([BASE, half], threshold=0.9) == [0, 1]
@@ -0,0 +1,78 @@
+"""
+Tests for the tiered fetching in module.fetch."""
+
+from module.fetch import TieredFetcher, is_challenge
+
+
+class Response:
+    def __init__(self, status_code=200, text="<html>job</html>", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+CHALLENGE = Response(403, "<html><title>Just a moment...</title></html>")
+
+
+def test_is_challenge():
+    assert not is_challenge(Response())
+    assert not is_challenge(Response(404, "Not found"))
+    assert is_challenge(CHALLENGE)
+    assert is_challenge(Response(503, ""))
+    assert is_challenge(Response(200, "", {"cf-mitigated": "challenge"}))
+    assert not is_challenge(Response(304, ""))
+    assert not is_challenge(Response(410, "Gone"))
+    # LinkedIn's block status and a redirect the tier did not follow
+    assert is_challenge(Response(999, ""))
+    assert is_challenge(Response(301, "", {"Location": "/jobs/1"}))
+
+
+def test_tiered_fetcher_escalates_and_remembers():
+    calls = []
+
+    def cheap(url, **kwargs):
+        calls.append("cheap")
+        return CHALLENGE if "blocked" in url else Response()
+
+    def heavy(url, **kwargs):
+        calls.append("heavy")
+        return Response()
+
+    fetcher = TieredFetcher(tiers=(("cheap", cheap), ("heavy", heavy)))
+
+    assert fetcher("https://open.test/1").status_code == 200
+    assert fetcher("https://blocked.test/1").status_code == 200
+    assert calls == ["cheap", "cheap", "heavy"]
+
+    # The blocked host now goes straight to the tier that worked
+    calls.clear()
+    fetcher("https://blocked.test/2")
+    fetcher("https://open.test/2")
+    assert calls == ["heavy", "cheap"]
+
+
+def test_tiered_fetcher_retries_cheap_tier():
+    def cheap(url, **kwargs):
+        raise ConnectionError("reset")
+
+    fetcher = TieredFetcher(
+        tiers=(("cheap", cheap), ("heavy", lambda url, **kwargs: Response())),
+        retry_after=-1,
+    )
+    fetcher("https://host.test/1")
+    assert fetcher.tier_for("host.test") == 0
+
+
+def test_tiered_fetcher_escalates_redirects_and_999():
+    def cheap(url, **kwargs):
+        if "moved" in url:
+            return Response(301, "", {"Location": "/jobs/1"})
+        return Response(999, "")
+
+    fetcher = TieredFetcher(
+        tiers=(("cheap", cheap), ("heavy", lambda url, **kwargs: Response()))
+    )
+
+    for url in ("https://moved.test/1", "https://blocked.test/1"):
+        assert fetcher(url).status_code == 200
+        assert fetcher.tier_for(url.split("/")[2]) == 1
@@ -0,0 +1,58 @@
+"""
+Tests for the on-disk raw HTML cache in module.html_cache."""
+
+import time
+
+import pytest
+
+from module.html_cache import HTMLCache, normalize_url
+
+
+def test_normalize_url():
+    assert normalize_url(
+        "HTTPS://Example.com/jobs/view/123/?utm_source=x&b=2&a=1#top"
+    ) == normalize_url("https://example.com/jobs/view/123?a=1&b=2")
+
+
+def test_cache_roundtrip(tmp_path):
+    cache = HTMLCache(cache_dir=tmp_path)
+    url = "https://example.com/jobs/view/123"
+
+    assert cache.get(url) is None
+    cache.put(url, "<html>job</html>")
+    assert cache.get(url + "?utm_medium=mail") == "<html>job</html>"
+
+
+def test_cache_ttl(tmp_path):
+    cache = HTMLCache(cache_dir=tmp_path, ttl=60)
+    url = "https://example.com/jobs/view/123"
+    cache.put(url, "<html>old</html>", fetched_at=time.time() - 120)
+
+    assert cache.get(url) is None
+    assert cache.get_page(url, allow_expired=True).text == "<html>old</html>"
+
+
+def test_cache_lru_eviction(tmp_path):
+    cache = HTMLCache(cache_dir=tmp_path, max_size_mb=0.00025)
+
+    cache.put("https://example.com/1", "a" * 200)
+    time.sleep(0.01)
+    cache.put("https://example.com/2", "b" * 200)
+    time.sleep(0.01)
+    cache.get("https://example.com/1")
+    time.sleep(0.01)
+    cache.put("https://example.com/3", "c" * 200)
+
+    assert cache.get("https://example.com/1") is not None
+    assert cache.get("https://example.com/2") is None
+    assert cache.get("https://example.com/3") is not None
+
+
+def test_cache_validators(tmp_path):
+    cache = HTMLCache(cache_dir=tmp_path, ttl=60)
+    url = "https://example.com/jobs/view/123"
+    cache.put(url, "<html>job</html>", fetched_at=time.time() - 120, etag='"abc"')
+
+    page = cache.get_page(url, allow_expired=True)
+    assert not cache.is_fresh(page)
+    assert page.conditional_headers() == {"If-None-Match": '"abc"'}
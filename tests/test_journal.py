@@ -0,0 +1,39 @@
+"""
+Tests for the append-only pipeline journal in module.journal."""
+
+import pytest
+
+from module.journal import Journal, fingerprint
+
+
+def test_journal_replay(tmp_path):
+    journal = Journal(stage="extract", journal_dir=tmp_path)
+    journal.append(url="https://example.com/1", data={"a": 1}, fingerprint="x")
+    journal.append(url="https://example.com/2 ", data={"a": 2})
+    journal.append(url="https://example.com/1", data={"a": 3}, fingerprint="y")
+    journal.close()
+
+    entries = Journal(stage="extract", journal_dir=tmp_path).load()
+
+    assert set(entries) == {"https://example.com/1", "https://example.com/2"}
+    assert entries["https://example.com/1"]["data"] == {"a": 3}
+    assert entries["https://example.com/1"]["fingerprint"] == "y"
+
+
+def test_journal_truncated_line(tmp_path):
+    journal = Journal(stage="scrape", journal_dir=tmp_path)
+    journal.append(url="https://example.com/1", data={"a": 1})
+    journal.close()
+    with open(journal.path, "a") as f:
+        f.write('{"url": "https://exa')
+
+    assert list(journal.load()) == ["https://example.com/1"]
+
+
+def test_journal_reset(tmp_path):
+    journal = Journal(stage="scrape", journal_dir=tmp_path)
+    journal.append(url="https://example.com/1", data={})
+    journal.reset()
+
+    assert journal.load() == {}
+    assert fingerprint("a") == fingerprint("a") != fingerprint("b")
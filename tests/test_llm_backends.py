@@ -0,0 +1,120 @@
+"""
+Tests for the LLM backend pool in module.llm_backends, against local fake servers."""
+
+import json
+import threading
+
+from benchmarks.servers import FakeLLMServer
+from module.llm_backends import Backend, BackendPool, load_backend_pool
+from module.llm_processing import request_llm_response
+
+
+def test_pool_routes_to_least_loaded_backend():
+    pool = BackendPool(
+        [
+            Backend("http://a.test", max_concurrency=2, initial_concurrency=2),
+            Backend("http://b.test", max_concurrency=4, initial_concurrency=4),
+        ],
+        health_interval=None,
+    )
+    held = [pool.acquire() for _ in range(6)]
+
+    # Filled in proportion to the limits, a 7th caller would have to wait
+    assert [backend.name for backend in held].count("a.test") == 2
+    assert [backend.name for backend in held].count("b.test") == 4
+    assert pool.in_flight == 6
+
+    for backend in held:
+        pool.release(backend, 0.1)
+    assert pool.in_flight == 0
+
+
+def test_pool_waits_for_a_free_slot():
+    pool = BackendPool(
+        [Backend("http://a.test", max_concurrency=1, initial_concurrency=1)],
+        health_interval=None,
+    )
+    backend = pool.acquire()
+    acquired = threading.Event()
+
+    def _waiter():
+        pool.release(pool.acquire(), 0.1)
+        acquired.set()
+
+    threading.Thread(target=_waiter, daemon=True).start()
+    assert not acquired.wait(0.1)
+    assert pool.queue_depth == 1
+
+    pool.release(backend, 0.1)
+    assert acquired.wait(2)
+
+
+def test_request_llm_response_spreads_and_ejects():
+    with FakeLLMServer() as first, FakeLLMServer() as second:
+        pool = BackendPool(
+            [Backend(first.url), Backend(second.url)],
+            eject_after=2,
+            health_interval=None,
+        )
+        threads = [
+            threading.Thread(
+                target=request_llm_response,
+                args=("m", "p", "Python"),
+                kwargs={"pool": pool},
+            )
+            for _ in range(16)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert first.requests > 0 and second.requests > 0
+        assert first.requests + second.requests == 16
+
+        first.failing = True
+        statuses = [
+            request_llm_response("m", "p", "x", pool=pool).status_code
+            for _ in range(6)
+        ]
+        assert not pool.backends[0].is_healthy()
+        # Only the failures before the ejection reached the failing server
+        assert statuses.count(503) == 2
+        assert statuses.count(200) == 4
+
+        first_name, second_name = (backend.name for backend in pool.backends)
+        assert pool.check_health() == {first_name: False, second_name: True}
+        first.failing = False
+        pool.check_health()
+        assert pool.backends[0].is_healthy()
+        response = request_llm_response("m", "p", "Python", pool=pool)
+        assert json.loads(response.json()["output"][1]["content"])["python_required"]
+        pool.close()
+
+
+def test_load_backend_pool(monkeypatch, tmp_path):
+    monkeypatch.delenv("LLM_BACKENDS_FILE", raising=False)
+    monkeypatch.delenv("LLM_BACKENDS", raising=False)
+    assert [b.url for b in load_backend_pool("http://default:1234").backends] == [
+        "http://default:1234"
+    ]
+
+    monkeypatch.setenv("LLM_BACKENDS", "http://a:1234|8, http://b:1234")
+    pool = load_backend_pool("http://default:1234")
+    assert [(b.url, b.limiter.max_limit) for b in pool.backends] == [
+        ("http://a:1234", 8),
+        ("http://b:1234", 32),
+    ]
+
+    config = tmp_path / "backends.json"
+    config.write_text(
+        json.dumps(
+            {
+                "backends": [{"url": "http://c:1234", "max_concurrency": 2}],
+                "eject_seconds": 5,
+            }
+        )
+    )
+    monkeypatch.setenv("LLM_BACKENDS_FILE", str(config))
+    pool = load_backend_pool("http://default:1234")
+    assert [b.name for b in pool.backends] == ["c:1234"]
+    assert pool.max_limit == 2 and pool.eject_seconds == 5
@@ -0,0 +1,32 @@
+"""
+Tests for the batched LLM request helpers in module.llm_batching."""
+
+import json
+
+import pytest
+
+from module.llm_batching import build_batch_message, plan_batches, split_batch_response
+
+
+def test_plan_batches():
+    texts = ["a" * 400, "b" * 400, "c" * 4000, "d" * 40]
+
+    assert plan_batches(texts, token_budget=250) == [[0, 1], [2], [3]]
+    assert plan_batches(texts, token_budget=10000, max_batch_size=2) == [[0, 1], [2, 3]]
+
+
+def test_build_batch_message():
+    message, ids = build_batch_message(["first", "second"])
+
+    assert ids == ["1", "2"]
+    assert json.loads(message) == {"1": "first", "2": "second"}
+
+
+def test_split_batch_response():
+    content = json.dumps({"1": {"python_required": True}, "2": "not an object"})
+
+    assert split_batch_response(content, ["1", "2", "3"]) == {
+        "1": {"python_required": True}
+    }
+    assert split_batch_response("not json", ["1"]) == {}
+    assert split_batch_response("[1, 2]", ["1"]) == {}
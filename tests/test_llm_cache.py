@@ -0,0 +1,27 @@
+"""
+Tests for the LLM extraction result cache in module.llm_cache."""
+
+import pytest
+
+from module.llm_cache import LLMCache, cache_key
+
+
+def test_cache_key():
+    key = cache_key(model="m", prompt="p", message="desc", reasoning="high")
+
+    assert key == cache_key(model="m", prompt="p", message="desc", reasoning="high")
+    assert key != cache_key(model="m", prompt="p", message="desc", reasoning="low")
+    assert key != cache_key(model="m", prompt="p2", message="desc", reasoning="high")
+
+
+def test_cache_roundtrip(tmp_path):
+    cache = LLMCache(path=tmp_path / "llm.sqlite3")
+    key = cache_key(model="m", prompt="p", message="desc")
+
+    assert cache.get(key) is None
+    cache.put(key, model="m", result={"python_required": True})
+    cache.close()
+
+    cache = LLMCache(path=tmp_path / "llm.sqlite3")
+    assert cache.get(key) == {"python_required": True}
+    assert cache.stats == {"hits": 1, "misses": 0}
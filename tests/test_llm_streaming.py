@@ -0,0 +1,121 @@
+"""
+Tests for the streaming LLM requests in module.llm_streaming."""
+
+import json
+import threading
+import time
+
+import httpx
+
+from benchmarks.servers import FakeLLMServer, fake_extraction
+from module.llm_backends import Backend, BackendPool
+from module.llm_streaming import (
+    DEFAULT_MAX_OUTPUT_TOKENS,
+    JSONObjectScanner,
+    LatencyTracker,
+    iter_sse_events,
+    request_llm_json,
+    stream_llm_json,
+)
+
+
+def test_json_object_scanner():
+    scanner = JSONObjectScanner()
+    for piece in ['```json\n{"a": "}{', '\\"", "b": {"c"', ": 1}}", "\n```"]:
+        if scanner.feed(piece):
+            break
+
+    assert scanner.complete
+    assert json.loads(scanner.text) == {"a": '}{"', "b": {"c": 1}}
+
+
+def test_iter_sse_events():
+    lines = ["event: message.delta", 'data: {"content": "x"}', "", "data: [DONE]", ""]
+    assert list(iter_sse_events(lines)) == [
+        ("message.delta", '{"content": "x"}'),
+        (None, "[DONE]"),
+    ]
+
+
+def test_stream_llm_json():
+    with FakeLLMServer() as llm:
+        pool = BackendPool([Backend(llm.url)])
+        result = stream_llm_json(
+            model="m", prompt="p", message="Python and SQL", pool=pool
+        )
+        assert result.outcome == "complete"
+        assert json.loads(result.content) == fake_extraction("Python and SQL")
+
+        # The server stops at the cap it was sent
+        capped = stream_llm_json(
+            model="m", prompt="p", message="x", max_output_tokens=3, pool=pool
+        )
+        assert capped.outcome == "incomplete"
+        assert capped.events == 3 and capped.content is None
+
+        # A server ignoring the cap is cut off by the client
+        cut_off = stream_llm_json(
+            model="m",
+            prompt="p",
+            message="x",
+            max_output_tokens=None,
+            max_events=3,
+            pool=pool,
+        )
+        assert cut_off.outcome == "max_events"
+        assert cut_off.content is None
+
+
+def test_request_llm_json_hedges_stragglers():
+    calls = []
+    release = threading.Event()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            # The straggler, only answers once the test is done
+            release.wait(5)
+        content = json.dumps({"type": "message.delta", "content": '{"ok": true}'})
+        return httpx.Response(
+            200,
+            headers={"Content-Type": "text/event-stream"},
+            content=f"data: {content}\n\n".encode(),
+        )
+
+    backend = Backend("http://llm.test", transport=httpx.MockTransport(handler))
+    with backend.client:
+        start_time = time.perf_counter()
+        content = request_llm_json(
+            model="m",
+            prompt="p",
+            message="x",
+            hedge_after=0.05,
+            latencies=LatencyTracker(),
+            pool=BackendPool([backend]),
+        )
+        assert json.loads(content) == {"ok": True}
+        assert len(calls) == 2
+        assert json.loads(calls[0].content)["max_output_tokens"] == DEFAULT_MAX_OUTPUT_TOKENS
+        assert time.perf_counter() - start_time < 1
+        release.set()
+
+
+def test_cancelled_attempt_is_not_sent():
+    calls = []
+    backend = Backend(
+        "http://llm.test",
+        transport=httpx.MockTransport(lambda request: calls.append(request)),
+    )
+    cancel = threading.Event()
+    cancel.set()
+    with backend.client:
+        result = stream_llm_json(
+            model="m",
+            prompt="p",
+            message="x",
+            cancel=cancel,
+            pool=BackendPool([backend]),
+        )
+
+    assert result.outcome == "cancelled"
+    assert calls == []
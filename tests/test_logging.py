@@ -0,0 +1,94 @@
+"""
+Tests for the log formatter and filters in utils.logging."""
+
+import json
+import logging
+import queue
+
+from utils.logging import (
+    BatchingQueueListener,
+    JSONFormatter,
+    RateLimitFilter,
+    SamplingFilter,
+)
+
+
+def _record(msg: str, level: int = logging.DEBUG, lineno: int = 1) -> logging.LogRecord:
+    return logging.makeLogRecord(
+        {
+            "levelno": level,
+            "levelname": logging.getLevelName(level),
+            "pathname": __file__,
+            "lineno": lineno,
+            "msg": msg,
+        }
+    )
+
+
+def test_json_formatter():
+    formatter = JSONFormatter(fmt_keys={"level": "levelname", "message": "message"})
+    record = _record("first line\n\n  second line  ")
+    record.url = "https://example.com"
+
+    data = json.loads(formatter.format(record))
+    assert data["level"] == "DEBUG"
+    assert data["message"] == "first line\\n second line"
+    assert data["url"] == "https://example.com"
+    assert "timestamp" in data
+
+
+def test_sampling_filter():
+    sampling = SamplingFilter({"DEBUG": 0.0})
+    assert not sampling.filter(_record("dropped"))
+    assert sampling.filter(_record("kept", level=logging.INFO))
+
+
+def test_rate_limit_filter():
+    rate_limit = RateLimitFilter(max_per_second=3)
+    kept = [rate_limit.filter(_record("x")) for _ in range(10)]
+    assert kept.count(True) == 3
+    # Other call sites and higher levels have their own budget
+    assert rate_limit.filter(_record("x", lineno=2))
+    assert rate_limit.filter(_record("x", level=logging.WARNING))
+
+
+def test_batching_queue_listener():
+    class BatchHandler(logging.Handler):
+        def __init__(self):
+            super().__init__(level=logging.INFO)
+            self.batches = []
+
+        def handle_batch(self, records):
+            self.batches.append([record.getMessage() for record in records])
+
+    class ListHandler(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.messages = []
+
+        def emit(self, record):
+            self.messages.append(record.getMessage())
+
+    records = queue.Queue()
+    batching, plain = BatchHandler(), ListHandler()
+    listener = BatchingQueueListener(
+        records, batching, plain, respect_handler_level=True
+    )
+    for index in range(600):
+        level = logging.INFO if index % 2 else logging.DEBUG
+        records.put(_record(str(index), level=level))
+
+    listener.start()
+    listener.stop()
+
+    assert plain.messages == [str(index) for index in range(600)]
+    assert [m for batch in batching.batches for m in batch] == [
+        str(index) for index in range(1, 600, 2)
+    ]
+    assert max(len(batch) for batch in batching.batches) <= listener.batch_size
+    # Stopping twice, or restarting, is fine
+    listener.stop()
+    listener.start()
+    records.put(_record("again"))
+    listener.stop()
+    assert plain.messages[-1] == "again"
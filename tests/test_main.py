@@ -0,0 +1,132 @@
+"""
+Tests for the extraction of the job descriptions in main."""
+
+import pandas as pd
+import pytest
+
+import main
+from benchmarks.servers import fake_extraction
+from module.llm_cache import LLMCache
+from module.pipeline import DEFAULT_QUEUE_SIZE
+
+
+@pytest.fixture
+def raw_parquet(tmp_path, monkeypatch):
+    # The fake LLM answer, without a server
+    monkeypatch.setattr(
+        main,
+        "request_and_parse",
+        lambda url, job_description: {
+            "url": url.strip(),
+            **fake_extraction(job_description),
+        },
+    )
+    path = tmp_path / "raw.parquet"
+    pd.DataFrame(
+        {
+            "url": [f"https://example.com/jobs/{i}" for i in range(300)],
+            "job_posting_company": [f"Company {i % 7}" for i in range(300)],
+            "job_title": ["Data Engineer"] * 300,
+            "job_description": [
+                None if i % 50 == 0 else f"Posting {i}: Python and SQL, {i % 5} years."
+                for i in range(300)
+            ],
+        }
+    ).to_parquet(path, index=False)
+    return path
+
+
+def test_chunked_output_matches_in_memory(raw_parquet, tmp_path):
+    options = {"rule_min_confidence": None, "return_path": True}
+    in_memory = main.process_job_descriptions(
+        path_to_df=raw_parquet,
+        filename=tmp_path / "in_memory.parquet",
+        cache=LLMCache(tmp_path / "cache_1.sqlite3"),
+        resume=False,
+        dedup_threshold=None,
+        strip_boilerplate=False,
+        **options,
+    )
+    chunked = main.process_job_descriptions(
+        path_to_df=raw_parquet,
+        filename=tmp_path / "chunked.parquet",
+        cache=LLMCache(tmp_path / "cache_2.sqlite3"),
+        chunk_size=32,
+        workers=4,
+        **options,
+    )
+
+    expected = pd.read_parquet(in_memory).sort_values("url", ignore_index=True)
+    actual = pd.read_parquet(chunked).sort_values("url", ignore_index=True)
+    assert actual.shape == (300, 10)
+    assert actual.astype(str).equals(expected.astype(str))
+    assert actual["python_required"].isna().sum() == 6
+
+
+def test_chunked_rows_are_written_incrementally(raw_parquet, tmp_path, monkeypatch):
+    read, gaps = [0], []
+    iter_records = main._iter_parquet_records
+
+    def _counting_records(path, chunk_size):
+        for record in iter_records(path, chunk_size):
+            read[0] += 1
+            yield record
+
+    class _CountingWriter(main.ParquetStreamWriter):
+        def write(self, row):
+            gaps.append(read[0] - len(gaps))
+            super().write(row)
+
+    monkeypatch.setattr(main, "_iter_parquet_records", _counting_records)
+    monkeypatch.setattr(main, "ParquetStreamWriter", _CountingWriter)
+    main.process_job_descriptions(
+        path_to_df=raw_parquet,
+        filename=tmp_path / "chunked.parquet",
+        cache=LLMCache(tmp_path / "cache.sqlite3"),
+        rule_min_confidence=None,
+        chunk_size=10,
+        workers=2,
+        return_path=True,
+    )
+
+    # The reader is held back by the bounded queues, it never runs far ahead
+    assert len(gaps) == 300
+    assert max(gaps) <= 2 * DEFAULT_QUEUE_SIZE + 2 + 10
+
+
+def test_chunk_size_needs_a_path():
+    with pytest.raises(ValueError):
+        main.process_job_descriptions(df=pd.DataFrame({"url": []}), chunk_size=10)
+
+
+def test_batch_answers_are_cached_apart(raw_parquet, tmp_path, monkeypatch):
+    batches = []
+    monkeypatch.setattr(
+        main,
+        "request_and_parse_batch",
+        lambda rows: batches.append(len(rows))
+        or [
+            {"url": row["url"].strip(), **fake_extraction(row["job_description"])}
+            for row in rows
+        ],
+    )
+    cache = LLMCache(tmp_path / "cache.sqlite3")
+    options = {
+        "path_to_df": raw_parquet,
+        "filename": tmp_path / "processed.parquet",
+        "cache": cache,
+        "resume": False,
+        "dedup_threshold": None,
+        "rule_min_confidence": None,
+        "return_path": True,
+    }
+
+    main.process_job_descriptions(**options)
+    assert cache.misses == 294
+
+    # Single answers aren't reused for a batched run, and the other way round
+    main.process_job_descriptions(batch_token_budget=2000, **options)
+    assert cache.misses == 2 * 294 and sum(batches) == 294
+    main.process_job_descriptions(batch_token_budget=2000, **options)
+    main.process_job_descriptions(**options)
+    assert cache.misses == 2 * 294 and sum(batches) == 294
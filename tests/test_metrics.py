@@ -0,0 +1,51 @@
+"""
+Tests for the metrics registry in utils.metrics."""
+
+import logging
+
+from utils.metrics import Histogram, MetricsRegistry, MetricsReporter
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(0.1, 1, 10))
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(value)
+
+    assert histogram.counts == [1, 2, 1, 0]
+    assert histogram.quantile(0.5) == 1
+    assert histogram.quantile(1.0) == 5
+    assert histogram.summary()["mean"] == 1.5125
+
+
+def test_registry_snapshot_and_prometheus():
+    registry = MetricsRegistry()
+    registry.inc("fetch_responses_total", host="a.test", status=200)
+    registry.inc("fetch_responses_total", host="a.test", status=200)
+    registry.set("llm_in_flight", 3)
+    with registry.timer("parse_seconds", spec="l"):
+        pass
+
+    snapshot = registry.snapshot()
+    assert snapshot["counters"]["fetch_responses_total"] == {"host=a.test,status=200": 2}
+    assert snapshot["gauges"]["llm_in_flight"] == {"": 3}
+    assert snapshot["histograms"]["parse_seconds"]["spec=l"]["count"] == 1
+
+    text = registry.to_prometheus()
+    assert '# TYPE jobs_fetch_responses_total counter' in text
+    assert 'jobs_fetch_responses_total{host="a.test",status="200"} 2' in text
+    assert 'jobs_parse_seconds_bucket{spec="l",le="+Inf"} 1' in text
+    assert 'jobs_parse_seconds_count{spec="l"} 1' in text
+
+
+def test_reporter(tmp_path, caplog):
+    registry = MetricsRegistry()
+    registry.inc("html_cache_requests_total", result="hit")
+    path = tmp_path / "metrics.prom"
+
+    with caplog.at_level(logging.INFO):
+        with MetricsReporter(registry, prometheus_path=path, interval=60):
+            pass
+
+    record = next(record for record in caplog.records if record.message == "metrics")
+    assert record.metrics["counters"]["html_cache_requests_total"] == {"result=hit": 1}
+    assert 'jobs_html_cache_requests_total{result="hit"} 1' in path.read_text()
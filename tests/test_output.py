@@ -0,0 +1,55 @@
+"""
+Tests for the typed streaming parquet output in module.output."""
+
+import pyarrow.parquet as pq
+
+from module.output import PROCESSED_SCHEMA, coerce_row, to_float, to_str_list, write_rows
+
+
+def test_coerce_row():
+    row = coerce_row(
+        {
+            "url": "https://example.com/1",
+            "job_description": float("nan"),
+            "python_required": "True",
+            "experience_required": "3+ years",
+            "other_programming_languages": "['Java', 'C++']",
+            "required_technologies": "Spark, dbt",
+            "nice_to_know": "",
+            "unknown": "dropped",
+        },
+        PROCESSED_SCHEMA,
+    )
+
+    assert row == {
+        "url": "https://example.com/1",
+        "job_posting_company": None,
+        "job_title": None,
+        "job_description": None,
+        "scraped_at": None,
+        "python_required": True,
+        "experience_required": 3.0,
+        "other_programming_languages": ["Java", "C++"],
+        "required_technologies": ["Spark", "dbt"],
+        "nice_to_know": [],
+    }
+    assert to_float("") is None
+    assert to_str_list(None) is None
+
+
+def test_write_rows(tmp_path):
+    path = tmp_path / "out.parquet"
+    rows = (
+        {"url": f"https://example.com/{i}", "python_required": i % 2 == 0}
+        for i in range(10)
+    )
+
+    assert write_rows(path, rows, schema=PROCESSED_SCHEMA, row_group_size=4) == 10
+
+    parquet_file = pq.ParquetFile(path)
+    assert parquet_file.schema_arrow == PROCESSED_SCHEMA
+    assert parquet_file.metadata.num_row_groups == 3
+    assert parquet_file.read().column("python_required").to_pylist()[:2] == [
+        True,
+        False,
+    ]
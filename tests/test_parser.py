@@ -5,7 +5,8 @@ import pathlib
 
 import pytest
 
-from module.html_parser import _parse_i, _parse_l, parser
+from module import html_parser
+from module.html_parser import _parse_i, _parse_l, parser, resolve_host
 from utils.encryption import decrypt_data
 
 CWD = pathlib.Path(__file__).parent
@@ -62,3 +63,98 @@ def test_parse_i():
     assert result["job_posting_company"] == "Apple"
     assert result["job_title"] == "Data Engineer"
     assert result["job_description"] is not None
+
+
+def test_resolve_host(monkeypatch):
+    monkeypatch.setattr(
+        html_parser, "get_parser_config", lambda: {"example.com": _parse_l}
+    )
+    html_parser._resolve_netloc.cache_clear()
+
+    assert resolve_host("https://example.com/jobs/1") == "example.com"
+    assert resolve_host("https://www.EXAMPLE.com:443/jobs/1") == "example.com"
+    assert resolve_host("https://example.org/jobs/1") is None
+
+    html_parser._resolve_netloc.cache_clear()
+
+
+def test_register_parser(monkeypatch):
+    monkeypatch.setattr(html_parser, "_REGISTERED_PARSERS", {})
+    html_parser.register_parser("127.0.0.1", _parse_i)
+
+    # Registered hosts resolve without decrypting the configured ones
+    assert resolve_host("http://127.0.0.1:8080/jobs/1") == "127.0.0.1"
+
+    data = parser(
+        url="http://127.0.0.1:8080/jobs/1",
+        response_text='<div id="jobDescriptionText"><p>Python</p></div>',
+    )
+    assert data.job_description == "Python"
+
+    html_parser._resolve_netloc.cache_clear()
+
+
+def test_fetch_html_revalidates(monkeypatch, tmp_path):
+    class Response:
+        def __init__(self, status_code, text="", headers=None):
+            self.status_code = status_code
+            self.text = text
+            self.headers = headers or {}
+
+    calls = []
+
+    def fetcher(url, headers=None):
+        calls.append(headers)
+        if headers and headers.get("If-None-Match") == '"v1"':
+            return Response(304)
+        return Response(200, "<html>v1</html>", {"ETag": '"v1"'})
+
+    monkeypatch.setattr(html_parser, "_fetcher", fetcher)
+    monkeypatch.setattr(html_parser, "_REGISTERED_PARSERS", {})
+    html_parser.register_parser("example.com", _parse_i)
+    cache = html_parser.HTMLCache(cache_dir=tmp_path, ttl=0)
+    url = "https://example.com/jobs/1"
+
+    assert html_parser.fetch_html(url, cache=cache) == "<html>v1</html>"
+    assert html_parser.fetch_html(url, cache=cache) == "<html>v1</html>"
+    assert calls == [None, {"If-None-Match": '"v1"'}]
+
+    html_parser._resolve_netloc.cache_clear()
+
+
+def test_fetch_html_skips_challenge_pages(monkeypatch, tmp_path):
+    class Response:
+        status_code = 200
+        text = "<html><title>Just a moment...</title></html>"
+        headers = {}
+
+    monkeypatch.setattr(html_parser, "_fetcher", lambda url: Response())
+    monkeypatch.setattr(html_parser, "_REGISTERED_PARSERS", {})
+    html_parser.register_parser("example.com", _parse_i)
+    cache = html_parser.HTMLCache(cache_dir=tmp_path)
+    url = "https://example.com/jobs/1"
+
+    assert html_parser.fetch_html(url, cache=cache) == Response.text
+    assert cache.get_page(url, allow_expired=True) is None
+
+    html_parser._resolve_netloc.cache_clear()
+
+
+def test_parser_hosts_cache_is_private(monkeypatch, tmp_path):
+    decrypted = []
+
+    def decrypt(data):
+        decrypted.append(data)
+        return data.decode()
+
+    cache_path = tmp_path / "cache" / "parser_hosts.json"
+    monkeypatch.setattr(html_parser, "PARSER_HOSTS_CACHE", cache_path)
+    monkeypatch.setattr(html_parser, "decrypt_data", decrypt)
+    monkeypatch.setattr(
+        html_parser, "_ENCRYPTED_PARSER_CONFIG", {b"example.com": _parse_l}
+    )
+
+    assert html_parser._load_parser_hosts() == {b"example.com": "example.com"}
+    assert html_parser._load_parser_hosts() == {b"example.com": "example.com"}
+    assert decrypted == [b"example.com"]
+    assert cache_path.stat().st_mode & 0o777 == 0o600
@@ -0,0 +1,42 @@
+"""
+Tests for the bounded producer/consumer stage in module.pipeline."""
+
+import pytest
+
+from module.pipeline import run_stage
+
+
+def test_run_stage():
+    results = {}
+
+    run_stage(
+        range(100),
+        worker=lambda item: item * 2,
+        sink=lambda item, result: results.update({item: result}),
+        workers=4,
+        queue_size=2,
+    )
+
+    assert results == {item: item * 2 for item in range(100)}
+
+
+def test_run_stage_worker_error():
+    results = {}
+
+    def _worker(item):
+        if item == 3:
+            raise ValueError("boom")
+        return item
+
+    run_stage(range(5), worker=_worker, sink=lambda i, r: results.update({i: r}))
+
+    assert results == {0: 0, 1: 1, 2: 2, 3: None, 4: 4}
+
+
+def test_run_stage_source_error():
+    def _source():
+        yield 1
+        raise RuntimeError("source failed")
+
+    with pytest.raises(RuntimeError):
+        run_stage(_source(), worker=lambda item: item, sink=lambda i, r: None)
@@ -0,0 +1,28 @@
+"""
+Tests for the token bucket used to rate limit requests per host."""
+
+import pytest
+
+from utils.rate_limit import HostRateLimiter, TokenBucket
+
+
+def test_token_bucket_burst():
+    bucket = TokenBucket(rate=1, capacity=2)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(1, abs=0.05)
+    assert bucket.reserve() == pytest.approx(2, abs=0.05)
+
+
+def test_token_bucket_invalid_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_host_rate_limiter_separate_buckets():
+    limiter = HostRateLimiter(rate=0.01, burst=1, jitter=(0.0, 0.0))
+
+    assert limiter.acquire("a.example") == 0
+    assert limiter.acquire("b.example") == 0
+    assert limiter.bucket("a.example") is not limiter.bucket("b.example")
@@ -0,0 +1,49 @@
+"""
+Tests for the offline bulk re-parse helpers in module.reparse."""
+
+import zipfile
+
+import pytest
+
+from module import reparse
+from module.reparse import list_pages, page_url
+
+
+def test_page_url():
+    html = '<html><head><link rel="canonical" href=" https://example.com/jobs/1 "></head></html>'
+    assert page_url(html) == "https://example.com/jobs/1"
+
+    html = '<html><head><meta property="og:url" content="https://example.com/jobs/2"></head></html>'
+    assert page_url(html) == "https://example.com/jobs/2"
+
+    assert page_url("<html></html>") is None
+
+
+def test_list_pages(tmp_path):
+    (tmp_path / "pages" / "ab").mkdir(parents=True)
+    (tmp_path / "pages" / "a.html").write_text("<html></html>")
+    (tmp_path / "pages" / "ab" / "abc.json.gz").write_bytes(b"")
+    (tmp_path / "pages" / "notes.txt").write_text("")
+
+    assert list_pages(tmp_path / "pages") == ["a.html", "ab/abc.json.gz"]
+
+    with zipfile.ZipFile(tmp_path / "pages.zip", "w") as archive:
+        archive.writestr("b.htm", "<html></html>")
+        archive.writestr("readme.md", "")
+
+    assert list_pages(tmp_path / "pages.zip") == ["b.htm"]
+
+
+def test_empty_pages_are_not_fetched(monkeypatch):
+    parsed = []
+    monkeypatch.setattr(
+        reparse, "parser", lambda url, response_text: parsed.append(url)
+    )
+
+    rows = reparse._parse_pages(iter([("a.html", b""), ("b.html", b" \n ")]))
+
+    assert parsed == []
+    assert [(row["url"], row["job_description"]) for row in rows] == [
+        ("a.html", None),
+        ("b.html", None),
+    ]
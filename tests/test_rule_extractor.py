@@ -0,0 +1,77 @@
+"""
+Tests for the rule-based extractor in module.rule_extractor."""
+
+from module.rule_extractor import MATCHER, KeywordMatcher, agreement, extract
+
+DESCRIPTION = """About us
+We build the data platform behind thousands of online shops across Europe and beyond.
+Responsibilities
+Build batch pipelines in Airflow and model them with dbt.
+Requirements
+3+ years of experience as a data engineer
+Strong Python and T-SQL skills
+Experience with AWS and Docker
+Nice to have
+Kafka, Terraform
+Knowledge of Scala is a plus"""
+
+
+def test_keyword_matcher_prefers_longest_alias():
+    matcher = KeywordMatcher({"technology": {"Spark": ("spark",), "Spark SQL": ("spark sql",)}})
+    assert list(matcher.find("Spark SQL, then Spark.")) == [
+        ("technology", "Spark SQL"),
+        ("technology", "Spark"),
+    ]
+
+
+def test_extract():
+    result = extract(DESCRIPTION.replace("in Airflow and model them with dbt", ""))
+
+    assert result.output == {
+        "python_required": True,
+        "experience_required": 3.0,
+        "other_programming_languages": ["SQL"],
+        "required_technologies": ["AWS", "Docker"],
+        "nice_to_know": ["Tech: Kafka", "Tech: Terraform", "Lang: Scala"],
+    }
+    assert result.confidence >= 0.8
+    # Without sections nothing says what is required
+    assert extract("Python, Kafka and Spark.").confidence < 0.5
+
+
+def test_extract_ambiguous_mentions():
+    result = extract(DESCRIPTION)
+
+    # The responsibilities don't say Airflow and dbt are required
+    assert result.output["required_technologies"] == ["AWS", "Docker"]
+    assert result.output["nice_to_know"][-2:] == ["Tech: Airflow", "Tech: dbt"]
+    assert result.confidence < 0.8
+
+
+def test_generic_aliases_need_context():
+    assert list(MATCHER.find("Oracle is an equal opportunity employer.")) == []
+    assert list(MATCHER.find("Ideas that spark joy")) == []
+    assert list(MATCHER.find("Spark, Hive and Kafka")) == [
+        ("technology", "Spark"),
+        ("technology", "Hive"),
+        ("technology", "Kafka"),
+    ]
+
+
+def test_agreement():
+    rule_output = extract(DESCRIPTION).output
+    llm_output = {
+        "python_required": "true",
+        "experience_required": "3 years",
+        "other_programming_languages": '["SQL"]',
+        "required_technologies": ["aws", "docker", "airflow", "dbt", "spark"],
+        "nice_to_know": [],
+    }
+    scores = agreement([rule_output], [llm_output])
+
+    assert scores["postings"] == 1
+    assert scores["python_required"] == 1.0
+    assert scores["experience_required"] == 1.0
+    assert scores["other_programming_languages"] == 1.0
+    assert scores["required_technologies"] == 0.4
+    assert scores["nice_to_know"] == 0.0
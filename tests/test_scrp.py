@@ -2,9 +2,12 @@
 Just a simple test that each scraper can request a page and that it gets a 200 response.
 """
 
+from urllib.parse import urlsplit
+
 import pytest
 
-from module.scrapers import cloud_scrp, httpx_scrp
+from benchmarks.servers import JobBoardServer
+from module.scrapers import cloud_scrp, get_client, httpx_scrp
 
 
 def test_cloud_scrp():
@@ -17,3 +20,32 @@ def test_httpx_scrp():
     url = "https://www.google.com"
     response = httpx_scrp(url)
     assert response.status_code == 200
+
+
+def test_httpx_scrp_headers_and_pool():
+    with JobBoardServer() as board:
+        url = board.job_url("l", 1)
+        first = httpx_scrp(url)
+        assert first.status_code == 200
+
+        # Per-request headers don't leak into the shared client
+        revalidated = httpx_scrp(url, headers={"If-None-Match": first.headers["ETag"]})
+        assert revalidated.status_code == 304
+        assert "If-None-Match" not in get_client(urlsplit(url).netloc).headers
+        assert httpx_scrp(url).status_code == 200
+        assert board.responses == {200: 2, 304: 1}
+
+
+def test_httpx_scrp_follows_redirects():
+    with JobBoardServer() as board:
+        moved = httpx_scrp(board.moved_url("l", 1))
+        assert moved.status_code == 200
+        assert str(moved.url) == board.job_url("l", 1)
+        assert "Data Engineer 1" in moved.text
+
+        # The conditional headers are kept on the redirected request
+        revalidated = httpx_scrp(
+            board.moved_url("l", 1), headers={"If-None-Match": moved.headers["ETag"]}
+        )
+        assert revalidated.status_code == 304
+        assert board.responses == {301: 2, 200: 1, 304: 1}
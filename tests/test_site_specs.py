@@ -0,0 +1,42 @@
+"""
+Tests for the declarative extraction specs in module.site_specs."""
+
+from module.site_specs import CompiledSpec, FieldSpec, SiteSpec, strip_css_suffix
+
+SPEC = CompiledSpec(
+    SiteSpec(
+        name="test",
+        fields={
+            "job_title": FieldSpec(selectors=("h1.title", "h2.title")),
+            "job_posting_company": FieldSpec(
+                selectors=("span.company a",), post=(strip_css_suffix,)
+            ),
+            "job_description": FieldSpec(selectors=("div#desc",), separator="\n"),
+        },
+    )
+)
+
+
+def test_extract():
+    html = (
+        "<html><body><h2 class='title'>Fallback</h2><h1 class='title'>Engineer</h1>"
+        "<h1 class='title'>Second</h1>"
+        "<span class='company'><a>Acme.css-1abc{color:red}</a></span>"
+        "<div id='desc'><p>One</p><p>Two</p></div></body></html>"
+    )
+
+    assert SPEC.extract(html) == {
+        "job_title": "Engineer",
+        "job_posting_company": "Acme",
+        "job_description": "One\nTwo",
+    }
+
+
+def test_extract_fallback_and_missing():
+    html = "<html><body><h2 class='title'>Fallback</h2></body></html>"
+
+    assert SPEC.extract(html) == {
+        "job_title": "Fallback",
+        "job_posting_company": None,
+        "job_description": None,
+    }
@@ -0,0 +1,98 @@
+"""
+Tests for the SQLite work queue in module.work_queue."""
+
+import multiprocessing
+import time
+
+from module.work_queue import WorkQueue
+
+
+def test_lease_complete_idempotent(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.sqlite3")
+    assert queue.enqueue("scrape", "https://example.com/1", {"url": "1"})
+    assert not queue.enqueue("scrape", "https://example.com/1", {"url": "1"})
+    assert queue.enqueue_many("scrape", [("a", {}), ("b", {}), ("a", {})]) == 2
+
+    first, second = queue.lease("scrape", owner="w1", limit=2)
+    assert first.key == "https://example.com/1" and first.attempts == 1
+    assert queue.counts("scrape") == {
+        "pending": 1,
+        "leased": 2,
+        "done": 0,
+        "failed": 0,
+    }
+
+    assert queue.complete(first, {"ok": 1})
+    # A second completion, e.g. by a worker whose lease expired, is dropped
+    assert not queue.complete(first, {"ok": 2})
+    assert queue.results("scrape") == {"https://example.com/1": {"ok": 1}}
+    queue.close()
+
+
+def test_expired_lease_is_handed_out_again(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.sqlite3", lease_seconds=0.05)
+    queue.enqueue("extract", "a", {})
+    (task,) = queue.lease("extract", owner="crashed")
+    assert queue.lease("extract", owner="w2") == []
+
+    time.sleep(0.1)
+    (retried,) = queue.lease("extract", owner="w2")
+    assert retried.key == "a" and retried.attempts == 2
+    # The old holder lost the lease
+    assert not queue.extend(task)
+    assert queue.fail(task, "too late") is None
+    assert queue.extend(retried)
+    queue.close()
+
+
+def test_heartbeat_keeps_a_slow_task_leased(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.sqlite3", lease_seconds=0.1)
+    queue.enqueue("extract", "a", {})
+    (task,) = queue.lease("extract", owner="w1")
+
+    with queue.heartbeat([task], interval=0.02):
+        time.sleep(0.3)
+        assert queue.lease("extract", owner="w2") == []
+
+    assert queue.complete(task, {"ok": 1})
+    queue.close()
+
+
+def test_fail_backs_off_then_gives_up(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.sqlite3", max_attempts=2, backoff=0.05)
+    queue.enqueue("scrape", "a", {})
+
+    (task,) = queue.lease("scrape", owner="w1")
+    assert queue.fail(task, "HTTP 503") == "pending"
+    assert queue.lease("scrape", owner="w1") == []
+
+    time.sleep(0.1)
+    (task,) = queue.lease("scrape", owner="w1")
+    assert queue.fail(task, "HTTP 503") == "failed"
+    assert queue.keys("scrape", "failed") == ["a"]
+    assert queue.lease("scrape", owner="w1") == []
+    queue.close()
+
+
+def _drain(path: str) -> list[str]:
+    queue = WorkQueue(path)
+    keys = []
+    while tasks := queue.lease("scrape", owner=multiprocessing.current_process().name):
+        for task in tasks:
+            queue.complete(task, {})
+            keys.append(task.key)
+    queue.close()
+    return keys
+
+
+def test_processes_never_share_a_task(tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+    queue = WorkQueue(path)
+    queue.enqueue_many("scrape", ((str(i), {}) for i in range(200)))
+
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        leased = [key for keys in pool.map(_drain, [path] * 4) for key in keys]
+
+    assert sorted(leased, key=int) == [str(i) for i in range(200)]
+    assert queue.counts("scrape")["done"] == 200
+    queue.close()
@@ -0,0 +1,120 @@
+"""
+Tests for the queue-based scrape and extract workers in workers."""
+
+import threading
+
+import pandas as pd
+import pytest
+
+import main
+import workers
+from benchmarks.bench_pipeline import HOSTS, _job_urls
+from benchmarks.servers import FakeLLMServer, JobBoardServer
+from module import html_parser
+from module.html_cache import HTMLCache
+from module.llm_backends import Backend
+from module.llm_cache import LLMCache
+from module.llm_processing import LLM_POOL
+from module.scrapers import httpx_scrp
+from module.work_queue import WorkQueue
+from utils.rate_limit import HostRateLimiter
+
+
+@pytest.fixture
+def servers(monkeypatch):
+    parsers = {
+        host: lambda url, response_text=None, spec_name=spec_name: (
+            html_parser.parse_with_spec(spec_name, url=url, response_text=response_text)
+        )
+        for host, spec_name in HOSTS.items()
+    }
+    monkeypatch.setattr(html_parser, "_REGISTERED_PARSERS", parsers)
+    monkeypatch.setattr(html_parser, "_fetcher", httpx_scrp)
+    monkeypatch.setattr(workers, "POLL_INTERVAL", 0.05)
+    html_parser._resolve_netloc.cache_clear()
+
+    with JobBoardServer() as board, FakeLLMServer() as llm:
+        backend = Backend(llm.url)
+        monkeypatch.setattr(LLM_POOL, "backends", [backend])
+        yield board, llm
+        backend.client.close()
+
+    html_parser._resolve_netloc.cache_clear()
+
+
+def test_enqueue_scrape_extract_export(servers, tmp_path):
+    board, llm = servers
+    urls = _job_urls(board.url, 30)
+    queue = WorkQueue(tmp_path / "queue.sqlite3")
+    added = queue.enqueue_many(
+        workers.SCRAPE_QUEUE, ((url, {"url": url}) for url in urls)
+    )
+    assert added == 30
+
+    # Extraction starts while the scrape worker is still adding postings
+    extracted = []
+    extract_thread = threading.Thread(
+        target=lambda: extracted.append(
+            workers.extract_worker(
+                queue,
+                workers=4,
+                llm_cache=LLMCache(tmp_path / "llm_cache.sqlite3"),
+                rule_min_confidence=None,
+            )
+        )
+    )
+    extract_thread.start()
+    scraped = workers.scrape_worker(
+        queue,
+        max_workers=4,
+        batch_size=8,
+        limiter=HostRateLimiter(rate=1000, burst=1000, jitter=(0, 0)),
+        cache=HTMLCache(tmp_path / "html"),
+    )
+    extract_thread.join(timeout=60)
+
+    assert scraped == 30 and extracted == [30]
+    # Hedged requests can add a few
+    assert llm.requests >= 30
+    for name in (workers.SCRAPE_QUEUE, workers.EXTRACT_QUEUE):
+        assert queue.counts(name) == {
+            "pending": 0,
+            "leased": 0,
+            "done": 30,
+            "failed": 0,
+        }
+
+    raw_path, processed_path = workers.export(queue)
+    raw = pd.read_parquet(raw_path)
+    processed = pd.read_parquet(processed_path)
+    assert sorted(raw["url"]) == sorted(urls)
+    assert processed["job_description"].notna().all()
+    assert processed["python_required"].notna().all()
+    queue.close()
+
+
+def test_extract_worker_shares_cache_keys_with_main(servers, tmp_path):
+    board, llm = servers
+    queue = WorkQueue(tmp_path / "queue.sqlite3")
+    llm_cache = LLMCache(tmp_path / "llm_cache.sqlite3")
+    record = {
+        "url": board.job_url("l", 1),
+        "job_posting_company": "Acme",
+        "job_title": "Data Engineer",
+        "job_description": "Python and SQL, 3 years of experience.",
+    }
+    llm_cache.put(
+        main._extraction_key(record["job_description"]),
+        model=main.LLM_MODEL,
+        result={"python_required": True},
+    )
+    queue.enqueue(workers.EXTRACT_QUEUE, record["url"], record)
+
+    extracted = workers.extract_worker(
+        queue, workers=1, llm_cache=llm_cache, rule_min_confidence=None
+    )
+    assert extracted == 1
+    # Answered from the entry main would have written
+    assert llm.requests == 0
+    assert queue.results(workers.EXTRACT_QUEUE)[record["url"]]["python_required"]
+    queue.close()
@@ -0,0 +1,159 @@
+"""Adaptive concurrency limiting.
+
+``AdaptiveLimiter`` caps the number of requests in flight against a backend and
+tunes that cap from what it observes (AIMD):
+
+- every successful request grows the limit by ``1 / limit``, so a full window
+  of successes adds one slot;
+- when the recent latency rises well above the long-term baseline the backend
+  is queueing requests, and the limit shrinks gently;
+- errors, 429 and 5xx responses cut the limit in half, at most once per
+  observed request latency so one burst of failures only counts once.
+"""
+
+import contextlib
+import logging
+import threading
+import time
+from collections.abc import Iterator
+
+# Defaults
+DEFAULT_INITIAL_LIMIT = 4
+DEFAULT_MIN_LIMIT = 1
+DEFAULT_MAX_LIMIT = 32
+BACKOFF_FACTOR = 0.5  # Limit multiplier on errors and overload responses
+LATENCY_BACKOFF_FACTOR = 0.9  # Limit multiplier when latency is rising
+LATENCY_TOLERANCE = 2.0  # Recent/baseline latency ratio treated as queueing
+BASELINE_ALPHA = 0.05  # Smoothing of the long-term latency baseline
+RECENT_ALPHA = 0.3  # Smoothing of the recent latency
+
+
+def is_overload_status(status_code: int) -> bool:
+    """Whether a response status means the backend is overloaded or failing."""
+    return status_code == 429 or status_code >= 500
+
+
+class _Outcome:
+    success: bool = True
+
+
+class AdaptiveLimiter:
+    """Concurrency limiter whose limit adapts to latency and errors."""
+
+    def __init__(
+        self,
+        initial_limit: int = DEFAULT_INITIAL_LIMIT,
+        min_limit: int = DEFAULT_MIN_LIMIT,
+        max_limit: int = DEFAULT_MAX_LIMIT,
+    ):
+        if not min_limit <= initial_limit <= max_limit:
+            raise ValueError("initial_limit must be between min_limit and max_limit.")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._waiting = 0
+        self._baseline_latency: float | None = None
+        self._recent_latency: float | None = None
+        self._last_backoff = float("-inf")
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of callers waiting for a free slot."""
+        return self._waiting
+
+    def stats(self) -> dict[str, int]:
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "queue_depth": self._waiting,
+            }
+
+    def acquire(self) -> None:
+        with self._cond:
+            self._waiting += 1
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._waiting -= 1
+            self._in_flight += 1
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free, without waiting."""
+        with self._cond:
+            if self._in_flight >= self.limit:
+                return False
+
+            self._in_flight += 1
+            return True
+
+    def release(self, latency: float, success: bool = True) -> None:
+        """Free a slot and feed the outcome of the request into the limit.
+
+        Args:
+            latency: Duration of the request in seconds.
+            success: False if the request failed or the backend was overloaded.
+        """
+        with self._cond:
+            self._in_flight -= 1
+            old_limit = self.limit
+
+            if not success:
+                self._backoff(BACKOFF_FACTOR, latency)
+            else:
+                self._update_latency(latency)
+                if self._recent_latency > self._baseline_latency * LATENCY_TOLERANCE:
+                    self._backoff(LATENCY_BACKOFF_FACTOR, latency)
+                else:
+                    self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+            if self.limit != old_limit:
+                logging.debug(f"Adaptive concurrency limit {old_limit} -> {self.limit}")
+
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self) -> Iterator[_Outcome]:
+        """Hold a slot for the duration of the block.
+
+        The block marks failures through the yielded outcome, exceptions count as
+        failures too.
+        """
+        self.acquire()
+        outcome = _Outcome()
+        start_time = time.perf_counter()
+        try:
+            yield outcome
+        except BaseException:
+            outcome.success = False
+            raise
+        finally:
+            self.release(time.perf_counter() - start_time, success=outcome.success)
+
+    def _update_latency(self, latency: float) -> None:
+        if self._baseline_latency is None:
+            self._baseline_latency = self._recent_latency = latency
+            return
+
+        self._baseline_latency += BASELINE_ALPHA * (latency - self._baseline_latency)
+        self._recent_latency += RECENT_ALPHA * (latency - self._recent_latency)
+
+    def _backoff(self, factor: float, latency: float) -> None:
+        # Requests that were already in flight report the same congestion, only
+        # react once per round trip
+        now = time.monotonic()
+        if now - self._last_backoff < latency:
+            return
+
+        self._last_backoff = now
+        self._limit = max(self.min_limit, self._limit * factor)
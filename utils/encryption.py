@@ -1,3 +1,4 @@
+import functools
 import pathlib
 
 import rsa
@@ -5,27 +6,46 @@ import rsa
 CWD = pathlib.Path(__file__).parent
 
 
-with open(CWD / "../public_key.pem", "rb") as f:
-    PUBLIC_KEY = rsa.PublicKey.load_pkcs1(f.read())
+# The keys are only read when they are first needed, importing this module
+# doesn't touch the disk. ``PUBLIC_KEY`` and ``PRIVATE_KEY`` stay importable
+# through the module ``__getattr__``.
+@functools.cache
+def get_public_key() -> rsa.PublicKey:
+    with open(CWD / "../public_key.pem", "rb") as f:
+        return rsa.PublicKey.load_pkcs1(f.read())
 
-with open(CWD / "../private_key.pem", "rb") as f:
-    PRIVATE_KEY = rsa.PrivateKey.load_pkcs1(f.read())
+
+@functools.cache
+def get_private_key() -> rsa.PrivateKey:
+    with open(CWD / "../private_key.pem", "rb") as f:
+        return rsa.PrivateKey.load_pkcs1(f.read())
+
+
+def __getattr__(name: str):
+    if name == "PUBLIC_KEY":
+        return get_public_key()
+    if name == "PRIVATE_KEY":
+        return get_private_key()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def encrypt_data(data: str) -> bytes:
     """Encrypts the given data using the RSA public key."""
+    public_key = get_public_key()
     data_bytes = data.encode()
-    max_len = PUBLIC_KEY.n.bit_length() // 8 - 11  # PKCS#1 v1.5 padding
+    max_len = public_key.n.bit_length() // 8 - 11  # PKCS#1 v1.5 padding
     chunks = [data_bytes[i : i + max_len] for i in range(0, len(data_bytes), max_len)]
-    encrypted_chunks = [rsa.encrypt(chunk, PUBLIC_KEY) for chunk in chunks]
+    encrypted_chunks = [rsa.encrypt(chunk, public_key) for chunk in chunks]
     return b"".join(encrypted_chunks)
 
 
 def decrypt_data(encrypted_data: bytes) -> str:
     """Decrypts the given encrypted data using the RSA private key."""
-    max_len = PRIVATE_KEY.n.bit_length() // 8
+    private_key = get_private_key()
+    max_len = private_key.n.bit_length() // 8
     chunks = [
         encrypted_data[i : i + max_len] for i in range(0, len(encrypted_data), max_len)
     ]
-    decrypted_chunks = [rsa.decrypt(chunk, PRIVATE_KEY) for chunk in chunks]
+    decrypted_chunks = [rsa.decrypt(chunk, private_key) for chunk in chunks]
     return b"".join(decrypted_chunks).decode()
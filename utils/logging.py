@@ -11,7 +11,6 @@ Available log levels:
 log.debug(), log.info(), log.warning(), log.error(), log.critical()
 """
 
-import ast
 import atexit
 import datetime as dt
 import json
@@ -19,11 +18,23 @@ import logging
 import logging.config
 import logging.handlers
 import pathlib
+import queue
+import random
+import threading
+import time
 from typing import Any
 
+from concurrent_log_handler import ConcurrentRotatingFileHandler
+
+try:
+    import orjson
+except ImportError:  # Optional, the standard json module is used without it
+    orjson = None
+
 # Limits
 MAX_LOG_FILE_SIZE_MB = 2.5
 MAX_LOG_FILE_BACKUPS = 5
+LOG_BATCH_SIZE = 256  # Records written to the log file at once
 
 # Make sure that the logs directory exists
 __LOGS_DIR_PATH = pathlib.Path(__file__).parent.parent / "logs"
@@ -87,7 +98,7 @@ LOGGER_CONFIG = {
             "stream": "ext://sys.stdout",
         },
         "logfile": {
-            "class": "concurrent_log_handler.ConcurrentRotatingFileHandler",
+            "class": "utils.logging.BatchingRotatingFileHandler",
             "level": "DEBUG",
             "formatter": "json",
             "filename": str(__LOGS_DIR_PATH / "app.jsonl"),
@@ -97,6 +108,7 @@ LOGGER_CONFIG = {
         },
         "queue_handler": {
             "class": "logging.handlers.QueueHandler",
+            "listener": "utils.logging.BatchingQueueListener",
             "handlers": [
                 "logfile",
             ],
@@ -112,6 +124,18 @@ LOGGER_CONFIG = {
 }
 
 
+def _dumps(message: dict[str, Any]) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                message, default=str, option=orjson.OPT_NON_STR_KEYS
+            ).decode("utf-8")
+        except TypeError:
+            pass  # e.g. integers over 64 bits, json handles those
+
+    return json.dumps(message, default=str)
+
+
 class JSONFormatter(logging.Formatter):
     """Class for formatting log messages as JSON."""
 
@@ -126,19 +150,20 @@ class JSONFormatter(logging.Formatter):
     # @override
     def format(self, record: logging.LogRecord) -> str:
         message = self._prepare_log_dict(record)
-        return json.dumps(message, default=str)
+        return _dumps(message)
 
     def _prepare_log_dict(self, record: logging.LogRecord):
-        # In case the message is a multiline string, transform it into a single line
-        formatted_message: str = ast.literal_eval(repr(record.getMessage()))
+        formatted_message = record.getMessage()
 
-        formatted_message = "\\n ".join(
-            [
-                mess_split.strip()
-                for mess_split in formatted_message.split("\n")
-                if mess_split.strip() != ""
-            ]
-        )
+        # In case the message is a multiline string, transform it into a single line
+        if "\n" in formatted_message:
+            formatted_message = "\\n ".join(
+                [
+                    mess_split.strip()
+                    for mess_split in formatted_message.split("\n")
+                    if mess_split.strip() != ""
+                ]
+            )
 
         always_fields = {
             "message": formatted_message,
@@ -169,21 +194,223 @@ class JSONFormatter(logging.Formatter):
         return message
 
 
+class BatchingRotatingFileHandler(ConcurrentRotatingFileHandler):
+    """``ConcurrentRotatingFileHandler`` that can write many records under one file lock.
+
+    Every ``emit`` takes an inter-process file lock, ``handle_batch`` formats the
+    records first and takes it once for the whole batch.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        preformatted = getattr(record, "preformatted_batch", None)
+        if preformatted is not None:
+            return preformatted
+
+        return super().format(record)
+
+    def handle_batch(self, records: list[logging.LogRecord]) -> None:
+        lines = []
+        for record in records:
+            if not self.filter(record):
+                continue
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+
+        if not lines:
+            return
+
+        # A single record carrying the whole batch goes through the normal emit
+        batch_record = logging.makeLogRecord(
+            {"levelno": records[-1].levelno, "levelname": records[-1].levelname}
+        )
+        batch_record.preformatted_batch = self.terminator.join(lines)
+        self.acquire()
+        try:
+            self.emit(batch_record)
+        finally:
+            self.release()
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """``QueueListener`` that drains up to ``LOG_BATCH_SIZE`` records at a time.
+
+    Handlers with a ``handle_batch`` method get the whole batch in one call, the
+    others get the records one by one. The batching loop runs in a thread of its
+    own, ``start`` and ``stop`` replace the ones of ``QueueListener`` and only its
+    public ``dequeue``, ``prepare`` and ``handlers`` are used.
+    """
+
+    batch_size = LOG_BATCH_SIZE
+    _STOP = object()  # Put on the queue by ``stop``
+
+    def __init__(
+        self,
+        q: queue.Queue,
+        *handlers: logging.Handler,
+        respect_handler_level: bool = False,
+    ):
+        super().__init__(q, *handlers, respect_handler_level=respect_handler_level)
+        self._batch_thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._batch_thread is not None:
+            return
+
+        self._batch_thread = threading.Thread(
+            target=self._drain, name="log-listener", daemon=True
+        )
+        self._batch_thread.start()
+
+    def stop(self) -> None:
+        """Write the records still queued and stop the thread."""
+        if self._batch_thread is None:
+            return
+
+        self.queue.put_nowait(self._STOP)
+        self._batch_thread.join()
+        self._batch_thread = None
+
+    def _drain(self) -> None:
+        has_task_done = hasattr(self.queue, "task_done")
+        while True:
+            batch = [self.dequeue(True)]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.dequeue(False))
+                except queue.Empty:
+                    break
+
+            records = [record for record in batch if record is not self._STOP]
+            if records:
+                self.handle_batch(records)
+
+            if has_task_done:
+                for _ in batch:
+                    self.queue.task_done()
+
+            if len(records) < len(batch):
+                break
+
+    def handle_batch(self, records: list[logging.LogRecord]) -> None:
+        records = [self.prepare(record) for record in records]
+        for handler in self.handlers:
+            selected = [
+                record
+                for record in records
+                if not self.respect_handler_level or record.levelno >= handler.level
+            ]
+            if not selected:
+                continue
+
+            if hasattr(handler, "handle_batch"):
+                handler.handle_batch(selected)
+            else:
+                for record in selected:
+                    handler.handle(record)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a random fraction of the records of some levels.
+
+    Args:
+        rates: Fraction of records kept per level name, e.g. ``{"DEBUG": 0.1}``.
+            Levels that are not listed are always kept.
+    """
+
+    def __init__(self, rates: dict[str, float] | None = None):
+        super().__init__()
+        self.rates = {
+            logging.getLevelName(level.upper()): rate
+            for level, rate in (rates or {}).items()
+        }
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno)
+        return rate is None or random.random() < rate
+
+
+class RateLimitFilter(logging.Filter):
+    """Limit every call site to ``max_per_second`` records of ``max_level`` or below.
+
+    The first record let through after some were dropped carries their number
+    in a ``suppressed`` attribute.
+    """
+
+    def __init__(self, max_per_second: float = 10, max_level: str | int = "DEBUG"):
+        super().__init__()
+        self.max_per_second = max_per_second
+        self.max_level = (
+            logging.getLevelName(max_level.upper())
+            if isinstance(max_level, str)
+            else max_level
+        )
+        # (pathname, lineno) -> [window start, records in the window, suppressed]
+        self._sites: dict[tuple[str, int], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.setdefault(
+                (record.pathname, record.lineno), [now, 0, 0]
+            )
+            if now - site[0] >= 1:
+                site[0], site[1] = now, 0
+
+            if site[1] >= self.max_per_second:
+                site[2] += 1
+                return False
+
+            site[1] += 1
+            if site[2]:
+                record.suppressed, site[2] = int(site[2]), 0
+
+        return True
+
+
+# The logging is configured once per process, later calls reuse it
+__CONFIG_LOCK = threading.Lock()
+__CONFIGURED_WITH: str | None = None
+__LISTENER: logging.handlers.QueueListener | None = None
+
+
+def _stop_listener() -> None:
+    global __LISTENER
+    if __LISTENER is not None:
+        __LISTENER.stop()
+        __LISTENER = None
+
+
 def get_logger(
     level: str | int = None,
     adjust_handler: dict[str, dict[Any, Any]] = None,
+    sample_rates: dict[str, float] | None = None,
+    max_records_per_site: float | None = None,
     **kwargs,
 ) -> logging.Logger:
     """Create logger.
 
+    The configuration is only applied again when it changed, so calling this
+    from every module doesn't start more queue listeners.
+
     Args:
         level: Log level to set for the root logger. Defaults to None (config is set to ``WARNING``)
         adjust_handler: Dictionary to adjust handler parameters.
+        sample_rates: Fraction of records kept per level, e.g. ``{"DEBUG": 0.1}``.
+        max_records_per_site: Maximum number of DEBUG records per second from a
+            single logging call, the rest are dropped.
         **kwargs: Additional arguments for logging.getLogger().
 
     Returns:
         Configured logger instance.
     """
+    global __CONFIGURED_WITH, __LISTENER
+
     if level:
         LOGGER_CONFIG["loggers"]["root"]["level"] = level
 
@@ -192,13 +419,40 @@ def get_logger(
             for param_key, param_val in params.items():
                 LOGGER_CONFIG["handlers"][handler_name][param_key] = param_val
 
-    # Configure logging
-    logging.config.dictConfig(LOGGER_CONFIG)
-    queue_handler: logging.handlers.QueueHandler = logging.getHandlerByName(
-        "queue_handler"
-    )
-    if queue_handler is not None:
-        queue_handler.listener.start()
-        atexit.register(queue_handler.listener.stop)
+    # Hot debug sites are thinned out before they are queued
+    filters: dict[str, dict[str, Any]] = {}
+    if sample_rates:
+        filters["sampling"] = {
+            "()": "utils.logging.SamplingFilter",
+            "rates": sample_rates,
+        }
+    if max_records_per_site:
+        filters["rate_limit"] = {
+            "()": "utils.logging.RateLimitFilter",
+            "max_per_second": max_records_per_site,
+        }
+    if filters or "filters" in LOGGER_CONFIG:
+        LOGGER_CONFIG["filters"] = filters
+        LOGGER_CONFIG["handlers"]["queue_handler"]["filters"] = list(filters)
+
+    config_signature = json.dumps(LOGGER_CONFIG, sort_keys=True, default=str)
+    with __CONFIG_LOCK:
+        if config_signature != __CONFIGURED_WITH:
+            # Stop the listener of the previous configuration before replacing it
+            if __LISTENER is not None:
+                _stop_listener()
+            else:
+                atexit.register(_stop_listener)
+
+            # Configure logging
+            logging.config.dictConfig(LOGGER_CONFIG)
+            queue_handler: logging.handlers.QueueHandler = logging.getHandlerByName(
+                "queue_handler"
+            )
+            if queue_handler is not None:
+                queue_handler.listener.start()
+                __LISTENER = queue_handler.listener
+
+            __CONFIGURED_WITH = config_signature
 
     return logging.getLogger(**kwargs)
@@ -0,0 +1,260 @@
+"""In-process metrics: counters, gauges and latency histograms.
+
+The pipeline records into the global ``METRICS`` registry. ``MetricsReporter``
+periodically emits a snapshot as a structured ``metrics`` log record, which the
+JSON log file keeps as a nested object, and can also dump the registry in the
+Prometheus text format.
+
+Example:
+    with METRICS.timer("fetch_seconds", host="example.com"):
+        response = fetch(url)
+    METRICS.inc("fetch_responses_total", host="example.com", status=response.status_code)
+"""
+
+import bisect
+import contextlib
+import logging
+import math
+import os
+import pathlib
+import threading
+import time
+from collections.abc import Iterator
+
+# Defaults
+DEFAULT_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600,
+)  # fmt: skip
+DEFAULT_REPORT_INTERVAL = 60.0  # Seconds between two reports of a running job
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict[str, object]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Histogram:
+    """Counts of observations in fixed buckets, plus their sum and maximum."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # The last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile."""
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+
+        return self.max
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": round(self.max, 6),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe store of labelled counters, gauges and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[Labels, float]] = {}
+        self._gauges: dict[str, dict[Labels, float]] = {}
+        self._histograms: dict[str, dict[Labels, Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self._gauges.setdefault(name, {})[_labels(labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+
+    @contextlib.contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Observe the duration of the ``with`` block in the ``name`` histogram."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start_time, **labels)
+
+    def counter_value(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_labels(labels), 0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> dict[str, dict[str, object]]:
+        """All the series as plain data, labels are rendered as ``k=v,k=v``."""
+
+        def _render(labels: Labels) -> str:
+            return ",".join(f"{key}={value}" for key, value in labels)
+
+        with self._lock:
+            return {
+                "counters": {
+                    name: {_render(labels): value for labels, value in series.items()}
+                    for name, series in self._counters.items()
+                },
+                "gauges": {
+                    name: {_render(labels): value for labels, value in series.items()}
+                    for name, series in self._gauges.items()
+                },
+                "histograms": {
+                    name: {
+                        _render(labels): histogram.summary()
+                        for labels, histogram in series.items()
+                    }
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def to_prometheus(self, prefix: str = "jobs_") -> str:
+        """Render every series in the Prometheus text exposition format."""
+
+        def _render(labels: Labels, extra: Labels = ()) -> str:
+            labels = labels + extra
+            if not labels:
+                return ""
+            escaped = (
+                (key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                for key, value in labels
+            )
+            return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+        lines = []
+        with self._lock:
+            for kind, metrics in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(metrics.items()):
+                    lines.append(f"# TYPE {prefix}{name} {kind}")
+                    lines += [
+                        f"{prefix}{name}{_render(labels)} {value}"
+                        for labels, value in series.items()
+                    ]
+
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                for labels, histogram in series.items():
+                    cumulative = 0
+                    for bound, count in zip(
+                        histogram.buckets + (math.inf,), histogram.counts
+                    ):
+                        cumulative += count
+                        le = "+Inf" if math.isinf(bound) else f"{bound:g}"
+                        lines.append(
+                            f"{prefix}{name}_bucket{_render(labels, (('le', le),))} {cumulative}"
+                        )
+                    lines.append(f"{prefix}{name}_sum{_render(labels)} {histogram.sum}")
+                    lines.append(f"{prefix}{name}_count{_render(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def dump_prometheus(self, path: str | pathlib.Path) -> None:
+        """Write the Prometheus text format to ``path``, replacing it atomically."""
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f"{path.suffix}.tmp")
+        tmp_path.write_text(self.to_prometheus(), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+
+# Process-wide registry the pipeline records into
+METRICS = MetricsRegistry()
+
+
+def emit(
+    registry: MetricsRegistry = METRICS,
+    logger: logging.Logger | None = None,
+) -> None:
+    """Log a snapshot of ``registry`` as a structured ``metrics`` record."""
+    (logger or logging.getLogger(__name__)).info(
+        "metrics", extra={"metrics": registry.snapshot()}
+    )
+
+
+class MetricsReporter:
+    """Emit the metrics, and optionally dump them to a file, every ``interval`` seconds.
+
+    A final report is made when the reporter is stopped.
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry = METRICS,
+        logger: logging.Logger | None = None,
+        prometheus_path: str | pathlib.Path | None = None,
+        interval: float = DEFAULT_REPORT_INTERVAL,
+    ):
+        self.registry = registry
+        self.logger = logger
+        self.prometheus_path = prometheus_path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="metrics-reporter", daemon=True
+        )
+
+    def report(self) -> None:
+        emit(self.registry, self.logger)
+        if self.prometheus_path is not None:
+            try:
+                self.registry.dump_prometheus(self.prometheus_path)
+            except OSError as e:
+                logging.warning(f"Could not write the metrics file: {e}")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.report()
+
+    def start(self) -> "MetricsReporter":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.report()
+
+    def __enter__(self) -> "MetricsReporter":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,17 @@
+"""Location of the working data directory.
+
+Everything the pipeline reads and writes at run time (the csv files with the
+URLs, caches, journals and outputs) lives under ``TMP_DIR``. It defaults to
+``tmp`` in the project directory and can be moved with the ``JOBS_TMP_DIR``
+environment variable, e.g. to keep benchmark runs away from the real data.
+
+The directory is git-ignored: besides the scraped data it holds the decrypted
+parser host names (``tmp/cache/parser_hosts.json``), which must stay private.
+"""
+
+import os
+import pathlib
+
+TMP_DIR = pathlib.Path(
+    os.environ.get("JOBS_TMP_DIR") or pathlib.Path(__file__).parent.parent / "tmp"
+)
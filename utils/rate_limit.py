@@ -0,0 +1,87 @@
+"""Rate limiting primitives shared by the scrapers."""
+
+import logging
+import random
+import threading
+import time
+
+# Defaults
+DEFAULT_HOST_RATE = 0.1  # Requests per second allowed for a single host
+DEFAULT_HOST_BURST = 1
+DEFAULT_JITTER = (0.0, 3.0)  # Extra random delay (seconds) after each token
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    Tokens are reserved up front, so waiting callers are served in the order
+    they asked and never spin on the lock.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0.")
+
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Reserve ``tokens`` and return how many seconds to wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            self._tokens -= tokens
+
+            if self._tokens >= 0:
+                return 0.0
+
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Block until ``tokens`` are available. Returns the time spent waiting."""
+        wait_time = self.reserve(tokens)
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+        return wait_time
+
+
+class HostRateLimiter:
+    """Keeps one ``TokenBucket`` per host."""
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_HOST_RATE,
+        burst: float = DEFAULT_HOST_BURST,
+        jitter: tuple[float, float] = DEFAULT_JITTER,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(rate=self.rate, capacity=self.burst)
+
+            return self._buckets[host]
+
+    def acquire(self, host: str) -> float:
+        waited = self.bucket(host).acquire()
+
+        # Keep the request pattern from being perfectly periodic
+        if self.jitter[1] > 0:
+            jitter_time = random.uniform(*self.jitter)
+            time.sleep(jitter_time)
+            waited += jitter_time
+
+        logging.debug(f"Waited {waited:.2f} seconds for host {host}.")
+        return waited
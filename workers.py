@@ -0,0 +1,303 @@
+"""Queue-based workers, to spread scraping and extraction over several processes.
+
+The URLs of the csv files are put on the ``scrape`` queue of a ``WorkQueue``.
+Scrape workers lease them in batches and run ``iter_scrape``, every scraped
+posting goes on the ``extract`` queue. Extract workers send those to the LLM
+with ``request_and_parse`` (the LLM cache and the rule-based extractor are
+checked first, and the LLM input and its cache key are built like in
+``run_pipeline``). Workers keep renewing the leases of the tasks they are
+running, so only the tasks of a dead worker are handed out again. Any number of
+workers of both kinds can run at the same time, and ``export`` writes the
+parquet outputs from the results once they are done.
+
+Workers stop once their queue is drained, or keep polling with ``--follow``.
+Host rate limits are per process, so the politeness budget of a host is
+multiplied by the number of scrape workers.
+
+Usage:
+    python workers.py enqueue
+    python workers.py scrape [--workers N] [--batch-size N] [--follow]
+    python workers.py extract [--workers N] [--follow]
+    python workers.py status
+    python workers.py export
+"""
+
+import argparse
+import concurrent.futures
+import os
+import pathlib
+import socket
+import threading
+import time
+from dataclasses import asdict
+from typing import Any
+
+import pendulum
+
+import main
+from module.boilerplate import BoilerplateIndex
+from module.html_cache import HTMLCache
+from module.journal import fingerprint
+from module.llm_cache import LLMCache
+from module.llm_processing import LLM_POOL
+from module.scrape_engine import DEFAULT_MAX_WORKERS, IN_FLIGHT_PER_WORKER, iter_scrape
+from module.work_queue import WorkQueue
+from utils.logging import get_logger
+from utils.metrics import MetricsReporter
+from utils.rate_limit import HostRateLimiter
+
+log = get_logger()
+
+# Defaults
+SCRAPE_QUEUE = "scrape"
+EXTRACT_QUEUE = "extract"
+POLL_INTERVAL = 5.0  # Seconds between polls of an empty queue
+BOILERPLATE_WINDOW = 20_000  # Latest postings the boilerplate counts cover
+
+
+def _owner() -> str:
+    # Unique per thread, so a lease can only be completed or failed by its holder
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def _drained(queue: WorkQueue, *names: str) -> bool:
+    """Whether no task of the ``names`` queues is pending or leased any more."""
+    for name in names:
+        counts = queue.counts(name)
+        if counts["pending"] or counts["leased"]:
+            return False
+
+    return True
+
+
+def enqueue_urls(queue: WorkQueue) -> int:
+    """Put the URLs of the csv files in the /tmp directory on the scrape queue."""
+    added = 0
+    for csv_file in main._find_csv_files():
+        urls = main._read_urls(csv_file)
+        added += queue.enqueue_many(SCRAPE_QUEUE, ((url, {"url": url}) for url in urls))
+
+    log.info(f"Enqueued {added} new URLs, {queue.counts(SCRAPE_QUEUE)}")
+    return added
+
+
+def scrape_worker(
+    queue: WorkQueue,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    batch_size: int | None = None,
+    limiter: HostRateLimiter | None = None,
+    cache: HTMLCache | None = None,
+    follow: bool = False,
+) -> int:
+    """Scrape leased URLs until the scrape queue is drained.
+
+    Args:
+        queue: Work queue to pull from.
+        max_workers: Maximum number of concurrent requests across all hosts.
+        batch_size: URLs leased at a time. Defaults to the number ``iter_scrape`` keeps in flight.
+        limiter: Per-host rate limiter. Defaults to ``HostRateLimiter()``.
+        cache: Raw HTML cache the pages are read through. Defaults to ``HTMLCache()``.
+        follow: Keep polling for new URLs instead of stopping.
+
+    Returns:
+        int: Number of URLs scraped by this worker.
+    """
+    batch_size = batch_size or max_workers * IN_FLIGHT_PER_WORKER
+    limiter = limiter if limiter is not None else HostRateLimiter()
+    cache = cache if cache is not None else HTMLCache()
+    owner = _owner()
+    scraped = 0
+
+    while True:
+        tasks = queue.lease(SCRAPE_QUEUE, owner, limit=batch_size)
+        if not tasks:
+            if not follow and _drained(queue, SCRAPE_QUEUE):
+                return scraped
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        urls = [task.payload["url"] for task in tasks]
+        with queue.heartbeat(tasks):
+            for index, job_data in iter_scrape(
+                urls, max_workers=max_workers, limiter=limiter, cache=cache
+            ):
+                task = tasks[index]
+                if job_data.job_description is None:
+                    queue.fail(task, "No job description scraped")
+                    continue
+
+                record = asdict(job_data)
+                # Enqueued before completing, a crash in between only repeats the scrape
+                queue.enqueue(EXTRACT_QUEUE, task.key, record)
+                queue.complete(task, record)
+                scraped += 1
+
+
+def _extract_one(
+    record: dict[str, Any],
+    llm_cache: LLMCache,
+    rule_min_confidence: float | None,
+    boilerplate: BoilerplateIndex | None,
+) -> dict[str, Any]:
+    llm_input = main._streaming_llm_input(record, boilerplate)
+    key = main._extraction_key(llm_input)
+    cached_output = llm_cache.get(key)
+    if cached_output is not None:
+        return cached_output
+
+    rule_output = main._rule_based_output(
+        record["job_description"], rule_min_confidence
+    )
+    if rule_output is not None:
+        return rule_output
+
+    result = main.request_and_parse(url=record["url"], job_description=llm_input)
+    llm_output = {col: val for col, val in result.items() if col != "url"}
+    if llm_output:
+        llm_cache.put(key, model=main.LLM_MODEL, result=llm_output)
+
+    return llm_output
+
+
+def extract_worker(
+    queue: WorkQueue,
+    workers: int | None = None,
+    llm_cache: LLMCache | None = None,
+    rule_min_confidence: float | None = None,
+    strip_boilerplate: bool = True,
+    follow: bool = False,
+) -> int:
+    """Extract leased job descriptions until both queues are drained.
+
+    Args:
+        queue: Work queue to pull from.
+        workers: Threads sending job descriptions to the LLM. Defaults to the LLM pool's maximum concurrency.
+        llm_cache: LLM result cache. Defaults to ``LLMCache()``.
+        rule_min_confidence: Keep the rule-based extraction of the postings it is at least this confident about. Defaults to None, every posting is sent to the LLM.
+        strip_boilerplate: Leave the paragraphs that repeat across the postings of a company or a site out of the LLM input, counted over the latest ``BOILERPLATE_WINDOW`` postings this worker has seen.
+        follow: Keep polling for new job descriptions instead of stopping.
+
+    Returns:
+        int: Number of job descriptions extracted by this worker.
+    """
+    workers = workers or LLM_POOL.max_limit
+    llm_cache = llm_cache if llm_cache is not None else LLMCache()
+    # Capped, a ``follow`` worker would otherwise count postings forever
+    boilerplate = (
+        BoilerplateIndex(max_postings=BOILERPLATE_WINDOW) if strip_boilerplate else None
+    )
+
+    def _loop() -> int:
+        owner = _owner()
+        extracted = 0
+        while True:
+            tasks = queue.lease(EXTRACT_QUEUE, owner)
+            if not tasks:
+                # Scrape workers may still be adding job descriptions
+                if not follow and _drained(queue, SCRAPE_QUEUE, EXTRACT_QUEUE):
+                    return extracted
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            task = tasks[0]
+            try:
+                with queue.heartbeat(tasks):
+                    llm_output = _extract_one(
+                        task.payload, llm_cache, rule_min_confidence, boilerplate
+                    )
+            except Exception as e:
+                log.error(f"Error extracting {task.key}: {e}")
+                llm_output = {}
+
+            if not llm_output:
+                queue.fail(task, "No valid LLM output")
+                continue
+
+            queue.complete(
+                task,
+                {
+                    **llm_output,
+                    "fingerprint": fingerprint(task.payload["job_description"]),
+                },
+            )
+            extracted += 1
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="extract"
+    ) as executor:
+        futures = [executor.submit(_loop) for _ in range(workers)]
+        return sum(future.result() for future in futures)
+
+
+def export(queue: WorkQueue) -> tuple[pathlib.Path, pathlib.Path]:
+    """Write the raw and the processed parquet files from the finished tasks."""
+    scraped = queue.results(SCRAPE_QUEUE)
+    extracted = queue.results(EXTRACT_QUEUE)
+    raw_rows = [
+        *scraped.values(),
+        *({"url": url} for url in queue.keys(SCRAPE_QUEUE, "failed")),
+    ]
+
+    def _processed_rows():
+        for record in raw_rows:
+            output = dict(extracted.get(record["url"], {}))
+            # Only join extractions of the job description that was scraped
+            if output.pop("fingerprint", None) == fingerprint(
+                record.get("job_description")
+            ):
+                yield {**record, **output}
+            else:
+                yield record
+
+    output_dir = main.tmp_dir / "output"
+    timestamp = pendulum.now().to_datetime_string()
+    return (
+        main._write_output(raw_rows, output_dir / f"{timestamp}_raw.parquet", "raw"),
+        main._write_output(
+            _processed_rows(),
+            output_dir / f"{timestamp}_processed.parquet",
+            "processed",
+        ),
+    )
+
+
+def cli() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Scrape and extract job postings from a shared work queue."
+    )
+    arg_parser.add_argument(
+        "command", choices=["enqueue", "scrape", "extract", "status", "export"]
+    )
+    arg_parser.add_argument("--workers", type=int, default=None)
+    arg_parser.add_argument("--batch-size", type=int, default=None)
+    arg_parser.add_argument("--follow", action="store_true")
+    arg_parser.add_argument("--queue", help="Work queue database file.")
+    args = arg_parser.parse_args()
+
+    queue = WorkQueue(args.queue) if args.queue else WorkQueue()
+    start_time = time.perf_counter()
+    with MetricsReporter(logger=log):
+        if args.command == "enqueue":
+            enqueue_urls(queue)
+        elif args.command == "scrape":
+            count = scrape_worker(
+                queue,
+                max_workers=args.workers or DEFAULT_MAX_WORKERS,
+                batch_size=args.batch_size,
+                follow=args.follow,
+            )
+            log.info(f"Scraped {count} URLs.")
+        elif args.command == "extract":
+            count = extract_worker(queue, workers=args.workers, follow=args.follow)
+            log.info(f"Extracted {count} job descriptions.")
+        elif args.command == "export":
+            export(queue)
+
+    for name in (SCRAPE_QUEUE, EXTRACT_QUEUE):
+        log.info(f"Queue {name}: {queue.counts(name)}")
+    log.info(f"Finished after {time.perf_counter() - start_time:.1f} seconds.")
+    queue.close()
+
+
+if __name__ == "__main__":
+    cli()